@@ -0,0 +1,108 @@
+"""
+Micro-benchmark del renderizado ADF.
+
+- Solo párrafos de texto plano (el caso habitual de los comentarios): la única entrada que el
+  bucle anterior (concatenando con +=) renderiza entera, así que es la única comparación
+  equivalente con `render_adf`, sin memo y con memo (acierto), de 3 a 1000 párrafos.
+- Documentos con listas anidadas, código, tablas, formato y menciones: solo `render_adf`, porque
+  el bucle anterior descartaba todo lo que no fuera texto de un párrafo de primer nivel.
+
+Uso: python -m benchmarks.bench_adf
+"""
+import random
+import timeit
+
+from utils.adf import render_adf
+
+
+def legacy_render(doc: dict) -> str:
+    """Copia del bucle que usaban `_create_ticket_embed` y el webhook de comentarios."""
+    text = ""
+    for block in doc["content"]:
+        if block["type"] == "paragraph":
+            for text_block in block.get("content", []):
+                if text_block.get("type") == "text":
+                    text += text_block.get("text", "") + "\n"
+    text = text.strip()
+    if len(text) > 1024:
+        text = text[:1021] + "..."
+    return text
+
+
+def build_document(blocks: int, seed: int = 0) -> dict:
+    """Genera un documento ADF con párrafos, listas anidadas, código y tablas."""
+    rng = random.Random(seed)
+    words = ["jira", "discord", "ticket", "sprint", "deploy", "error", "cliente", "webhook"]
+
+    def paragraph():
+        return {"type": "paragraph", "content": [
+            {"type": "text", "text": " ".join(rng.choice(words) for _ in range(12))},
+            {"type": "text", "text": "importante", "marks": [{"type": "strong"}]},
+            {"type": "mention", "attrs": {"text": "@Ana"}},
+        ]}
+
+    content = []
+    for index in range(blocks):
+        kind = index % 4
+        if kind == 0:
+            content.append(paragraph())
+        elif kind == 1:
+            content.append({"type": "bulletList", "content": [
+                {"type": "listItem", "content": [paragraph(), {"type": "orderedList", "content": [
+                    {"type": "listItem", "content": [paragraph()]} for _ in range(3)
+                ]}]} for _ in range(3)
+            ]})
+        elif kind == 2:
+            content.append({"type": "codeBlock", "attrs": {"language": "python"},
+                            "content": [{"type": "text", "text": "print('hola')\n" * 5}]})
+        else:
+            content.append({"type": "table", "content": [
+                {"type": "tableRow", "content": [
+                    {"type": "tableCell", "content": [paragraph()]} for _ in range(3)
+                ]} for _ in range(3)
+            ]})
+    return {"type": "doc", "version": 1, "content": content}
+
+
+def build_plain_document(paragraphs: int, seed: int = 0) -> dict:
+    """Genera un comentario típico: solo párrafos con texto plano."""
+    rng = random.Random(seed)
+    words = ["jira", "discord", "ticket", "sprint", "deploy", "error", "cliente", "webhook"]
+    return {"type": "doc", "version": 1, "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": " ".join(rng.choice(words) for _ in range(12))}]}
+        for _ in range(paragraphs)
+    ]}
+
+
+def _time(function, number: int) -> float:
+    return timeit.timeit(function, number=number) / number
+
+
+def main():
+    number = 200
+    print("Solo párrafos (misma entrada para los dos)")
+    print(f"{'párrafos':>8} | {'anterior':>12} | {'render':>12} | {'render memo':>12}")
+    for paragraphs in (3, 10, 30, 100, 1000):
+        doc = build_plain_document(paragraphs)
+        repeat = number * 10 if paragraphs <= 30 else number
+        legacy = _time(lambda: legacy_render(doc), repeat)
+        cold_time = _time(lambda: render_adf(doc), repeat)
+        memo_key = ("BENCH-PLAIN", str(paragraphs))
+        render_adf(doc, memo_key=memo_key)
+        memo_time = _time(lambda: render_adf(doc, memo_key=memo_key), repeat)
+        print(f"{paragraphs:>8} | {legacy * 1e6:>10.1f}µs | {cold_time * 1e6:>10.1f}µs | {memo_time * 1e6:>10.1f}µs")
+
+    print()
+    print("Nodos variados (listas, código, tablas, formato, menciones; el bucle anterior no los renderiza)")
+    print(f"{'bloques':>8} | {'render':>12} | {'render memo':>12}")
+    for blocks in (10, 100, 1000, 5000):
+        doc = build_document(blocks)
+        cold_time = _time(lambda: render_adf(doc), number)
+        memo_key = ("BENCH-1", str(blocks))
+        render_adf(doc, memo_key=memo_key)
+        memo_time = _time(lambda: render_adf(doc, memo_key=memo_key), number)
+        print(f"{blocks:>8} | {cold_time * 1e6:>10.1f}µs | {memo_time * 1e6:>10.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
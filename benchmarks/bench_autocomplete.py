@@ -0,0 +1,50 @@
+"""
+Benchmark del autocompletado de `ticket_id`.
+Mide el coste por pulsación de `PrefixIndex.search` frente a recorrer todas las entradas
+comparando cada término, con el índice lleno y prefijos de distinta selectividad.
+Discord da 3 segundos para responder; aquí se busca quedar muy por debajo del milisegundo.
+
+Uso: python -m benchmarks.bench_autocomplete
+"""
+import random
+import timeit
+
+from benchmarks.fake_jira import make_issue
+from utils.autocomplete import MAX_CHOICES, issue_suggestions, remember_issue
+
+PREFIXES = ("", "b", "bench-1", "4", "ticket", "prueba 1", "zzz")
+
+
+def linear_search(entries: list, prefix: str) -> list:
+    """Alternativa ingenua: comprobar todos los términos de todas las entradas."""
+    words = prefix.casefold().split()
+    matches = [
+        (key, label) for key, label, terms in entries
+        if all(any(term.startswith(word) for term in terms) for word in words)
+    ]
+    return matches[-MAX_CHOICES:]
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'entradas':>9} | {'prefijo':>10} | {'bisect':>10} | {'recorrido':>11} | {'inserción':>10}")
+    for count in (500, 2000, 10000):
+        issue_suggestions.maxsize = count
+        issue_suggestions.clear()
+        issues = [make_issue(index) for index in range(1, count + 1)]
+        rng.shuffle(issues)
+        insert = timeit.timeit(lambda: [remember_issue(issue) for issue in issues], number=1) / count
+
+        entries = [
+            (value, label, terms)
+            for value, label, terms, _ in issue_suggestions._entries.values()
+        ]
+        for prefix in PREFIXES:
+            indexed = timeit.timeit(lambda: issue_suggestions.search(prefix), number=200) / 200
+            linear = timeit.timeit(lambda: linear_search(entries, prefix), number=5) / 5
+            print(f"{count:>9} | {prefix!r:>10} | {indexed * 1e6:>8.1f}µs | {linear * 1e6:>9.1f}µs | "
+                  f"{insert * 1e6:>8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Prueba de carga de los comandos `/jira` contra un Jira falso local (con latencia y 429
+configurables) y una interacción de Discord falsa. Mide la latencia de cada invocación
+(del `defer` al último followup), comandos por segundo, peticiones reales a Jira y memoria.
+
+Uso:
+    python -m benchmarks.bench_commands --invocations 500 --concurrency 50
+    python -m benchmarks.bench_commands --jira-latency 0.2 --rate-limit-ratio 0.05 --save base.json
+    python -m benchmarks.bench_commands --ticket-index --baseline base.json
+"""
+import io
+import sys
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+
+from benchmarks.fake_discord import FakeBot, FakeInteraction
+from benchmarks.fake_jira import USERS, FakeJira
+from benchmarks.harness import (
+    LatencyRecorder, MemoryTracker, add_report_arguments, load_baseline, print_report, save_results
+)
+from cogs.jira_commands import JiraCommands, build_index_jql, index_statuses
+from utils.issue_cache import issue_cache
+from utils.jira_client import JiraClient
+from utils.ticket_index import ticket_index
+
+SCENARIOS = ("ver", "ver-lote", "pendientes", "resumen")
+
+
+async def invoke(cog: JiraCommands, scenario: str, rng: random.Random, issue_keys: list,
+                 batch_size: int) -> FakeInteraction:
+    interaction = FakeInteraction(scenario.split("-")[0], user_id=rng.randint(1, 1000))
+    if scenario == "ver":
+        await cog.jira_ver.callback(cog, interaction, ticket_id=rng.choice(issue_keys))
+    elif scenario == "ver-lote":
+        # Un rango como los que se pegan en una revisión de release, con alguna clave inexistente.
+        first = rng.randint(1, len(issue_keys))
+        ticket_ids = f"BENCH-{first}..BENCH-{first + batch_size - 2}, BENCH-999999"
+        await cog.jira_ver.callback(cog, interaction, ticket_id=ticket_ids)
+    elif scenario == "pendientes":
+        await cog.jira_pendientes.callback(cog, interaction, usuario=rng.choice(USERS))
+    else:
+        await cog.jira_resumen.callback(cog, interaction, usuario=rng.choice(USERS))
+    return interaction
+
+
+async def run_scenario(cog: JiraCommands, scenario: str, args, issue_keys: list) -> dict:
+    rng = random.Random(args.seed)
+    recorder = LatencyRecorder(scenario)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    issue_cache.clear()
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                interaction = await invoke(cog, scenario, rng, issue_keys, args.batch_size)
+            except Exception as e:
+                print(f"Error en la invocación de '{scenario}': {e}", file=sys.stderr)
+                recorder.errors += 1
+                return
+            if not interaction.sent:
+                recorder.errors += 1
+                return
+            recorder.record(time.perf_counter() - started)
+
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.invocations)))
+        elapsed = time.perf_counter() - started
+
+    return recorder.summary(elapsed)
+
+
+async def run(args) -> dict:
+    jira = FakeJira(issue_count=args.issues, latency=args.jira_latency, jitter=args.jira_jitter,
+                    rate_limit_ratio=args.rate_limit_ratio)
+    base_url = await jira.start()
+    client = JiraClient(base_url, rate_limit=args.rate_limit, rate_burst=max(args.rate_limit, 1),
+                        backoff_base=0.05, max_connections=args.concurrency)
+    cog = JiraCommands(FakeBot(), client)
+    issue_keys = list(jira.issues)[:args.hot_issues]
+
+    if args.ticket_index:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            ticket_index.start(client, build_index_jql(), index_statuses())
+            while not ticket_index.is_ready():
+                await asyncio.sleep(0.01)
+        print(f"Índice de tickets sincronizado en {time.perf_counter() - started:.2f}s ({len(ticket_index)} issues).")
+
+    results = {}
+    with MemoryTracker(args.trace_memory) as memory:
+        for scenario in args.scenarios:
+            requests_before = jira.requests
+            results[scenario] = await run_scenario(cog, scenario, args, issue_keys)
+            results[scenario]["jira_requests"] = jira.requests - requests_before
+
+    results["jira"] = {
+        "requests": jira.requests,
+        "rate_limited": jira.rate_limited,
+        "client_retries": client.stats["retries"],
+        "coalesced": client.coalescer.merged,
+    }
+    results["memory"] = memory.summary()
+
+    await ticket_index.stop()
+    await client.aclose()
+    await jira.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los comandos /jira.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--invocations", type=int, default=300, help="Invocaciones por escenario.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Invocaciones simultáneas.")
+    parser.add_argument("--issues", type=int, default=500, help="Issues en el Jira falso.")
+    parser.add_argument("--hot-issues", type=int, default=100, help="Issues distintos consultados con /jira ver.")
+    parser.add_argument("--jira-latency", type=float, default=0.05, help="Latencia base del Jira falso (s).")
+    parser.add_argument("--jira-jitter", type=float, default=0.02, help="Latencia aleatoria añadida (s).")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fracción de peticiones que reciben 429.")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="JIRA_RATE_LIMIT del cliente (0 = sin limitador, para medir solo el bot).")
+    parser.add_argument("--batch-size", type=int, default=20, help="Claves por invocación en 'ver-lote'.")
+    parser.add_argument("--ticket-index", action="store_true",
+                        help="Sincroniza el índice de tickets y responde los listados desde él.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="No oculta los print() de los comandos.")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    title = f"Comandos /jira ({args.invocations} invocaciones, concurrencia {args.concurrency})"
+    print_report(title, results, load_baseline(args.baseline))
+    save_results(args.save, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark del formateo de notificaciones, que se ejecuta en cada webhook.
+Compara la antigua cadena de `if/elif` con f-strings (que reconstruía el banner y el enlace
+en cada evento) con las plantillas precompiladas de `web/notification_templates.py`, y mide
+también el coste de generar embeds.
+
+Uso: python -m benchmarks.bench_notification_format
+"""
+import random
+import timeit
+
+from web.notification_templates import LOCALES, TemplateRegistry
+from web.webhook_server import Notification
+
+BASE_URL = "https://jira.example.com"
+EVENT_TYPES = list(LOCALES["es"]["events"]) + ["comment_deleted"]
+
+
+def legacy_format(notification: Notification) -> str:
+    """Copia de la antigua `format_notification` (cadena de if/elif con f-strings)."""
+    event_type = notification.event_type
+    ticket_key = notification.ticket_key
+    details = notification.details
+
+    label = "Subtarea" if notification.is_subtask else "Actividad"
+    ticket_link = ticket_key
+
+    if BASE_URL:
+        ticket_link = f"[{ticket_key}]({BASE_URL}/browse/{ticket_key})"
+
+    if event_type == "created":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n🆕 **Nueva {label.lower()} creada en Jira** 🆕\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "updated":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n🔄 **{label} actualizada en Jira** 🔄\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "commented":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n💬 **Nuevo comentario en {label.lower()} de Jira** 💬\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "assigned":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n👤 **Asignación actualizada en {label.lower()} de Jira** 👤\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "description_updated":
+        return f"📝 **━━━━━━━━━━━━━━━━━━━━━━━━\nDescripción actualizada en {label.lower()} de Jira** 📝\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "summary_updated":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n📋 **Resumen actualizado en {label.lower()} de Jira** 📋\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "deleted":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n❌ **{label} eliminada en Jira** ❌\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "priority_updated":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n⚠️ **Prioridad actualizada en {label.lower()} de Jira** ⚠️\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    elif event_type == "attachment_added":
+        return f"━━━━━━━━━━━━━━━━━━━━━━━━\n📎 **Archivo adjunto añadido en {label.lower()} de Jira** 📎\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━"
+    return f"🔔 **Evento de Jira ({event_type})**\n**{label}:** {ticket_link}\n{details}"
+
+
+def main():
+    rng = random.Random(42)
+    notifications = [
+        Notification(
+            rng.choice(EVENT_TYPES), f"BENCH-{rng.randint(1, 5000)}",
+            details=f"**Actualizado por:** Ana\n**Cambio:** En curso → QA ({index})",
+            is_subtask=rng.random() < 0.2
+        )
+        for index in range(10000)
+    ]
+    registry = TemplateRegistry(locale="es", base_url=BASE_URL)
+
+    different = sum(legacy_format(notification) != registry.render_text(notification) for notification in notifications)
+    print(f"Mensajes distintos entre ambos caminos: {different} (la descripción corrige el banner descolocado)")
+
+    number = 5
+    rows = [
+        ("if/elif + f-strings", lambda: [legacy_format(notification) for notification in notifications]),
+        ("plantillas (texto)", lambda: [registry.render_text(notification) for notification in notifications]),
+        ("plantillas (embed)", lambda: [registry.render_embed(notification) for notification in notifications]),
+    ]
+    print(f"{'camino':>22} | {'por evento':>11} | {'eventos/s':>12}")
+    for name, run in rows:
+        per_event = timeit.timeit(run, number=number) / (number * len(notifications))
+        print(f"{name:>22} | {per_event * 1e6:>9.2f}µs | {1 / per_event:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Prueba de varias réplicas del bot con estado compartido: N servidores `/webhook` (aiohttp) con
+su dispatcher y un `RedisStateBackend` cada uno contra un servidor RESP local (`fake_redis`).
+Cada réplica solo ve los canales de su shard; los webhooks se reparten entre réplicas y una
+fracción se entrega dos veces a réplicas distintas (como los reintentos de Jira).
+Comprueba que cada evento se publica una sola vez y desde la réplica que tiene el canal, y mide
+la latencia de respuesta y hasta Discord.
+
+Uso:
+    python -m benchmarks.bench_replicas --replicas 3 --events 3000 --duplicates 0.1
+"""
+import io
+import sys
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+
+from benchmarks.bench_webhooks import TICKET_PATTERN, free_port
+from benchmarks.fake_discord import FakeBot
+from benchmarks.fake_redis import FakeRedis
+from benchmarks.harness import LatencyRecorder, add_report_arguments, load_baseline, print_report, save_results
+from benchmarks.webhook_replay import replay, synthetic_payload
+from utils.state import RedisStateBackend
+from web.async_webhook_server import start_async_webhook_server
+from web.notification_dispatcher import NotificationDispatcher
+
+CHANNEL_BASE = 1000
+
+
+class TicketRouter:
+    """Reparte los tickets entre `channel_count` canales según su número."""
+
+    def __init__(self, channel_count: int):
+        self.channel_count = channel_count
+
+    def channels_for(self, notification) -> tuple:
+        return (CHANNEL_BASE + int(notification.ticket_key.rsplit("-", 1)[1]) % self.channel_count,)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    payloads = [synthetic_payload(index, rng) for index in range(args.events)]
+    channels = [CHANNEL_BASE + index for index in range(args.channels)]
+
+    fake_redis = FakeRedis()
+    redis_url = await fake_redis.start()
+
+    replicas = []
+    for shard_id in range(args.replicas):
+        owned = [channel for channel in channels if channel % args.replicas == shard_id]
+        state = RedisStateBackend(redis_url, shard_id=shard_id, shard_count=args.replicas, prefix="bench:")
+        await state.start()
+        await state.publish_channels(owned)
+        bot = FakeBot(send_latency=args.send_latency, channel_ids=owned)
+        dispatcher = NotificationDispatcher(bot, flush_window=args.flush_window, router=TicketRouter(args.channels),
+                                            maxsize=max(args.events * 4, 1000), state=state)
+        await dispatcher.start()
+        port = free_port()
+        runner = await start_async_webhook_server(bot, dispatcher, "127.0.0.1", port)
+        replicas.append((state, bot, dispatcher, runner, f"http://127.0.0.1:{port}/webhook"))
+
+    # El balanceador reparte por turnos; los duplicados llegan a la réplica siguiente.
+    per_replica = [[] for _ in replicas]
+    for index, payload in enumerate(payloads):
+        per_replica[index % len(replicas)].append(payload)
+        if rng.random() < args.duplicates:
+            per_replica[(index + 1) % len(replicas)].append(payload)
+    rps = args.rps / len(replicas)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+        results = await asyncio.gather(*(
+            replay(url, batch, rps, concurrency=args.concurrency)
+            for (_, _, _, _, url), batch in zip(replicas, per_replica)
+        ))
+        await wait_for_replicas(replicas, quiet_period=max(0.3, args.flush_window * 4))
+
+    ack = LatencyRecorder("webhook_ack")
+    elapsed = max(result[2] for result in results)
+    first_sent = {}
+    for batch, (recorder, sent_at, _) in zip(per_replica, results):
+        ack.samples.extend(recorder.samples)
+        ack.errors += recorder.errors
+        for position, payload in enumerate(batch):
+            key = int(payload["issue"]["key"].rsplit("-", 1)[1])
+            first_sent[key] = min(first_sent.get(key, float("inf")), sent_at[position])
+
+    delivery = LatencyRecorder("delivery")
+    deliveries = {}
+    misplaced = 0
+    for shard_id, (_, bot, _, _, _) in enumerate(replicas):
+        for channel in bot.channels.values():
+            if channel.id % len(replicas) != shard_id:
+                misplaced += len(channel.sent)
+            for sent, content, _ in channel.sent:
+                for match in TICKET_PATTERN.finditer(content or ""):
+                    ticket = int(match.group(1))
+                    deliveries[ticket] = deliveries.get(ticket, 0) + 1
+                    delivery.record(sent - first_sent[ticket])
+
+    for state, _, dispatcher, runner, _ in replicas:
+        await runner.cleanup()
+        await dispatcher.stop()
+        await state.stop()
+    await fake_redis.stop()
+
+    return {
+        "webhook_ack": ack.summary(elapsed),
+        "webhook_to_discord": delivery.summary(elapsed),
+        "pipeline": {
+            "replicas": len(replicas),
+            "events": len(payloads),
+            "deliveries": sum(len(batch) for batch in per_replica),
+            "published_once": sum(1 for count in deliveries.values() if count == 1),
+            "published_twice_or_more": sum(1 for count in deliveries.values() if count > 1),
+            "missing": len(payloads) - len(deliveries),
+            "wrong_shard": misplaced,
+            "forwarded": sum(dispatcher.stats["forwarded"] for _, _, dispatcher, _, _ in replicas),
+            "redis_commands": fake_redis.commands,
+            "elapsed_s": elapsed,
+        },
+    }
+
+
+async def wait_for_replicas(replicas: list, quiet_period: float, timeout: float = 30.0):
+    """Espera a que ninguna réplica tenga cola ni publique mensajes nuevos durante `quiet_period`."""
+    deadline = time.monotonic() + timeout
+    last_count = -1
+    while time.monotonic() < deadline:
+        count = sum(len(bot.sent_messages()) for _, bot, _, _, _ in replicas)
+        if all(dispatcher.depth() == 0 for _, _, dispatcher, _, _ in replicas) and count == last_count:
+            return
+        last_count = count
+        await asyncio.sleep(quiet_period)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de varias réplicas con estado compartido.")
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--channels", type=int, default=12, help="Canales de Discord entre los que se reparten los tickets.")
+    parser.add_argument("--rps", type=float, default=300, help="Webhooks por segundo en total (0 = sin pausa).")
+    parser.add_argument("--events", type=int, default=3000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Fracción de webhooks entregados dos veces.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Conexiones simultáneas máximas por réplica.")
+    parser.add_argument("--flush-window", type=float, default=0.05, help="NOTIFY_FLUSH_WINDOW de los dispatchers.")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="Latencia simulada de cada envío a Discord.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="No oculta los print() de los servidores.")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    title = f"Réplicas ({args.replicas} réplicas, {args.rps:g} rps, {args.events} eventos, {args.duplicates:.0%} duplicados)"
+    print_report(title, results, load_baseline(args.baseline))
+    save_results(args.save, results)
+
+
+if __name__ == "__main__":
+    main()
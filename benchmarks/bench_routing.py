@@ -0,0 +1,113 @@
+"""
+Benchmark del enrutado de notificaciones.
+Mide el coste por evento de `RoutingTable.channels_for` frente a recorrer las reglas una a una,
+a medida que crece el número de reglas, por separado:
+
+- sondeo de máscaras: la búsqueda completa (caché de combinaciones vacía), una consulta por
+  máscara de comodines usada en la tabla (como mucho 32, sin importar cuántas reglas haya),
+- acierto de caché: la combinación de atributos ya se había resuelto antes.
+
+Cada evento encaja siempre en las mismas `MATCHING_RULES` reglas; el resto fija un proyecto en
+el que no hay eventos, así que al crecer la tabla no crece también la unión de canales.
+
+Uso: python -m benchmarks.bench_routing
+"""
+import random
+import timeit
+
+from web.routing import ROUTING_ATTRIBUTES, RoutingTable
+from web.webhook_server import Notification
+
+HOT_PROJECT = "HOT"
+COLD_PROJECTS = [f"P{index}" for index in range(200)]
+ISSUE_TYPES = ["Bug", "Story", "Task", "Epic", "Sub-task"]
+EVENTS = ["created", "updated", "commented", "assigned", "deleted", "priority_updated"]
+FIELDS = ["status", "assignee", "priority", "summary"]
+PRIORITIES = ["Highest", "High", "Medium", "Low", "Lowest"]
+# Reglas en las que encajan todos los eventos del benchmark (proyecto HOT, cambios de estado).
+MATCHING_RULES = [
+    {"project": HOT_PROJECT, "channels": [1]},
+    {"event": "updated", "channels": [2]},
+    {"field": "status", "channels": [3]},
+    {"project": HOT_PROJECT, "event": "updated", "field": "status", "channels": [4]},
+]
+
+
+def build_rules(count: int, rng: random.Random) -> list:
+    """
+    `MATCHING_RULES` y reglas de relleno hasta `count`: fijan un proyecto sin eventos y un
+    subconjunto aleatorio del resto de atributos (así usan máscaras variadas sin encajar nunca).
+    """
+    choices = {
+        "issue_type": ISSUE_TYPES,
+        "event": EVENTS,
+        "field": FIELDS,
+        "priority": PRIORITIES,
+    }
+    rules = list(MATCHING_RULES)
+    for index in range(len(rules), count):
+        rule = {"project": rng.choice(COLD_PROJECTS), "channels": [1000 + index]}
+        for attribute in ROUTING_ATTRIBUTES[1:]:
+            if rng.random() < 0.5:
+                rule[attribute] = rng.choice(choices[attribute])
+        rules.append(rule)
+    return rules
+
+
+def linear_match(rules: list, notification: Notification) -> set:
+    """Alternativa ingenua: comprobar todas las reglas para cada evento."""
+    values = {
+        "project": notification.project,
+        "issue_type": notification.issue_type,
+        "event": notification.event_type,
+        "field": notification.field,
+        "priority": notification.priority,
+    }
+    channels = set()
+    for rule in rules:
+        if all(
+            rule.get(attribute) in (None, "*") or
+            (values[attribute] or "").casefold() == str(rule[attribute]).casefold()
+            for attribute in ROUTING_ATTRIBUTES
+        ):
+            channels.update(rule["channels"])
+    return channels
+
+
+def probe(table: RoutingTable, events: list):
+    """Búsquedas sin caché: se vacía antes de cada evento (vaciar un dict de una entrada es despreciable)."""
+    cache = table._lookup_cache
+    for event in events:
+        cache.clear()
+        table.channels_for(event)
+
+
+def main():
+    rng = random.Random(42)
+    events = [
+        Notification(
+            "updated", "HOT-1", project=HOT_PROJECT, issue_type=rng.choice(ISSUE_TYPES),
+            field="status", priority=rng.choice(PRIORITIES)
+        )
+        for _ in range(1000)
+    ]
+
+    print(f"{'reglas':>8} | {'máscaras':>8} | {'canales':>7} | {'sondeo de máscaras':>18} | "
+          f"{'acierto de caché':>16} | {'recorrido lineal':>17}")
+    for count in (10, 100, 1000, 10000):
+        rules = build_rules(count, rng)
+        table = RoutingTable()
+        table.load_config({"default_channels": [0], "rules": rules})
+        channels = {len(table.channels_for(event)) for event in events}
+        assert channels == {len(MATCHING_RULES)}, channels
+
+        probed = timeit.timeit(lambda: probe(table, events), number=5) / (5 * len(events))
+        hit = timeit.timeit(lambda: [table.channels_for(event) for event in events], number=5) / (5 * len(events))
+        linear = timeit.timeit(lambda: [linear_match(rules, event) for event in events], number=1) / len(events)
+
+        print(f"{count:>8} | {len(table._masks):>8} | {len(MATCHING_RULES):>7} | {probed * 1e6:>16.2f}µs | "
+              f"{hit * 1e6:>14.2f}µs | {linear * 1e6:>15.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark del parseo de webhooks con payloads grandes y realistas: el issue completo con
+cientos de campos personalizados, como los envía Jira.
+Compara el camino anterior (`json.loads` + `process_jira_webhook`) con `ingest_jira_webhook`,
+que descarta los eventos ignorados mirando solo los bytes y decodifica el resto con orjson
+si está instalado.
+
+Uso: python -m benchmarks.bench_webhook_parsing
+"""
+import io
+import json
+import timeit
+import contextlib
+
+from benchmarks.fake_jira import make_description, make_issue
+from web import webhook_parsing
+from web.webhook_server import ingest_jira_webhook, process_jira_webhook
+
+
+def large_issue(custom_fields: int) -> dict:
+    """Issue con campos personalizados de tipos variados (textos, listas de opciones, ADF, usuarios)."""
+    issue = make_issue(1)
+    fields = issue["fields"]
+    for index in range(custom_fields):
+        kind = index % 4
+        name = f"customfield_{10000 + index}"
+        if kind == 0:
+            fields[name] = f"Valor de texto del campo {index} " * 4
+        elif kind == 1:
+            fields[name] = [{"self": f"https://jira.example.com/rest/api/3/customFieldOption/{index}{option}",
+                             "value": f"Opción {option}", "id": f"{index}{option}"} for option in range(5)]
+        elif kind == 2:
+            fields[name] = make_description(3)
+        else:
+            fields[name] = {"accountId": f"acc-{index}", "displayName": f"Usuario {index}",
+                            "avatarUrls": {size: f"https://avatar.example.com/{index}/{size}"
+                                           for size in ("16x16", "24x24", "32x32", "48x48")}}
+    return issue
+
+
+def payloads(custom_fields: int) -> dict:
+    issue = large_issue(custom_fields)
+    user = {"displayName": "Ana", "accountId": "acc-ana"}
+
+    def updated(field: str) -> bytes:
+        return json.dumps({
+            "timestamp": 1, "webhookEvent": "jira:issue_updated", "issue_event_type_name": "issue_generic",
+            "user": user, "issue": issue,
+            "changelog": {"id": "1", "items": [{"field": field, "fromString": "a", "toString": "b"}]},
+        }).encode("utf-8")
+
+    return {
+        "update sin interés": updated("labels"),
+        "evento no manejado": json.dumps({
+            "timestamp": 1, "webhookEvent": "comment_deleted", "issue": issue, "comment": {"id": "1"}
+        }).encode("utf-8"),
+        "cambio de estado": updated("status"),
+    }
+
+
+def legacy(raw: bytes):
+    return process_jira_webhook(json.loads(raw))
+
+
+def main():
+    number = 50
+    print(f"orjson disponible: {'sí' if webhook_parsing.orjson else 'no'}")
+    for custom_fields in (50, 300, 1000):
+        samples = payloads(custom_fields)
+        size_kb = len(samples["cambio de estado"]) / 1024
+        print(f"\n{custom_fields} campos personalizados ({size_kb:.0f} KB por payload)")
+        print(f"{'evento':>20} | {'json + process':>15} | {'ingest':>12} | {'mejora':>7}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = []
+            for name, raw in samples.items():
+                before = timeit.timeit(lambda: legacy(raw), number=number) / number
+                after = timeit.timeit(lambda: ingest_jira_webhook(raw), number=number) / number
+                rows.append((name, before, after))
+        for name, before, after in rows:
+            print(f"{name:>20} | {before * 1e3:>13.3f}ms | {after * 1e3:>10.3f}ms | {before / after:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Prueba de carga del pipeline de webhooks: servidor `/webhook` real (aiohttp o Flask + waitress),
+dispatcher, tabla de enrutado y, opcionalmente, journal; Discord sustituido por un canal falso.
+Mide la latencia de respuesta a Jira, la latencia hasta que el mensaje sale hacia Discord,
+eventos por segundo y memoria.
+
+Uso:
+    python -m benchmarks.bench_webhooks --server asyncio --rps 500 --events 5000
+    python -m benchmarks.bench_webhooks --server waitress --journal --save base.json
+    python -m benchmarks.bench_webhooks --payloads payloads.jsonl --baseline base.json
+"""
+import io
+import os
+import re
+import sys
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+
+from benchmarks.fake_discord import FakeBot
+from benchmarks.harness import (
+    LatencyRecorder, MemoryTracker, add_report_arguments, load_baseline, print_report, save_results
+)
+from benchmarks.webhook_replay import load_payloads, replay, synthetic_payload, tag_payload
+from web.async_webhook_server import start_async_webhook_server
+from web.journal import JournalConsumer, WebhookJournal
+from web.notification_dispatcher import NotificationDispatcher
+from web.routing import RoutingTable
+from web.webhook_server import create_webhook_app
+
+TICKET_PATTERN = re.compile(r"BENCH-(\d+)")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def webhook_server(mode: str, bot, dispatcher, port: int, journal):
+    """Arranca el servidor de webhooks en el modo indicado y lo cierra al salir."""
+    if mode == "asyncio":
+        runner = await start_async_webhook_server(bot, dispatcher, "127.0.0.1", port, journal)
+        try:
+            yield
+        finally:
+            await runner.cleanup()
+        return
+
+    import waitress
+    server = waitress.create_server(create_webhook_app(bot, dispatcher, journal), host="127.0.0.1", port=port)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        server.close()
+
+
+async def wait_for_drain(bot: FakeBot, dispatcher: NotificationDispatcher, quiet_period: float, timeout: float = 30.0):
+    """Espera a que la cola se vacíe y no salgan mensajes nuevos durante `quiet_period`."""
+    deadline = time.monotonic() + timeout
+    last_count = -1
+    while time.monotonic() < deadline:
+        count = len(bot.sent_messages())
+        if dispatcher.depth() == 0 and count == last_count:
+            return
+        last_count = count
+        await asyncio.sleep(quiet_period)
+
+
+async def run(args) -> dict:
+    if args.payloads:
+        recorded = load_payloads(args.payloads)
+        payloads = [tag_payload(recorded[index % len(recorded)], index) for index in range(args.events)]
+    else:
+        rng = random.Random(args.seed)
+        payloads = [synthetic_payload(index, rng) for index in range(args.events)]
+
+    bot = FakeBot(send_latency=args.send_latency)
+    router = RoutingTable()
+    router.load_config({"default_channels": [1]})
+    dispatcher = NotificationDispatcher(bot, flush_window=args.flush_window, router=router,
+                                        maxsize=max(args.events * 4, 1000))
+    await dispatcher.start()
+
+    journal = consumer = None
+    journal_dir = tempfile.TemporaryDirectory() if args.journal else None
+    if journal_dir:
+        journal = WebhookJournal(os.path.join(journal_dir.name, "webhooks.db"), synchronous=args.journal_synchronous)
+        journal.start()
+        consumer = JournalConsumer(journal, dispatcher, retry_interval=3600)
+        await consumer.start()
+
+    port = free_port()
+    output = io.StringIO()
+    with MemoryTracker(args.trace_memory) as memory:
+        async with webhook_server(args.server, bot, dispatcher, port, journal):
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+                ack, sent_at, elapsed = await replay(f"http://127.0.0.1:{port}/webhook", payloads, args.rps,
+                                                     concurrency=args.concurrency)
+                await wait_for_drain(bot, dispatcher, quiet_period=max(0.2, args.flush_window * 2))
+
+    delivery = LatencyRecorder("delivery")
+    for sent, content, _ in bot.sent_messages():
+        match = TICKET_PATTERN.search(content or "")
+        if match and int(match.group(1)) in sent_at:
+            delivery.record(sent - sent_at[int(match.group(1))])
+
+    if consumer:
+        await consumer.stop()
+        journal.close()
+        journal_dir.cleanup()
+    await dispatcher.stop()
+
+    return {
+        "webhook_ack": ack.summary(elapsed),
+        "webhook_to_discord": delivery.summary(elapsed),
+        "pipeline": {
+            "events": len(payloads),
+            "messages_sent": dispatcher.stats["messages_sent"],
+            "dropped": dispatcher.stats["dropped"],
+            "coalesced": dispatcher.stats["coalesced"],
+            "elapsed_s": elapsed,
+        },
+        "memory": memory.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del pipeline de webhooks.")
+    parser.add_argument("--server", choices=("asyncio", "waitress"), default="asyncio")
+    parser.add_argument("--rps", type=float, default=200, help="Webhooks por segundo (0 = sin pausa).")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Conexiones simultáneas máximas.")
+    parser.add_argument("--payloads", metavar="FICHERO", help="Payloads grabados (JSON por línea) en lugar de sintéticos.")
+    parser.add_argument("--flush-window", type=float, default=0.05, help="NOTIFY_FLUSH_WINDOW del dispatcher.")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="Latencia simulada de cada envío a Discord.")
+    parser.add_argument("--journal", action="store_true", help="Registra los webhooks en un journal SQLite temporal.")
+    parser.add_argument("--journal-synchronous", default="FULL")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="No oculta los print() del servidor.")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    title = f"Webhooks ({args.server}, {args.rps:g} rps, {args.events} eventos{', journal' if args.journal else ''})"
+    print_report(title, results, load_baseline(args.baseline))
+    save_results(args.save, results)
+
+
+if __name__ == "__main__":
+    main()
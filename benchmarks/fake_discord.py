@@ -0,0 +1,88 @@
+"""
+Sustitutos mínimos de los objetos de discord.py que usan el dispatcher y los comandos,
+para ejecutar el bot sin conexión a Discord. Registran cada envío con su instante.
+"""
+import time
+import asyncio
+from types import SimpleNamespace
+
+
+class FakeChannel:
+    """Canal que simula la latencia de `channel.send` y guarda lo enviado."""
+
+    def __init__(self, channel_id: int, latency: float = 0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append((time.perf_counter(), content, kwargs))
+        return SimpleNamespace(id=len(self.sent), channel=self)
+
+
+class FakeBot:
+    """
+    Cliente con los canales indicados; `get_channel` crea uno nuevo para cualquier otro id.
+    Con `channel_ids` solo ve esos canales, como un shard del gateway con sus servidores.
+    """
+
+    def __init__(self, send_latency: float = 0.0, channel_ids=None):
+        self.send_latency = send_latency
+        self.channels = {}
+        self.channel_ids = set(channel_ids) if channel_ids is not None else None
+
+    def get_channel(self, channel_id: int):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            if self.channel_ids is not None and channel_id not in self.channel_ids:
+                return None
+            channel = self.channels[channel_id] = FakeChannel(channel_id, self.send_latency)
+        return channel
+
+    async def wait_until_ready(self):
+        return None
+
+    def sent_messages(self) -> list:
+        return [message for channel in self.channels.values() for message in channel.sent]
+
+
+class FakeResponse:
+    def __init__(self, interaction, latency: float):
+        self.interaction = interaction
+        self.latency = latency
+
+    async def defer(self, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send_message(self, content=None, **kwargs):
+        self.interaction.sent.append((time.perf_counter(), content, kwargs))
+
+
+class FakeFollowup:
+    def __init__(self, interaction, latency: float):
+        self.interaction = interaction
+        self.latency = latency
+
+    async def send(self, content=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.interaction.sent.append((time.perf_counter(), content, kwargs))
+        return SimpleNamespace(id=len(self.interaction.sent))
+
+
+class FakeInteraction:
+    """Interacción de un comando de aplicación: `response.defer`, `followup.send`, usuario y extras."""
+
+    def __init__(self, command_name: str, user_id: int = 1, latency: float = 0.0):
+        self.command = SimpleNamespace(name=command_name)
+        self.user = SimpleNamespace(id=user_id)
+        self.extras = {}
+        self.sent = []
+        self.response = FakeResponse(self, latency)
+        self.followup = FakeFollowup(self, latency)
+
+    async def edit_original_response(self, **kwargs):
+        self.sent.append((time.perf_counter(), None, kwargs))
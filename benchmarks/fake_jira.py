@@ -0,0 +1,170 @@
+"""
+Servidor local que imita la API REST de Jira que usa el bot, para benchmarks sin conexión:
+
+- `GET /rest/api/3/issue/{key}`
+- `POST /rest/api/3/search/jql` con paginación por `nextPageToken`
+- `GET /rest/api/3/user/search`
+
+Permite añadir latencia (fija + aleatoria) y responder 429 con `Retry-After` a una fracción
+de las peticiones, para ver cómo se comportan los reintentos y el limitador del cliente.
+"""
+import json
+import random
+import asyncio
+from aiohttp import web
+
+STATUSES = ("BACKLOG", "SELECTED FOR DEVELOPMENT", "En curso", "BLOCK", "CODE REVIEW", "QA", "Listo")
+USERS = ("Ana", "Luis", "Marta", "Pablo")
+
+
+def make_description(paragraphs: int) -> dict:
+    return {
+        "type": "doc",
+        "version": 1,
+        "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": f"Párrafo {index} de la descripción."}]}
+            for index in range(paragraphs)
+        ]
+    }
+
+
+def make_issue(index: int, project: str = "BENCH") -> dict:
+    """Issue sintético con los campos que muestra el bot."""
+    user = USERS[index % len(USERS)]
+    return {
+        "id": str(10000 + index),
+        "key": f"{project}-{index}",
+        "fields": {
+            "summary": f"Ticket de prueba {index}",
+            "status": {"name": STATUSES[index % len(STATUSES)]},
+            "creator": {"displayName": USERS[(index + 1) % len(USERS)]},
+            "assignee": {"displayName": user, "accountId": f"acc-{user.lower()}"},
+            "created": "2024-01-01T10:00:00.000+0000",
+            "updated": f"2024-01-02T10:00:{index % 60:02d}.000+0000",
+            "description": make_description(3 + index % 5),
+            "issuetype": {"name": "Task", "subtask": False},
+            "priority": {"name": "Medium"},
+            "project": {"key": project},
+        }
+    }
+
+
+class FakeJira:
+    """Servidor aiohttp con issues en memoria y latencia/429 configurables."""
+
+    def __init__(self, issue_count: int = 500, latency: float = 0.05, jitter: float = 0.02,
+                 rate_limit_ratio: float = 0.0, retry_after: float = 0.2, seed: int = 42):
+        self.issues = {issue["key"]: issue for issue in (make_issue(index) for index in range(1, issue_count + 1))}
+        self.ordered = list(self.issues.values())
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self._runner = None
+        self.base_url = None
+
+    async def _delay(self):
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _maybe_rate_limit(self):
+        if self.rate_limit_ratio and self.random.random() < self.rate_limit_ratio:
+            self.rate_limited += 1
+            return web.json_response(
+                {"errorMessages": ["Rate limit exceeded"]}, status=429,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        return None
+
+    async def get_issue(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await self._delay()
+        limited = self._maybe_rate_limit()
+        if limited:
+            return limited
+        issue = self.issues.get(request.match_info["key"].upper())
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        return web.json_response(issue)
+
+    async def search(self, request: web.Request) -> web.Response:
+        """Filtra por `key IN (...)`, `assignee = "..."` y `status IN (...)` si aparecen en la JQL; el resto se ignora."""
+        self.requests += 1
+        body = await request.json()
+        await self._delay()
+        limited = self._maybe_rate_limit()
+        if limited:
+            return limited
+
+        issues = self.ordered
+        jql = body.get("jql", "")
+        if "key IN (" in jql:
+            # Como Jira: si alguna clave no existe, la búsqueda entera responde 400.
+            keys = [key.strip().upper() for key in jql.split("key IN (", 1)[1].split(")", 1)[0].split(",")]
+            missing = [key for key in keys if key not in self.issues]
+            if missing:
+                return web.json_response({"errorMessages": [
+                    f"An issue with key '{key}' does not exist for field 'key'." for key in missing
+                ]}, status=400)
+            issues = [self.issues[key] for key in keys]
+        if 'assignee = "' in jql:
+            assignee = jql.split('assignee = "', 1)[1].split('"', 1)[0].casefold()
+            issues = [
+                issue for issue in issues
+                if issue["fields"]["assignee"]["displayName"].casefold() == assignee
+                or issue["fields"]["assignee"]["accountId"] == assignee
+            ]
+        if "status IN (" in jql:
+            status_list = jql.split("status IN (", 1)[1].split(")", 1)[0]
+            statuses = {status.strip().strip('"').casefold() for status in status_list.split(",")}
+            issues = [issue for issue in issues if issue["fields"]["status"]["name"].casefold() in statuses]
+
+        start = int(body.get("nextPageToken") or 0)
+        page_size = int(body.get("maxResults") or 50)
+        fields = body.get("fields")
+        page = issues[start:start + page_size]
+        if fields:
+            page = [
+                {"key": issue["key"], "fields": {name: issue["fields"].get(name) for name in fields}}
+                for issue in page
+            ]
+
+        result = {"issues": page, "isLast": start + page_size >= len(issues)}
+        if not result["isLast"]:
+            result["nextPageToken"] = str(start + page_size)
+        return web.Response(text=json.dumps(result), content_type="application/json")
+
+    async def user_search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await self._delay()
+        query = request.query.get("query", "").casefold()
+        return web.json_response([
+            {"accountId": f"acc-{user.lower()}", "displayName": user}
+            for user in USERS if query in user.casefold()
+        ])
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/rest/api/3/issue/{key}", self.get_issue)
+        app.router.add_post("/rest/api/3/search/jql", self.search)
+        app.router.add_get("/rest/api/3/user/search", self.user_search)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Arranca el servidor (puerto libre si `port=0`) y devuelve su URL base."""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
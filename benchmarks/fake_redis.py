@@ -0,0 +1,149 @@
+"""
+Servidor local que habla RESP y entiende las órdenes de Redis que usa `RedisStateBackend`,
+para probar varias réplicas del bot sin un Redis instalado:
+
+- `PING`, `AUTH`, `SELECT`, `CLIENT` (el saludo de redis-py al conectar)
+- `SET` (con `NX` y `EX`), `GET`, `DEL`
+- `RPUSH`, `BLPOP`
+- `HSET`, `HGET`
+- `PUBLISH`, `SUBSCRIBE`
+
+Todo vive en memoria del proceso; `EX` se respeta al leer la clave.
+"""
+import time
+import asyncio
+from collections import deque
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.hashes = {}
+        self.subscribers = {}
+        self.commands = 0
+        self._list_waiters = {}
+        self._server = None
+        self.url = None
+
+    def _get(self, key: bytes):
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    async def _execute(self, args: list, writer: asyncio.StreamWriter):
+        name = args[0].upper()
+        if name == b"PING":
+            return "+PONG"
+        if name in (b"AUTH", b"SELECT", b"CLIENT"):
+            return "+OK"
+        if name == b"SET":
+            key, value, options = args[1], args[2], [arg.upper() for arg in args[3:]]
+            if b"NX" in options and self._get(key) is not None:
+                return None
+            ttl = int(args[3 + options.index(b"EX") + 1]) if b"EX" in options else None
+            self.values[key] = (value, time.monotonic() + ttl if ttl else None)
+            return "+OK"
+        if name == b"GET":
+            return self._get(args[1])
+        if name == b"DEL":
+            return sum(self.values.pop(key, None) is not None for key in args[1:])
+        if name == b"RPUSH":
+            items = self.lists.setdefault(args[1], deque())
+            items.extend(args[2:])
+            waiter = self._list_waiters.get(args[1])
+            if waiter:
+                waiter.set()
+            return len(items)
+        if name == b"BLPOP":
+            key, deadline = args[1], time.monotonic() + float(args[-1])
+            while True:
+                items = self.lists.get(key)
+                if items:
+                    return [key, items.popleft()]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [None]
+                waiter = self._list_waiters.setdefault(key, asyncio.Event())
+                waiter.clear()
+                try:
+                    await asyncio.wait_for(waiter.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        if name == b"HSET":
+            fields = self.hashes.setdefault(args[1], {})
+            pairs = list(zip(args[2::2], args[3::2]))
+            added = sum(field not in fields for field, _ in pairs)
+            fields.update(pairs)
+            return added
+        if name == b"HGET":
+            return self.hashes.get(args[1], {}).get(args[2])
+        if name == b"PUBLISH":
+            receivers = list(self.subscribers.get(args[1], ()))
+            for subscriber in receivers:
+                subscriber.write(encode([b"message", args[1], args[2]]))
+            return len(receivers)
+        if name == b"SUBSCRIBE":
+            for channel in args[1:]:
+                self.subscribers.setdefault(channel, set()).add(writer)
+                writer.write(encode([b"subscribe", channel, 1]))
+            return NotImplemented
+        return Exception(f"ERR unknown command '{name.decode()}'")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands += 1
+                reply = await self._execute(args, writer)
+                if reply is not NotImplemented:
+                    writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for subscribers in self.subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Arranca el servidor (puerto libre si `port=0`) y devuelve su URL `redis://`."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"redis://{host}:{port}/0"
+        return self.url
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            self._server = None
+
+
+def encode(value) -> bytes:
+    """Respuesta RESP2: cadenas `+...` como estado, bytes como bulk string, listas y enteros."""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, Exception):
+        return f"-{value}\r\n".encode("utf-8")
+    if isinstance(value, str) and value.startswith("+"):
+        return f"{value}\r\n".encode("utf-8")
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        if value == [None]:
+            return b"*-1\r\n"
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(value), value)
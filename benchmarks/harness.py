@@ -0,0 +1,126 @@
+"""
+Utilidades comunes de los benchmarks de carga: registro de latencias, percentiles,
+memoria del proceso y comparación con una línea base guardada en JSON.
+"""
+import gc
+import json
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Percentil por el método del rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    """Acumula latencias (en segundos) y errores de una serie de operaciones."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples = []
+        self.errors = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self, elapsed: float) -> dict:
+        values = sorted(self.samples)
+        return {
+            "count": len(values),
+            "errors": self.errors,
+            "per_second": len(values) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000,
+        }
+
+
+class MemoryTracker:
+    """
+    Memoria durante el benchmark: pico de memoria Python reservada (tracemalloc) y
+    RSS máximo del proceso (solo en sistemas con el módulo `resource`).
+    tracemalloc ralentiza las asignaciones, por lo que solo se activa si se pide.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+
+    def __enter__(self):
+        gc.collect()
+        if self.trace:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.python_peak_mb = None
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.python_peak_mb = peak / (1024 * 1024)
+        self.max_rss_mb = None
+        if resource:
+            # ru_maxrss está en KB en Linux.
+            self.max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def summary(self) -> dict:
+        return {"python_peak_mb": self.python_peak_mb, "max_rss_mb": self.max_rss_mb}
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def print_report(title: str, results: dict, baseline: dict = None):
+    """
+    Imprime una tabla con los resultados. Si hay línea base, añade la variación de cada valor.
+    `results` tiene la forma {serie: {métrica: valor}}.
+    """
+    print(f"\n== {title} ==")
+    for series, metrics in results.items():
+        print(f"[{series}]")
+        base_metrics = (baseline or {}).get(series, {})
+        for metric, value in metrics.items():
+            if value is None:
+                continue
+            line = f"  {metric:<16} {value:>12.2f}" if isinstance(value, float) else f"  {metric:<16} {value:>12}"
+            base_value = base_metrics.get(metric)
+            if isinstance(base_value, (int, float)) and base_value:
+                line += f"   ({(value - base_value) / base_value * 100:+.1f}% vs base {base_value:.2f})"
+            print(line)
+
+
+def load_baseline(path: str) -> dict:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_results(path: str, results: dict):
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"\nResultados guardados en {path}")
+
+
+def add_report_arguments(parser):
+    """Opciones comunes: memoria con tracemalloc, guardar resultados y comparar con una línea base."""
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Mide el pico de memoria Python con tracemalloc (más lento).")
+    parser.add_argument("--save", metavar="FICHERO", help="Guarda los resultados en JSON.")
+    parser.add_argument("--baseline", metavar="FICHERO", help="Compara con resultados guardados con --save.")
@@ -0,0 +1,123 @@
+"""
+Generador de webhooks de Jira para pruebas de carga: payloads sintéticos o grabados
+(un JSON por línea) disparados contra `/webhook` a un ritmo fijo de peticiones por segundo.
+
+Para grabar los eventos reales del journal:
+    sqlite3 data/webhooks.db "SELECT payload FROM webhook_events" > payloads.jsonl
+"""
+import json
+import time
+import random
+import asyncio
+import aiohttp
+
+from benchmarks.fake_jira import make_description, make_issue
+from benchmarks.harness import LatencyRecorder
+
+CHANGED_FIELDS = (
+    ("status", "BACKLOG", "En curso"),
+    ("assignee", "Ana", "Luis"),
+    ("priority", "Medium", "High"),
+    ("summary", "Título anterior", "Título nuevo"),
+)
+
+
+# Campos que Jira manda en el issue de los webhooks de comentarios (sin `updated` ni descripción).
+COMMENT_ISSUE_FIELDS = ("summary", "status", "issuetype", "project", "priority", "assignee")
+
+
+def comment_issue(issue: dict) -> dict:
+    """Issue recortado como el de los webhooks comment_created / comment_updated de Jira."""
+    fields = issue["fields"]
+    return {
+        "id": issue["id"],
+        "key": issue["key"],
+        "fields": {name: fields[name] for name in COMMENT_ISSUE_FIELDS if name in fields},
+    }
+
+
+def synthetic_payload(index: int, rng: random.Random) -> dict:
+    """Mezcla de eventos similar a la de un proyecto activo: sobre todo cambios y comentarios."""
+    issue = make_issue(index)
+    user = {"displayName": "Ana", "accountId": "acc-ana"}
+    kind = rng.random()
+
+    if kind < 0.15:
+        return {"webhookEvent": "jira:issue_created", "timestamp": index, "user": user, "issue": issue}
+    if kind < 0.45:
+        return {
+            "webhookEvent": "comment_created",
+            "timestamp": index,
+            "issue": comment_issue(issue),
+            "comment": {
+                "id": str(index),
+                "author": user,
+                "body": make_description(1 + index % 4),
+                "updated": "2024-01-02T10:00:00.000+0000",
+            },
+        }
+    field, from_value, to_value = rng.choice(CHANGED_FIELDS)
+    return {
+        "webhookEvent": "jira:issue_updated",
+        "timestamp": index,
+        "user": user,
+        "issue": issue,
+        "changelog": {"id": str(index), "items": [{"field": field, "fromString": from_value, "toString": to_value}]},
+    }
+
+
+def load_payloads(path: str) -> list:
+    """Lee payloads grabados, uno por línea."""
+    with open(path, "r", encoding="utf-8") as payload_file:
+        return [json.loads(line) for line in payload_file if line.strip()]
+
+
+def tag_payload(payload: dict, index: int) -> dict:
+    """
+    Da a cada payload una clave de issue única (`BENCH-<n>`) para poder emparejar cada webhook
+    con su mensaje en Discord, y un `timestamp` distinto para que el journal no lo descarte.
+    """
+    tagged = json.loads(json.dumps(payload))
+    tagged.setdefault("issue", {})["key"] = f"BENCH-{index}"
+    tagged["timestamp"] = index
+    return tagged
+
+
+async def replay(url: str, payloads: list, rps: float, concurrency: int = 100) -> tuple:
+    """
+    Envía los payloads a `url` con ritmo constante (bucle abierto: no espera a la respuesta
+    anterior para enviar la siguiente). Devuelve (latencias de respuesta, instante de envío
+    de cada payload por índice, segundos transcurridos).
+    """
+    recorder = LatencyRecorder("webhook_ack")
+    sent_at = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def fire(index: int, payload: dict):
+            body = json.dumps(payload)
+            started = time.perf_counter()
+            sent_at[index] = started
+            try:
+                async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        recorder.errors += 1
+                        return
+            except aiohttp.ClientError:
+                recorder.errors += 1
+                return
+            recorder.record(time.perf_counter() - started)
+
+        tasks = []
+        started = time.perf_counter()
+        interval = 1 / rps if rps > 0 else 0
+        for index, payload in enumerate(payloads):
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(index, payload)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return recorder, sent_at, elapsed
@@ -1,82 +1,261 @@
+import time
+
+# Referencia de los tiempos de arranque `[Arranque]` (antes de importar discord.py y el resto).
+STARTED_AT = time.perf_counter()
+
 import os
+import sys
 import asyncio
+from datetime import datetime
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from web.webhook_server import create_webhook_app
-import waitress
 
 load_dotenv()
 
-from web.webhook_server import create_webhook_app
+from web.webhook_server import WaitressWebhookServer, apply_broadcast, create_webhook_app
+from web.async_webhook_server import start_async_webhook_server
+from web.notification_dispatcher import NotificationDispatcher
+from web.routing import RoutingTable
+from web.journal import JOURNAL_PATH, JournalConsumer, WebhookJournal
+from utils.command_sync import sync_commands_if_changed
+from utils.lifecycle import Lifecycle
+from utils.metrics import install_discord_rate_limit_metrics
+from utils.state import state
 
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 if not DISCORD_TOKEN:
     print("Error: DISCORD_TOKEN no encontrado. Asegúrate de tener un .env válido.")
     exit()
 
+WEBHOOK_SERVER_MODE = os.getenv("WEBHOOK_SERVER_MODE", "waitress").strip().lower()
+if WEBHOOK_SERVER_MODE not in ("waitress", "asyncio"):
+    print(f"Advertencia: WEBHOOK_SERVER_MODE '{WEBHOOK_SERVER_MODE}' no es válido. Usando 'waitress'.")
+    WEBHOOK_SERVER_MODE = "waitress"
+
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+try:
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+except ValueError:
+    print("Error: WEBHOOK_PORT no es un número válido. Usando 8080.")
+    WEBHOOK_PORT = 8080
+
+REPLAY_SINCE = None
+if "--replay-since" in sys.argv:
+    try:
+        REPLAY_SINCE = datetime.fromisoformat(sys.argv[sys.argv.index("--replay-since") + 1]).timestamp()
+    except (IndexError, ValueError):
+        print("Error: --replay-since requiere una fecha ISO (ej. 2024-05-01T09:00).")
+        exit()
+
+# Sincroniza los comandos de aplicación aunque su esquema no haya cambiado.
+FORCE_SYNC = "--force-sync" in sys.argv
+
+install_discord_rate_limit_metrics()
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix='!', intents=intents)
-flask_app = create_webhook_app(bot)
+# Con varias réplicas, cada una se conecta al gateway como un shard (BOT_SHARD_ID de BOT_SHARD_COUNT).
+shard_options = {"shard_id": state.shard_id, "shard_count": state.shard_count} if state.sharded else {}
+bot = commands.Bot(command_prefix='!', intents=intents, **shard_options)
+state.on_broadcast = apply_broadcast
+dispatcher = NotificationDispatcher(bot, router=RoutingTable.from_env())
+
+journal = None
+journal_consumer = None
+if JOURNAL_PATH:
+    journal = WebhookJournal(JOURNAL_PATH)
+    journal_consumer = JournalConsumer(journal, dispatcher)
+elif REPLAY_SINCE is not None:
+    print("Error: --replay-since requiere configurar JOURNAL_PATH.")
+    exit()
+
+flask_app = create_webhook_app(bot, dispatcher, journal) if WEBHOOK_SERVER_MODE == "waitress" else None
+
+# Instantes de cada fase del arranque que se mide entre funciones.
+startup_marks = {}
+
+def log_phase(name: str, started: float):
+    """Registra la duración de una fase del arranque y el tiempo transcurrido desde que arrancó el proceso."""
+    now = time.perf_counter()
+    print(f"[Arranque] {name}: {now - started:.2f}s (t+{now - STARTED_AT:.2f}s)")
 
 @bot.event
 async def on_ready():
     """Se ejecuta cuando el bot se conecta exitosamente a Discord."""
+    gateway_started = startup_marks.pop("gateway", None)
+    if gateway_started is not None:
+        log_phase("Conexión al gateway", gateway_started)
     print(f'Bot conectado como {bot.user}')
     print("-----------------------------------------")
     print("✅ Bot de Discord listo.")
-    print(f"✅ Servidor de Webhooks (Flask) corriendo en segundo plano.")
+    if WEBHOOK_SERVER_MODE == "asyncio":
+        print(f"✅ Servidor de Webhooks (asyncio) escuchando en {WEBHOOK_HOST}:{WEBHOOK_PORT}.")
+    else:
+        print(f"✅ Servidor de Webhooks (Flask) corriendo en segundo plano.")
+    if state.sharded:
+        print(f"✅ Réplica {state.shard_id + 1} de {state.shard_count} (estado compartido: {state.name}).")
     print("-----------------------------------------")
 
+    await publish_channels(bot.guilds)
+
+    global REPLAY_SINCE
+    if journal_consumer and REPLAY_SINCE is not None:
+        since, REPLAY_SINCE = REPLAY_SINCE, None
+        replayed = await journal_consumer.replay(since)
+        print(f"Reenviados {replayed} eventos del journal desde {datetime.fromtimestamp(since)}.")
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    await publish_channels([guild])
+
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    await announce_channels([channel.id])
+
+@bot.event
+async def on_thread_create(thread: discord.Thread):
+    await announce_channels([thread.id])
+
+async def publish_channels(guilds):
+    """Anuncia los canales e hilos de los servidores indicados."""
+    await announce_channels([channel.id for guild in guilds for channel in (*guild.channels, *guild.threads)])
+
+async def announce_channels(channel_ids):
+    """Anuncia a las demás réplicas los canales de este shard, para que le reenvíen sus notificaciones."""
+    if not state.sharded:
+        return
+    try:
+        await state.publish_channels(channel_ids)
+    except Exception as e:
+        print(f"Error al anunciar los canales de este shard: {e}")
+
 async def setup_hook():
     """
     Hook ejecutado después del login pero antes de 'on_ready'.
     Carga extensiones y sincroniza comandos de aplicación.
     """
     print("Ejecutando setup_hook...")
-    
+    if "login" in startup_marks:
+        log_phase("Login en Discord", startup_marks.pop("login"))
+
+    started = time.perf_counter()
     try:
         await bot.load_extension("cogs.jira_commands")
         print("Módulo (Cog) 'jira_commands' cargado exitosamente.")
     except Exception as e:
         print(f"Error al cargar el Cog 'jira_commands': {e}")
         return
+    log_phase("Carga del Cog", started)
 
+    started = time.perf_counter()
     try:
-        synced = await bot.tree.sync()
-        print(f"Sincronizados {len(synced)} comandos de aplicación.")
+        synced = await sync_commands_if_changed(bot.tree, bot.application_id, force=FORCE_SYNC)
+        if synced is None:
+            print("Comandos de aplicación sin cambios: no se sincronizan (usa --force-sync para forzarlo).")
+        else:
+            print(f"Sincronizados {len(synced)} comandos de aplicación.")
     except Exception as e:
         print(f"Error al sincronizar comandos: {e}")
+    log_phase("Sincronización de comandos", started)
+    # Lo que queda hasta `on_ready` es la conexión al gateway.
+    startup_marks["gateway"] = time.perf_counter()
 
 bot.setup_hook = setup_hook
 
-async def run_flask_app():
-    """Ejecuta Flask en el executor de asyncio para no bloquear el hilo principal."""
-    try:
-        await bot.loop.run_in_executor(
-            None, 
-            lambda: waitress.serve(flask_app, host='0.0.0.0', port=8080)
-        )
-    except Exception as e:
-        print(f"Error al iniciar el servidor Flask: {e}")
+async def start_webhook_server():
+    """Arranca el servidor de webhooks elegido y devuelve la corrutina que lo detiene."""
+    if WEBHOOK_SERVER_MODE == "asyncio":
+        runner = await start_async_webhook_server(bot, dispatcher, WEBHOOK_HOST, WEBHOOK_PORT, journal)
+        return runner.cleanup
+
+    server = WaitressWebhookServer(flask_app, WEBHOOK_HOST, WEBHOOK_PORT)
+    await server.start()
+    return server.stop
+
+def build_lifecycle(bot_task_holder: list) -> Lifecycle:
+    """
+    Orden de arranque: bot, journal, estado compartido, dispatcher, consumidor del journal y
+    servidor de webhooks. Se detienen al revés: primero se dejan de aceptar webhooks, después
+    se envía lo pendiente a Discord o al shard que tiene el canal (hasta el plazo de apagado),
+    se cierran el estado compartido y el journal y, por último, el bot, que
+    al descargar el Cog detiene el índice de tickets y cierra el pool de conexiones con Jira.
+    Lo que no llegue a enviarse sigue en el journal y se reintenta al volver a arrancar.
+    """
+    lifecycle = Lifecycle()
+
+    async def start_bot():
+        startup_marks["login"] = time.perf_counter()
+        bot_task_holder.append(asyncio.create_task(bot.start(DISCORD_TOKEN)))
+
+    async def stop_bot():
+        if not bot.is_closed():
+            await bot.close()
+        for task in bot_task_holder:
+            await asyncio.gather(task, return_exceptions=True)
+
+    lifecycle.add("Bot de Discord", start_bot, stop_bot)
+
+    if journal:
+        async def start_journal():
+            journal.start()
+
+        async def close_journal():
+            await asyncio.to_thread(journal.close, lifecycle.remaining())
+
+        lifecycle.add("Journal de webhooks", start_journal, close_journal)
+
+    lifecycle.add(f"Estado compartido ({state.name})", state.start, state.stop)
+
+    async def drain_dispatcher():
+        # Deja un par de segundos del plazo para cerrar el journal y la conexión con Discord.
+        await dispatcher.drain(max(0.0, lifecycle.remaining() - 2))
+
+    lifecycle.add("Dispatcher de notificaciones", dispatcher.start, drain_dispatcher)
+
+    if journal_consumer:
+        lifecycle.add("Consumidor del journal", journal_consumer.start, journal_consumer.stop)
+
+    stop_webhook_server = []
+
+    async def start_server():
+        started = time.perf_counter()
+        stop_webhook_server.append(await start_webhook_server())
+        log_phase(f"Servidor de webhooks en {WEBHOOK_HOST}:{WEBHOOK_PORT}", started)
+
+    async def stop_server():
+        for stop in stop_webhook_server:
+            await stop()
+
+    lifecycle.add(f"Servidor de webhooks ({WEBHOOK_SERVER_MODE})", start_server, stop_server)
+    return lifecycle
 
 async def main():
-    """Función principal para arrancar el bot y el servidor web."""
+    """Arranca el bot y el servidor web, y los detiene de forma ordenada al recibir SIGINT/SIGTERM."""
     if not DISCORD_TOKEN:
         print("El token de Discord no está configurado. Saliendo.")
         return
-        
+
+    bot_task = []
+    lifecycle = build_lifecycle(bot_task)
+    lifecycle.install_signal_handlers()
+
     try:
-        await asyncio.gather(
-            bot.start(DISCORD_TOKEN),
-            run_flask_app()
-        )
-    except KeyboardInterrupt:
-        print("\nCerrando bot...")
+        await lifecycle.start()
+        stopping = asyncio.create_task(lifecycle.stopping.wait())
+        # Se sale al pedir el apagado o si el bot termina por su cuenta (p. ej. token inválido).
+        await asyncio.wait([stopping, *bot_task], return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        for task in bot_task:
+            if task.done() and not task.cancelled() and task.exception():
+                print(f"El bot de Discord se detuvo con un error: {task.exception()}")
+    except Exception as e:
+        print(f"Error al arrancar el bot: {e}")
     finally:
-        if not bot.is_closed():
-            await bot.close()
+        await lifecycle.stop()
         print("Bot desconectado. Saliendo.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,29 +1,166 @@
 import os
+import re
+import time
 import httpx
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime
 
+from utils.adf import render_adf
+from utils.autocomplete import issue_suggestions, remember_issue, remember_user, user_suggestions
+from utils.issue_cache import ISSUE_FIELDS, issue_cache, project_issue
+from utils.jira_client import JiraClient
+from utils.metrics import Histogram
+from utils.pagination import SEARCH_URL, IssuePagerView, JqlPager, JqlSearchError, StaticPager
+from utils.ticket_index import TICKET_INDEX_ENABLED, TICKET_INDEX_JQL, ticket_index
+from utils.user_resolver import remember_issue_accounts, resolve_account_id
+
 JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
 JIRA_EMAIL = os.getenv("JIRA_EMAIL")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
-JIRA_AUTH = (JIRA_EMAIL, JIRA_API_TOKEN)
 if not all([JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN]):
     print("Error: Variables de entorno de Jira no configuradas. Los comandos fallarán.")
 
-jira_client = httpx.AsyncClient(
-    auth=JIRA_AUTH,
-    headers={"Content-Type": "application/json"}
+# Estados de Jira que agrupa cada comando de listado (sección, estados).
+STATUS_GROUPS = {
+    "pendientes": ("Pendientes", ("BACKLOG", "SELECTED FOR DEVELOPMENT")),
+    "encurso": ("En curso", ("En curso",)),
+    "bloqueados": ("Bloqueados", ("BLOCK",)),
+    "finalizados": ("Finalizados", ("CODE REVIEW", "QA", "Listo")),
+}
+
+try:
+    RESUMEN_MAX_RESULTS = int(os.getenv("RESUMEN_MAX_RESULTS", "100"))
+except ValueError:
+    print("Error: RESUMEN_MAX_RESULTS no es un número válido. Usando 100.")
+    RESUMEN_MAX_RESULTS = 100
+
+try:
+    VER_MAX_KEYS = int(os.getenv("VER_MAX_KEYS", "50"))
+except ValueError:
+    print("Error: VER_MAX_KEYS no es un número válido. Usando 50.")
+    VER_MAX_KEYS = 50
+
+# Claves por búsqueda `key IN (...)` de `/jira ver` con varios tickets (las búsquedas se lanzan en paralelo).
+VER_BATCH_CHUNK = 50
+
+_KEY_RANGE = re.compile(r"([A-Za-z][A-Za-z0-9_]*)-(\d+)(?:\s*\.\.\s*(?:([A-Za-z][A-Za-z0-9_]*)-)?(\d+))?")
+_KEY_SEPARATORS = re.compile(r"[\s,;]+")
+# Jira rechaza toda la JQL si una clave no existe y la nombra entre comillas en el error.
+_MISSING_KEY = re.compile(r"'([A-Za-z][A-Za-z0-9_]*-\d+)'")
+
+COMMAND_NAMES = ("ver", "pendientes", "encurso", "bloqueados", "finalizados", "resumen")
+COMMAND_DEFER_SECONDS = Histogram(
+    "discord_command_defer_seconds", "Duración del `defer` de cada comando (ida y vuelta a Discord).", ("command",)
+)
+COMMAND_FOLLOWUP_SECONDS = Histogram(
+    "discord_command_followup_seconds", "Tiempo desde el `defer` de un comando hasta que termina su respuesta.", ("command",)
 )
+# Series preasignadas por comando.
+_DEFER_SECONDS = {name: COMMAND_DEFER_SECONDS.labels(name) for name in COMMAND_NAMES}
+_FOLLOWUP_SECONDS = {name: COMMAND_FOLLOWUP_SECONDS.labels(name) for name in COMMAND_NAMES}
+
+
+def build_status_jql(usuario: str, statuses) -> str:
+    """Construye la JQL de tickets asignados a `usuario` en cualquiera de los estados dados."""
+    status_list = ", ".join(f'"{status}"' for status in statuses)
+    return f'assignee = "{usuario}" AND status IN ({status_list}) ORDER BY updated DESC'
+
+def parse_ticket_keys(text: str, limit: int = VER_MAX_KEYS) -> list:
+    """
+    Interpreta una o varias claves separadas por comas o espacios, admitiendo rangos
+    `ABC-100..ABC-140` (o `ABC-100..140`). Devuelve las claves en mayúsculas, sin repetir y en
+    el orden dado. Lanza ValueError con un mensaje para el usuario si algo no es una clave
+    o si se piden más de `limit` tickets.
+    Un único valor sin forma de clave (p. ej. el id numérico `10001`) se devuelve tal cual,
+    para consultarlo directamente como antes.
+    """
+    token = text.strip()
+    if token and not _KEY_SEPARATORS.search(token) and not _KEY_RANGE.fullmatch(token):
+        return [token]
+
+    keys = {}
+    position = 0
+    while position < len(text):
+        separator = _KEY_SEPARATORS.match(text, position)
+        if separator:
+            position = separator.end()
+            continue
+
+        match = _KEY_RANGE.match(text, position)
+        if match is None or not (match.end() == len(text) or _KEY_SEPARATORS.match(text, match.end())):
+            fragment = _KEY_SEPARATORS.split(text[position:], 1)[0]
+            raise ValueError(f"`{fragment}` no es una clave de ticket válida (ej. ABC-123 o ABC-100..ABC-140).")
+
+        project, first, end_project, last = match.groups()
+        project = project.upper()
+        if end_project and end_project.upper() != project:
+            raise ValueError(f"El rango `{match.group(0)}` mezcla proyectos distintos.")
+        first = int(first)
+        last = int(last) if last else first
+        if last < first:
+            raise ValueError(f"El rango `{match.group(0)}` está invertido.")
+        if len(keys) + (last - first + 1) > limit:
+            raise ValueError(f"Como máximo se pueden consultar {limit} tickets a la vez.")
+
+        for number in range(first, last + 1):
+            keys[f"{project}-{number}"] = None
+        position = match.end()
+
+    return list(keys)
+
+def index_statuses():
+    """Estados que cubre la JQL del índice por defecto, o None con una TICKET_INDEX_JQL personalizada."""
+    if TICKET_INDEX_JQL:
+        return None
+    return tuple(status for _, statuses in STATUS_GROUPS.values() for status in statuses)
+
+def build_index_jql() -> str:
+    """JQL que sincroniza el índice de tickets: todo lo asignado en los estados de STATUS_GROUPS."""
+    if TICKET_INDEX_JQL:
+        return TICKET_INDEX_JQL
+    status_list = ", ".join(f'"{status}"' for status in index_statuses())
+    return f"assignee IS NOT EMPTY AND status IN ({status_list}) ORDER BY updated DESC"
 
 class JiraCommands(commands.Cog):
     """Cog que agrupa todos los comandos de aplicación relacionados con Jira."""
     
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, jira_client: JiraClient):
         self.bot = bot
+        self.jira_client = jira_client
         print("Cog 'JiraCommands' inicializado.")
 
+    async def cog_load(self):
+        """Arranca la sincronización del índice de tickets si está activado."""
+        if TICKET_INDEX_ENABLED:
+            ticket_index.start(self.jira_client, build_index_jql(), index_statuses())
+
+    async def cog_unload(self):
+        """Detiene el índice de tickets y cierra el pool de conexiones con Jira al descargar el Cog."""
+        await ticket_index.stop()
+        await self.jira_client.aclose()
+
+    async def _defer(self, interaction: discord.Interaction):
+        """Difiere la respuesta y anota el instante para medir cuánto tarda el followup."""
+        started = time.perf_counter()
+        await interaction.response.defer()
+        deferred_at = time.perf_counter()
+        interaction.extras["deferred_at"] = deferred_at
+
+        histogram = _DEFER_SECONDS.get(interaction.command.name) if interaction.command else None
+        if histogram:
+            histogram.observe(deferred_at - started)
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Registra el tiempo entre el `defer` y el final del comando (su último followup)."""
+        deferred_at = interaction.extras.get("deferred_at")
+        histogram = _FOLLOWUP_SECONDS.get(command.name)
+        if deferred_at is not None and histogram:
+            histogram.observe(time.perf_counter() - deferred_at)
+
     jira = app_commands.Group(
         name="jira",
         description="Comandos para interactuar con Jira"
@@ -39,7 +176,7 @@ class JiraCommands(commands.Cog):
         )
         embed.add_field(
             name="`/jira ver <ticket_id>`",
-            value="Obtiene información detallada de un ticket de Jira (ej. `ABC-123`).",
+            value="Obtiene información detallada de un ticket de Jira (ej. `ABC-123`). Con varias claves o un rango (`ABC-1, ABC-7`, `ABC-100..ABC-140`) los lista juntos.",
             inline=False
         )
         embed.add_field(
@@ -62,22 +199,54 @@ class JiraCommands(commands.Cog):
             value="Lista tickets en 'CODE REVIEW', 'QA' o 'LISTO'.",
             inline=False
         )
+        embed.add_field(
+            name="`/jira resumen <usuario>`",
+            value="Muestra en un solo mensaje los tickets pendientes, en curso, bloqueados y finalizados.",
+            inline=False
+        )
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @jira.command(name="ver", description="Obtiene información detallada de un ticket de Jira.")
-    @app_commands.describe(ticket_id="El ID del ticket (ej. ABC-123)")
+    @app_commands.describe(ticket_id="El ID del ticket (ej. ABC-123) o varios: ABC-1, ABC-7 o ABC-100..ABC-140")
     async def jira_ver(self, interaction: discord.Interaction, ticket_id: str):
-        """Obtiene y muestra los detalles de un ticket de Jira específico."""
-        await interaction.response.defer()
+        """
+        Obtiene y muestra los detalles de un ticket de Jira específico.
+        Con varias claves o un rango, los busca con una sola consulta JQL y los lista paginados.
+        """
+        await self._defer(interaction)
+
+        try:
+            keys = parse_ticket_keys(ticket_id)
+        except ValueError as e:
+            await interaction.followup.send(f"❌ {e}")
+            return
+        if not keys:
+            await interaction.followup.send("❌ Indica al menos una clave de ticket (ej. ABC-123).")
+            return
+        if len(keys) > 1:
+            await self._send_ticket_batch(interaction, keys)
+            return
+        ticket_id = keys[0]
+
+        cached_issue = issue_cache.get(ticket_id.upper())
+        if cached_issue is not None:
+            remember_issue(cached_issue)
+            await interaction.followup.send(embed=self._create_ticket_embed(cached_issue, ticket_id))
+            return
 
         try:
-            response = await jira_client.get(
-                f"{JIRA_BASE_URL}/rest/api/3/issue/{ticket_id.upper()}"
+            response = await self.jira_client.get(
+                f"/rest/api/3/issue/{ticket_id.upper()}",
+                endpoint="issue",
+                params={"fields": ",".join(ISSUE_FIELDS)}
             )
 
             if response.status_code == 200:
-                issue = response.json()
+                issue = project_issue(response.json())
+                issue_cache.set(ticket_id.upper(), issue)
+                remember_issue(issue)
+                remember_issue_accounts(issue)
                 embed = self._create_ticket_embed(issue, ticket_id)
                 await interaction.followup.send(embed=embed)
             
@@ -98,95 +267,251 @@ class JiraCommands(commands.Cog):
     @app_commands.describe(usuario="El 'username' o 'displayName' del usuario en Jira")
     async def jira_pendientes(self, interaction: discord.Interaction, usuario: str):
         """Lista tickets pendientes del usuario especificado."""
-        await interaction.response.defer()
-        
-        jql_query = f'assignee = "{usuario}" AND status IN ("BACKLOG", "SELECTED FOR DEVELOPMENT") ORDER BY updated DESC'
+        await self._defer(interaction)
         
+        # La JQL se construye solo si el índice de tickets no puede responder.
         await self._perform_jql_search(
             interaction,
-            jql_query,
+            None,
             f"Tickets Pendientes de {usuario}",
-            f"No se encontraron tickets pendientes para '{usuario}'."
+            f"No se encontraron tickets pendientes para '{usuario}'.",
+            indexed=(usuario, STATUS_GROUPS["pendientes"][1])
         )
 
     @jira.command(name="encurso", description="Lista tickets en estado 'EN CURSO'.")
     @app_commands.describe(usuario="El 'username' o 'displayName' del usuario en Jira")
     async def jira_encurso(self, interaction: discord.Interaction, usuario: str):
         """Lista tickets en curso del usuario especificado."""
-        await interaction.response.defer()
-        
-        jql_query = f'assignee = "{usuario}" AND status = "En curso" ORDER BY updated DESC'
+        await self._defer(interaction)
         
+        # La JQL se construye solo si el índice de tickets no puede responder.
         await self._perform_jql_search(
             interaction,
-            jql_query,
+            None,
             f"Tickets EN CURSO de {usuario}",
-            f"No se encontraron tickets EN CURSO para '{usuario}'."
+            f"No se encontraron tickets EN CURSO para '{usuario}'.",
+            indexed=(usuario, STATUS_GROUPS["encurso"][1])
         )
             
     @jira.command(name="bloqueados", description="Lista tickets en estado 'BLOCK'.")
     @app_commands.describe(usuario="El 'username' o 'displayName' del usuario en Jira")
     async def jira_bloqueados(self, interaction: discord.Interaction, usuario: str):
         """Lista tickets bloqueados del usuario especificado."""
-        await interaction.response.defer()
-        
-        jql_query = f'assignee = "{usuario}" AND status = "BLOCK" ORDER BY updated DESC'
+        await self._defer(interaction)
         
+        # La JQL se construye solo si el índice de tickets no puede responder.
         await self._perform_jql_search(
             interaction,
-            jql_query,
+            None,
             f"Tickets Bloqueados de {usuario}",
-            f"No se encontraron tickets bloqueados para '{usuario}'."
+            f"No se encontraron tickets bloqueados para '{usuario}'.",
+            indexed=(usuario, STATUS_GROUPS["bloqueados"][1])
         )
 
     @jira.command(name="finalizados", description="Lista tickets en CODE REVIEW, QA o LISTO.")
     @app_commands.describe(usuario="El 'username' o 'displayName' del usuario en Jira")
     async def jira_finalizados(self, interaction: discord.Interaction, usuario: str):
         """Lista tickets finalizados del usuario especificado."""
-        await interaction.response.defer()
-        
-        jql_query = f'assignee = "{usuario}" AND status IN ("CODE REVIEW", "QA", "Listo") ORDER BY updated DESC'
+        await self._defer(interaction)
         
+        # La JQL se construye solo si el índice de tickets no puede responder.
         await self._perform_jql_search(
             interaction,
-            jql_query,
+            None,
             f"Tickets Finalizados de {usuario}",
-            f"No se encontraron tickets finalizados para '{usuario}'."
+            f"No se encontraron tickets finalizados para '{usuario}'.",
+            indexed=(usuario, STATUS_GROUPS["finalizados"][1])
         )
 
-    async def _perform_jql_search(self, interaction: discord.Interaction, jql_query: str, title: str, no_results_message: str):
+    @jira.command(name="resumen", description="Resume en un solo mensaje los tickets del usuario agrupados por estado.")
+    @app_commands.describe(usuario="El 'username' o 'displayName' del usuario en Jira")
+    async def jira_resumen(self, interaction: discord.Interaction, usuario: str):
+        """Lista pendientes, en curso, bloqueados y finalizados del usuario con una única consulta JQL."""
+        await self._defer(interaction)
+
+        all_statuses = [status for _, statuses in STATUS_GROUPS.values() for status in statuses]
+
+        try:
+            indexed_issues = ticket_index.lookup(usuario, all_statuses)
+            if indexed_issues is not None:
+                pager = StaticPager(indexed_issues, page_size=RESUMEN_MAX_RESULTS)
+            else:
+                jql_query = await self._user_status_jql(usuario, all_statuses)
+                pager = JqlPager(self.jira_client, jql_query, page_size=RESUMEN_MAX_RESULTS)
+            issues = await pager.get_page(0)
+
+            if not issues:
+                await interaction.followup.send(f"ℹ️ No se encontraron tickets para '{usuario}'.")
+                return
+            remember_user(usuario)
+            for issue in issues:
+                remember_issue(issue)
+
+            embed = self._create_summary_embed(issues, f"Resumen de {usuario}", truncated=pager.has_next(0))
+            await interaction.followup.send(embed=embed)
+
+        except JqlSearchError as e:
+            await self._send_search_error(interaction, e.response)
+        except httpx.RequestError as e:
+            print(f"Error de HTTPX en 'jira_resumen': {e}")
+            await interaction.followup.send("Ocurrió un error de red al consultar a Jira.")
+        except Exception as e:
+            print(f"Excepción en 'jira_resumen': {e}")
+            await interaction.followup.send("Ocurrió un error inesperado al procesar la búsqueda.")
+
+    @jira_ver.autocomplete("ticket_id")
+    async def ticket_id_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        """Sugiere tickets vistos recientemente (por clave, número o palabras del resumen) sin consultar Jira."""
+        return [app_commands.Choice(name=label, value=key) for key, label in issue_suggestions.search(current)]
+
+    @jira_pendientes.autocomplete("usuario")
+    @jira_encurso.autocomplete("usuario")
+    @jira_bloqueados.autocomplete("usuario")
+    @jira_finalizados.autocomplete("usuario")
+    @jira_resumen.autocomplete("usuario")
+    async def usuario_autocomplete(self, interaction: discord.Interaction, current: str) -> list:
+        """Sugiere usuarios de Jira vistos recientemente sin consultar Jira."""
+        return [app_commands.Choice(name=label, value=name) for name, label in user_suggestions.search(current)]
+
+    async def _send_ticket_batch(self, interaction: discord.Interaction, keys: list):
+        """Lista varios tickets en un Embed paginado e indica los que no existen."""
+        try:
+            issues = await self._fetch_issues(keys)
+        except JqlSearchError as e:
+            await self._send_search_error(interaction, e.response)
+            return
+        except httpx.RequestError as e:
+            print(f"Error de HTTPX al consultar {len(keys)} tickets: {e}")
+            await interaction.followup.send("Ocurrió un error de red al consultar los tickets de Jira.")
+            return
+        except Exception as e:
+            print(f"Excepción en 'jira_ver' con varios tickets ({len(keys)}): {e}")
+            await interaction.followup.send("Ocurrió un error inesperado al procesar la solicitud.")
+            return
+
+        found = [issues[key] for key in keys if key in issues]
+        missing = [key for key in keys if key not in issues]
+        if not found:
+            await interaction.followup.send(f"❌ No se pudo encontrar ninguno de los tickets: {', '.join(missing)}.")
+            return
+
+        content = f"❌ No encontrados: {', '.join(missing)}" if missing else None
+        title = f"{len(found)} de {len(keys)} tickets"
+        pager = StaticPager(found)
+
+        def render(page_issues: list, page_index: int, has_more: bool) -> discord.Embed:
+            return self._create_issue_list_embed(page_issues, title, page_index, has_more)
+
+        embed = render(found[:pager.page_size], 0, pager.has_next(0))
+        if not pager.has_next(0):
+            await interaction.followup.send(content, embed=embed)
+            return
+
+        view = IssuePagerView(pager, render, interaction.user.id)
+        view.message = await interaction.followup.send(content, embed=embed, view=view, wait=True)
+
+    async def _fetch_issues(self, keys: list) -> dict:
         """
-        Ejecuta una búsqueda JQL y envía un Embed con los resultados.
+        Obtiene varios issues: primero de la caché y el resto con búsquedas `key IN (...)` de
+        hasta VER_BATCH_CHUNK claves lanzadas en paralelo. Devuelve {clave: issue proyectado};
+        las claves que no existen no aparecen.
         """
-        try:
-            request_url = f"{JIRA_BASE_URL}/rest/api/3/search/jql"
-            request_payload = {
-                "jql": jql_query,
-                "maxResults": 30,
-                "fields": ["summary", "status"]
+        issues = {}
+        pending = []
+        for key in keys:
+            cached = issue_cache.get(key)
+            if cached is not None:
+                issues[key] = cached
+            else:
+                pending.append(key)
+
+        chunks = [pending[start:start + VER_BATCH_CHUNK] for start in range(0, len(pending), VER_BATCH_CHUNK)]
+        for found in await asyncio.gather(*(self._search_keys(chunk) for chunk in chunks)):
+            issues.update(found)
+
+        for issue in issues.values():
+            remember_issue(issue)
+            remember_issue_accounts(issue)
+        return issues
+
+    async def _search_keys(self, keys: list) -> dict:
+        """Busca un grupo de claves con una única consulta JQL y guarda los resultados en la caché."""
+        payload = {
+            "jql": f"key IN ({', '.join(keys)})",
+            "maxResults": len(keys),
+            "fields": list(ISSUE_FIELDS)
+        }
+        response = await self.jira_client.post(SEARCH_URL, endpoint="search", json_body=payload)
+
+        if response.status_code == 400:
+            # Alguna clave no existe: se repite la búsqueda sin las claves que nombra el error.
+            missing = {
+                key.upper()
+                for message in response.json().get("errorMessages", [])
+                for key in _MISSING_KEY.findall(message)
             }
+            remaining = [key for key in keys if key not in missing]
+            if len(remaining) < len(keys):
+                return await self._search_keys(remaining) if remaining else {}
+        if response.status_code != 200:
+            raise JqlSearchError(response)
 
-            response = await jira_client.post(request_url, json=request_payload)
+        found = {}
+        for issue in response.json().get("issues", []):
+            projected = project_issue(issue)
+            key = (projected.get("key") or "").upper()
+            issue_cache.set(key, projected)
+            found[key] = projected
+        return found
 
-            if response.status_code == 200:
-                data = response.json()
-                issues = data.get("issues", [])
+    async def _user_status_jql(self, usuario: str, statuses) -> str:
+        """
+        JQL de los tickets de `usuario` en los estados dados. Con el accountId Jira usa directamente
+        su índice de asignados en lugar de resolver el nombre visible en cada búsqueda.
+        """
+        account_id = await resolve_account_id(self.jira_client, usuario)
+        return build_status_jql(account_id or usuario, statuses)
 
-                if not issues:
-                    await interaction.followup.send(f"ℹ️ {no_results_message}")
-                    return
+    async def _perform_jql_search(self, interaction: discord.Interaction, jql_query: str, title: str, no_results_message: str,
+                                  indexed: tuple = None):
+        """
+        Ejecuta una búsqueda JQL y envía un Embed con la primera página de resultados.
+        Si hay más páginas, añade botones para pedirlas a Jira bajo demanda.
+        Con `indexed=(usuario, estados)` responde desde el índice de tickets si está al día; si no,
+        y `jql_query` es None, busca los tickets del usuario en esos estados por su accountId.
+        """
+        try:
+            indexed_issues = ticket_index.lookup(*indexed) if indexed else None
+            if indexed_issues is not None:
+                pager = StaticPager(indexed_issues)
+            else:
+                if jql_query is None:
+                    jql_query = await self._user_status_jql(*indexed)
+                pager = JqlPager(self.jira_client, jql_query)
+            issues = await pager.get_page(0)
+
+            if not issues:
+                await interaction.followup.send(f"ℹ️ {no_results_message}")
+                return
+            # Con resultados, el usuario buscado existe: se ofrece como sugerencia.
+            if indexed:
+                remember_user(indexed[0])
+            for issue in issues:
+                remember_issue(issue)
 
-                embed = self._create_issue_list_embed(issues, title)
+            def render(page_issues: list, page_index: int, has_more: bool) -> discord.Embed:
+                return self._create_issue_list_embed(page_issues, title, page_index, has_more)
+
+            embed = render(issues, 0, pager.has_next(0))
+            if not pager.has_next(0):
                 await interaction.followup.send(embed=embed)
-            
-            elif response.status_code == 400:
-                error_data = response.json()
-                error_message = error_data.get("errorMessages", ["Error desconocido"])[0]
-                await interaction.followup.send(f"Error en la consulta JQL: {error_message}")
-            
-            else:
-                print(f"[LOG] Error en búsqueda JQL (no 200/400): {response.text}")
-                await interaction.followup.send(f"No se pudo realizar la búsqueda. Código de estado: {response.status_code}")
+                return
+
+            view = IssuePagerView(pager, render, interaction.user.id)
+            view.message = await interaction.followup.send(embed=embed, view=view, wait=True)
+
+        except JqlSearchError as e:
+            await self._send_search_error(interaction, e.response)
 
         except httpx.RequestError as e:
             print(f"Error de HTTPX en '_perform_jql_search': {e}")
@@ -195,32 +520,90 @@ class JiraCommands(commands.Cog):
             print(f"Excepción en '_perform_jql_search': {e}")
             await interaction.followup.send("Ocurrió un error inesperado al procesar la búsqueda.")
 
-    def _create_issue_list_embed(self, issues: list, title: str) -> discord.Embed:
-        """Formatea una lista de issues en un Embed."""
+    async def _send_search_error(self, interaction: discord.Interaction, response: httpx.Response):
+        """Informa al usuario de una respuesta no exitosa de la búsqueda JQL."""
+        if response.status_code == 400:
+            error_data = response.json()
+            error_message = error_data.get("errorMessages", ["Error desconocido"])[0]
+            await interaction.followup.send(f"Error en la consulta JQL: {error_message}")
+        else:
+            print(f"[LOG] Error en búsqueda JQL (no 200/400): {response.text}")
+            await interaction.followup.send(f"No se pudo realizar la búsqueda. Código de estado: {response.status_code}")
+
+    def _format_issue_line(self, issue: dict) -> str:
+        """Formatea un issue como una entrada de listado con enlace y estado."""
+        key = issue.get("key", "SIN-CLAVE")
+        fields = issue.get("fields", {})
+        summary = fields.get("summary", "Sin resumen")
+        status_obj = fields.get("status")
+        status = status_obj.get("name", "Sin estado") if status_obj else "Sin estado"
+
+        ticket_url = f"{JIRA_BASE_URL}/browse/{key}"
+
+        return (
+            f"**[{key}]({ticket_url})**: {summary}\n"
+            f"*(Estado: {status})*"
+        )
+
+    def _create_summary_embed(self, issues: list, title: str, truncated: bool = False) -> discord.Embed:
+        """Agrupa los issues por estado en un Embed con una sección por grupo de STATUS_GROUPS."""
         embed = discord.Embed(
-            title=f"🔎 {title}",
+            title=f"📊 {title}",
             color=discord.Color.green()
         )
-        
-        description = []
+
+        group_by_status = {
+            status.casefold(): group
+            for group, (_, statuses) in STATUS_GROUPS.items()
+            for status in statuses
+        }
+        sections = {group: [] for group in STATUS_GROUPS}
         for issue in issues:
-            key = issue.get("key", "SIN-CLAVE")
-            fields = issue.get("fields", {})
-            summary = fields.get("summary", "Sin resumen")
-            status_obj = fields.get("status")
-            status = status_obj.get("name", "Sin estado") if status_obj else "Sin estado"
-            
-            ticket_url = f"{JIRA_BASE_URL}/browse/{key}"
-            
-            description.append(
-                f"**[{key}]({ticket_url})**: {summary}\n"
-                f"*(Estado: {status})*"
+            status_obj = issue.get("fields", {}).get("status") or {}
+            group = group_by_status.get(status_obj.get("name", "").casefold())
+            if group:
+                sections[group].append(issue)
+
+        for group, (label, _) in STATUS_GROUPS.items():
+            group_issues = sections[group]
+            lines = []
+            length = 0
+            for index, issue in enumerate(group_issues):
+                line = self._format_issue_line(issue)
+                remaining = len(group_issues) - index
+                # Reserva espacio para la línea "...y N más" dentro del límite de 1024 caracteres.
+                if length + len(line) + 2 > 1024 - 20:
+                    lines.append(f"*...y {remaining} más*")
+                    break
+                lines.append(line)
+                length += len(line) + 2
+
+            embed.add_field(
+                name=f"{label} ({len(group_issues)})",
+                value="\n\n".join(lines) if lines else "Sin tickets",
+                inline=False
             )
+
+        if truncated:
+            embed.set_footer(text=f"Se muestran los {len(issues)} tickets más recientes. Puede haber más resultados.")
+
+        return embed
+
+    def _create_issue_list_embed(self, issues: list, title: str, page_index: int = 0, has_more: bool = False) -> discord.Embed:
+        """Formatea una lista de issues en un Embed."""
+        embed = discord.Embed(
+            title=f"🔎 {title}",
+            color=discord.Color.green()
+        )
         
+        description = [self._format_issue_line(issue) for issue in issues]
         embed.description = "\n\n".join(description)
         
-        if len(issues) == 30:
-            embed.set_footer(text="Se muestran los 30 tickets más recientes. Puede haber más resultados.")
+        if page_index or has_more:
+            footer = f"Página {page_index + 1}"
+            if has_more:
+                footer += " · Hay más resultados, usa los botones para navegar."
+            embed.set_footer(text=footer)
             
         return embed
 
@@ -246,13 +629,8 @@ class JiraCommands(commands.Cog):
         
         if isinstance(desc_obj, dict) and "content" in desc_obj:
             try:
-                description_text = ""
-                for block in desc_obj["content"]:
-                    if block["type"] == "paragraph":
-                        for text_block in block.get("content", []):
-                            if text_block.get("type") == "text":
-                                description_text += text_block.get("text", "") + "\n"
-                description = description_text.strip() or "Sin descripción"
+                memo_key = (ticket_key.upper(), fields.get("updated")) if fields.get("updated") else None
+                description = render_adf(desc_obj, limit=1024, memo_key=memo_key) or "Sin descripción"
             except Exception:
                 description = "Error al parsear la descripción estructurada."
         elif isinstance(desc_obj, str):
@@ -280,4 +658,4 @@ class JiraCommands(commands.Cog):
 
 async def setup(bot: commands.Bot):
     """Setup requerido por discord.py para cargar el Cog."""
-    await bot.add_cog(JiraCommands(bot))
\ No newline at end of file
+    await bot.add_cog(JiraCommands(bot, JiraClient.from_env()))
\ No newline at end of file
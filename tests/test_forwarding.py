@@ -0,0 +1,103 @@
+"""
+Reenvío de notificaciones entre réplicas con el journal activo: un evento reenviado al shard que
+tiene el canal sigue pendiente hasta que ese shard confirma que lo publicó, y si no llega la
+confirmación (p. ej. porque se cayó) cuenta como fallido para que el journal lo reintente.
+
+Usa `RedisStateBackend` contra el servidor RESP de `benchmarks/fake_redis.py`.
+Uso: python -m pytest tests
+"""
+import asyncio
+import unittest
+
+from benchmarks.fake_discord import FakeBot
+from benchmarks.fake_redis import FakeRedis
+from utils.state import RedisStateBackend, aioredis
+from web.notification_dispatcher import NotificationDispatcher
+from web.webhook_server import Notification
+
+OWNED_CHANNEL = 2001
+
+
+class RecordingListener:
+    """Consumidor del journal mínimo: cuenta las entregas pendientes de cada evento."""
+
+    def __init__(self):
+        self.pending = {}
+        self.done = {}
+
+    def notifications_enqueued(self, notifications: list):
+        for notification in notifications:
+            if notification.journal_id is not None:
+                self.event_pending(notification.journal_id)
+
+    def notification_done(self, notification, delivered: bool):
+        self.event_done(notification.journal_id, delivered)
+
+    def event_pending(self, event_id: int):
+        self.pending[event_id] = self.pending.get(event_id, 0) + 1
+
+    def event_done(self, event_id: int, delivered: bool):
+        if event_id not in self.pending:
+            return
+        self.pending[event_id] -= 1
+        self.done.setdefault(event_id, []).append(delivered)
+        if not self.pending[event_id]:
+            del self.pending[event_id]
+
+
+@unittest.skipIf(aioredis is None, "requiere el paquete redis")
+class ForwardAckTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeRedis()
+        url = await self.redis.start()
+        self.states = [RedisStateBackend(url, shard_id=shard_id, shard_count=2, prefix="test:") for shard_id in (0, 1)]
+        for state in self.states:
+            await state.start()
+        await self.states[1].publish_channels([OWNED_CHANNEL])
+        self.owner_bot = FakeBot(channel_ids=[OWNED_CHANNEL])
+        self.listener = RecordingListener()
+        self.sender = NotificationDispatcher(FakeBot(channel_ids=[]), flush_window=0, state=self.states[0])
+        self.sender.listener = self.listener
+        self.owner = NotificationDispatcher(self.owner_bot, flush_window=0, state=self.states[1])
+        self.dispatchers = [self.sender]
+
+    async def asyncTearDown(self):
+        for dispatcher in self.dispatchers:
+            await dispatcher.stop()
+        for state in self.states:
+            await state.stop()
+        await self.redis.stop()
+
+    async def _forward(self, journal_id: int):
+        await self.sender.start()
+        notification = Notification("updated", "BENCH-1", channel_id=OWNED_CHANNEL, journal_id=journal_id)
+        self.assertTrue(self.sender.enqueue([notification]))
+        await asyncio.wait_for(self.sender.queue.join(), 2.0)
+
+    async def test_event_pending_until_owner_acknowledges(self):
+        self.dispatchers.append(self.owner)
+        await self.owner.start()
+        await self._forward(7)
+        for _ in range(50):
+            if 7 not in self.listener.pending:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(len(self.owner_bot.sent_messages()), 1)
+        self.assertNotIn(7, self.listener.pending)
+        self.assertEqual(self.listener.done[7], [True, True])
+
+    async def test_event_fails_without_acknowledgement(self):
+        # El shard dueño no está en marcha: la notificación queda en su cola sin publicar.
+        self.sender.forward_ack_timeout = 0.2
+        await self._forward(8)
+        self.assertEqual(self.listener.pending, {8: 1})
+        for _ in range(50):
+            if 8 not in self.listener.pending:
+                break
+            await asyncio.sleep(0.1)
+        self.assertNotIn(8, self.listener.pending)
+        self.assertEqual(self.listener.done[8], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
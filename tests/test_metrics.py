@@ -0,0 +1,86 @@
+"""
+Las métricas de rate limit de Discord se obtienen del texto que discord.py escribe en el logger
+`discord.http` (no hay ningún hook para ello). Estas pruebas fallan si una versión nueva de
+discord.py cambia esos mensajes, para actualizar `DiscordRateLimitFilter` a la vez.
+
+Uso: python -m pytest tests
+"""
+import re
+import inspect
+import logging
+import unittest
+
+import discord.http
+from prometheus_client import REGISTRY
+
+from utils.metrics import (
+    GLOBAL_RATE_LIMIT_MESSAGE, RATE_LIMIT_RETRY_MARK, RATE_LIMITED_MESSAGE, DiscordRateLimitFilter, FunctionCounter,
+    render_metrics
+)
+
+
+def _warning_formats() -> list:
+    """Formatos que `discord.http` pasa a `_log.warning` (cadenas literales del código fuente)."""
+    return re.findall(r"'([^'\n]*rate limit[^'\n]*)'", inspect.getsource(discord.http), re.IGNORECASE)
+
+
+def _sample(name: str, labels: dict = None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+class DiscordLogMessagesTest(unittest.TestCase):
+    def test_route_rate_limit_message(self):
+        formats = [line for line in _warning_formats() if line.startswith(RATE_LIMITED_MESSAGE)]
+        self.assertTrue(formats, f"discord.http ya no escribe '{RATE_LIMITED_MESSAGE}'.")
+        retrying = [line for line in formats if RATE_LIMIT_RETRY_MARK in line]
+        self.assertTrue(retrying, f"discord.http ya no escribe '{RATE_LIMIT_RETRY_MARK}'.")
+        # El tiempo de espera es el último argumento del mensaje.
+        self.assertTrue(all(line.endswith("%.2f seconds.") for line in retrying))
+
+    def test_global_rate_limit_message(self):
+        formats = [line for line in _warning_formats() if GLOBAL_RATE_LIMIT_MESSAGE in line]
+        self.assertTrue(formats, f"discord.http ya no escribe '{GLOBAL_RATE_LIMIT_MESSAGE}'.")
+
+
+class DiscordRateLimitFilterTest(unittest.TestCase):
+    def _record(self, msg: str, *args) -> logging.LogRecord:
+        return logging.LogRecord("discord.http", logging.WARNING, __file__, 0, msg, args, None)
+
+    def test_counts_route_rate_limit_and_wait(self):
+        route = _sample("discord_rate_limited_total", {"scope": "route"})
+        wait = _sample("discord_rate_limit_wait_seconds_total")
+        record = self._record(
+            "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+            "POST", "https://discord.com/api/v10/channels/1/messages", 1.5
+        )
+        self.assertTrue(DiscordRateLimitFilter().filter(record))
+        self.assertEqual(_sample("discord_rate_limited_total", {"scope": "route"}), route + 1)
+        self.assertEqual(_sample("discord_rate_limit_wait_seconds_total"), wait + 1.5)
+
+    def test_counts_global_rate_limit(self):
+        before = _sample("discord_rate_limited_total", {"scope": "global"})
+        record = self._record("Global rate limit has been hit. Retrying in %.2f seconds.", 2.0)
+        self.assertTrue(DiscordRateLimitFilter().filter(record))
+        self.assertEqual(_sample("discord_rate_limited_total", {"scope": "global"}), before + 1)
+
+    def test_ignores_other_messages(self):
+        before = _sample("discord_rate_limited_total", {"scope": "route"})
+        self.assertTrue(DiscordRateLimitFilter().filter(self._record("Done sleeping for the rate limit.")))
+        self.assertEqual(_sample("discord_rate_limited_total", {"scope": "route"}), before)
+
+
+class FunctionCounterTest(unittest.TestCase):
+    def test_reads_function_on_export(self):
+        stats = {"sent": 0}
+        counter = FunctionCounter("test_function_counter_total", "Prueba.", ("event",))
+        try:
+            counter.labels("sent").set_function(lambda: stats["sent"])
+            stats["sent"] = 3
+            self.assertEqual(_sample("test_function_counter_total", {"event": "sent"}), 3)
+            self.assertIn(b'test_function_counter_total{event="sent"} 3.0', render_metrics())
+        finally:
+            REGISTRY.unregister(counter)
+
+
+if __name__ == "__main__":
+    unittest.main()
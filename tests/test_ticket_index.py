@@ -0,0 +1,69 @@
+"""
+Actualización del índice de tickets desde webhooks: los eventos de comentarios (con el issue
+recortado, sin `updated`) no deben tocar el índice ni forzar una sincronización completa.
+
+Uso: python -m pytest tests
+"""
+import asyncio
+import unittest
+
+from benchmarks.fake_jira import make_issue
+from benchmarks.webhook_replay import comment_issue
+from utils.ticket_index import TicketIndex
+
+
+class _NoJira:
+    """Cliente de Jira para pruebas sin sincronización: cualquier llamada falla."""
+
+    async def post(self, *args, **kwargs):
+        raise RuntimeError("sin Jira en las pruebas")
+
+
+class TicketIndexWebhookTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.index = TicketIndex(reconcile_interval=3600, min_resync_interval=3600)
+        self.index.start(_NoJira(), "assignee IS NOT EMPTY", statuses=["To Do"])
+        await asyncio.sleep(0)
+        self.index._insert(self.index._entry(make_issue(1)))
+        self.index._resync.clear()
+
+    async def asyncTearDown(self):
+        # Deja que `_run` salga de `wait_for` antes de cancelarlo (en 3.11 puede tragarse la cancelación).
+        await asyncio.sleep(0.01)
+        await self.index.stop()
+
+    async def test_comment_event_does_not_resync(self):
+        before = dict(self.index._issues)
+        for event_type in ("comment_created", "comment_updated"):
+            self.index.update_from_webhook(event_type, comment_issue(make_issue(1)))
+        await asyncio.sleep(0)
+        self.assertFalse(self.index._resync.is_set())
+        self.assertEqual(self.index.stats["resync_requests"], 0)
+        self.assertEqual(self.index.stats["webhook_updates"], 0)
+        self.assertEqual(self.index._issues, before)
+
+    async def test_issue_event_without_fields_requests_resync(self):
+        self.index.update_from_webhook("jira:issue_updated", comment_issue(make_issue(1)))
+        await asyncio.sleep(0)
+        self.assertTrue(self.index._resync.is_set())
+        self.assertEqual(self.index.stats["resync_requests"], 1)
+
+    async def test_forced_resyncs_are_rate_limited(self):
+        syncs = self.index.stats["syncs"] + self.index.stats["sync_errors"]
+        for _ in range(5):
+            self.index.update_from_webhook("jira:issue_updated", comment_issue(make_issue(1)))
+            await asyncio.sleep(0.01)
+        # La sincronización inicial acaba de ejecutarse: las peticiones esperan a `min_resync_interval`.
+        self.assertEqual(self.index.stats["syncs"] + self.index.stats["sync_errors"], syncs)
+        self.assertEqual(self.index.stats["resync_requests"], 5)
+
+    async def test_issue_updated_applies_full_payload(self):
+        issue = make_issue(2)
+        issue["fields"]["status"] = {"name": "To Do"}
+        self.index.update_from_webhook("jira:issue_updated", issue)
+        self.assertIn("BENCH-2", self.index._issues)
+        self.assertFalse(self.index._resync.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
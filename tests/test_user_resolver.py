@@ -0,0 +1,37 @@
+"""
+Caché de accountId que precargan los webhooks (`utils/user_resolver.py`): un nombre visible
+compartido por dos usuarios no debe resolverse al último que apareció.
+
+Uso: python -m pytest tests
+"""
+import unittest
+
+from utils.user_resolver import account_ids, remember_account
+
+
+class RememberAccountTest(unittest.TestCase):
+    def setUp(self):
+        account_ids.clear()
+
+    def tearDown(self):
+        account_ids.clear()
+
+    def test_unique_display_name(self):
+        remember_account({"displayName": "Ana Pérez", "emailAddress": "ana@example.com", "accountId": "acc-1"})
+        remember_account({"displayName": "Ana Pérez", "accountId": "acc-1"})
+        self.assertEqual(account_ids.get("ana pérez"), "acc-1")
+        self.assertEqual(account_ids.get("ana@example.com"), "acc-1")
+        self.assertEqual(account_ids.get("acc-1"), "acc-1")
+
+    def test_shared_display_name_is_unresolved(self):
+        remember_account({"displayName": "Ana Pérez", "accountId": "acc-1"})
+        remember_account({"displayName": "Ana Pérez", "emailAddress": "ana2@example.com", "accountId": "acc-2"})
+        remember_account({"displayName": "Ana Pérez", "accountId": "acc-1"})
+        self.assertEqual(account_ids.get("ana pérez"), "")
+        # El email y el accountId siguen identificando a cada uno.
+        self.assertEqual(account_ids.get("ana2@example.com"), "acc-2")
+        self.assertEqual(account_ids.get("acc-1"), "acc-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Lectura rápida del cuerpo de los webhooks (`web/webhook_parsing.py`): el atajo que descarta
+issue_updated sin cambios relevantes solo debe leer el `changelog` de primer nivel y, si no
+puede localizarlo sin ambigüedad, dejar la decisión al parseo completo.
+
+Uso: python -m pytest tests
+"""
+import json
+import unittest
+
+from benchmarks.fake_jira import make_issue
+from web.webhook_parsing import peek_changelog_items, peek_event_type
+
+STATUS_ITEMS = [{"field": "status", "fromString": "To Do", "toString": "In Progress"}]
+LABEL_ITEMS = [{"field": "labels", "fromString": "", "toString": "backend"}]
+
+
+def _raw(payload: dict) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+def _issue_updated(items: list, issue: dict = None) -> dict:
+    return {
+        "webhookEvent": "jira:issue_updated",
+        "issue": issue or make_issue(1),
+        "changelog": {"id": "1", "items": items},
+    }
+
+
+class PeekChangelogItemsTest(unittest.TestCase):
+    def test_reads_top_level_changelog(self):
+        raw = _raw(_issue_updated(STATUS_ITEMS))
+        self.assertEqual(peek_event_type(raw), "jira:issue_updated")
+        self.assertEqual(peek_changelog_items(raw), STATUS_ITEMS)
+
+    def test_ignores_changelog_text_inside_strings(self):
+        issue = make_issue(1)
+        issue["fields"]["summary"] = 'Revisar "changelog": {"items": []}'
+        self.assertEqual(peek_changelog_items(_raw(_issue_updated(STATUS_ITEMS, issue))), STATUS_ITEMS)
+
+    def test_expanded_issue_changelog_after_top_level(self):
+        # El issue con `expand=changelog` serializado tras el changelog del evento: el último
+        # `"changelog"` del cuerpo es el del issue, así que no se puede usar el atajo.
+        payload = {"webhookEvent": "jira:issue_updated", "changelog": {"id": "1", "items": STATUS_ITEMS}}
+        issue = make_issue(1)
+        issue["changelog"] = {"histories": [{"items": LABEL_ITEMS}], "items": LABEL_ITEMS}
+        payload["issue"] = issue
+        self.assertIsNone(peek_changelog_items(_raw(payload)))
+
+    def test_only_expanded_issue_changelog(self):
+        issue = make_issue(1)
+        issue["changelog"] = {"items": LABEL_ITEMS}
+        self.assertIsNone(peek_changelog_items(_raw({"webhookEvent": "jira:issue_updated", "issue": issue})))
+
+    def test_missing_changelog(self):
+        self.assertIsNone(peek_changelog_items(_raw({"webhookEvent": "jira:issue_updated", "issue": make_issue(1)})))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,295 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+
+try:
+    ADF_MEMO_SIZE = int(os.getenv("ADF_MEMO_SIZE", "256"))
+except ValueError:
+    print("Error: ADF_MEMO_SIZE no es un número válido. Usando 256.")
+    ADF_MEMO_SIZE = 256
+
+# Marcas de texto de ADF -> delimitadores de markdown de Discord.
+MARK_DELIMITERS = {
+    "strong": "**",
+    "em": "*",
+    "code": "`",
+    "strike": "~~",
+    "underline": "__",
+}
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_memo_stats = {"hits": 0, "misses": 0}
+CACHE_HITS.labels("adf").set_function(lambda: _memo_stats["hits"])
+CACHE_MISSES.labels("adf").set_function(lambda: _memo_stats["misses"])
+
+
+def _apply_marks(text: str, marks: list) -> str:
+    """Aplica las marcas de un nodo `text` (negrita, cursiva, código, enlace...)."""
+    href = None
+    for mark in marks:
+        mark_type = mark.get("type")
+        delimiter = MARK_DELIMITERS.get(mark_type)
+        if delimiter:
+            text = f"{delimiter}{text}{delimiter}"
+        elif mark_type == "link":
+            href = (mark.get("attrs") or {}).get("href")
+    if href:
+        text = f"[{text}]({href})"
+    return text
+
+
+def _inline_text(node: dict, attrs: dict) -> str:
+    """Texto de los nodos inline que no son `text` (menciones, emojis, fechas...)."""
+    node_type = node.get("type")
+    if node_type == "mention":
+        text = attrs.get("text") or attrs.get("id") or ""
+        return text if text.startswith("@") else f"@{text}"
+    if node_type == "emoji":
+        return attrs.get("text") or attrs.get("shortName") or ""
+    if node_type in ("inlineCard", "blockCard", "embedCard"):
+        return attrs.get("url") or ""
+    if node_type == "status":
+        return f"[{attrs.get('text', '')}]"
+    if node_type == "date":
+        try:
+            timestamp = int(attrs.get("timestamp")) / 1000
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%d/%m/%Y")
+        except (TypeError, ValueError):
+            return ""
+    if node_type == "media":
+        return "[adjunto]"
+    return ""
+
+
+class _ChildIterator:
+    """Iterador sobre los hijos de un nodo contenedor, apilado en lugar de sus hijos."""
+    __slots__ = ("children",)
+
+    def __init__(self, content: list):
+        self.children = iter(content)
+
+
+# Nodos inline que admite el camino rápido de `_render_paragraphs`.
+_SIMPLE_INLINE = frozenset(("mention", "emoji"))
+
+
+def _render_paragraphs(content: list, limit: int):
+    """
+    Camino rápido para el caso más común (comentarios y descripciones de solo párrafos con texto,
+    saltos de línea, menciones y emojis): un bucle plano por párrafos, sin pila ni tuplas de contexto,
+    que limpia cada línea al añadirla. Devuelve lo mismo que `_render`, o None si aparece otro
+    tipo de nodo y hay que usar el recorrido general.
+    """
+    lines = []
+    length = 0
+    try:
+        for block in content:
+            if block["type"] != "paragraph":
+                return None
+            children = block.get("content") or ()
+            if len(children) == 1 and children[0]["type"] == "text" and "marks" not in children[0]:
+                pieces = None
+                paragraph = children[0]["text"]
+            else:
+                pieces = []
+                for child in children:
+                    child_type = child["type"]
+                    if child_type == "text":
+                        marks = child.get("marks")
+                        pieces.append(_apply_marks(child.get("text", ""), marks) if marks else child.get("text", ""))
+                    elif child_type == "hardBreak":
+                        pieces.append("\n")
+                    elif child_type in _SIMPLE_INLINE:
+                        pieces.append(_inline_text(child, child.get("attrs") or {}))
+                    else:
+                        return None
+                paragraph = "".join(pieces)
+
+            length += len(paragraph) + 1
+            if length > limit:
+                # Se corta en la misma pieza que `_render`, para devolver exactamente el mismo texto.
+                length -= len(paragraph) + 1
+                prefix = ""
+                for piece in (pieces if pieces is not None else (paragraph,)):
+                    prefix += piece
+                    length += len(piece)
+                    if length > limit:
+                        break
+                else:
+                    prefix += "\n"
+                lines.extend([line.rstrip() for line in prefix.split("\n")])
+                return _finish(lines, limit, True)
+
+            if "\n" in paragraph:
+                lines.extend([line.rstrip() for line in paragraph.split("\n")])
+            else:
+                lines.append(paragraph.rstrip())
+    except (KeyError, TypeError, AttributeError):
+        # Nodo sin `type` o que no es un objeto: el recorrido general sabe ignorarlo.
+        return None
+    return _finish(lines, limit, False)
+
+
+def _finish(lines: list, limit: int, truncated: bool) -> str:
+    """Une las líneas (ya sin espacios finales), quita las líneas en blanco repetidas y corta a `limit` caracteres."""
+    text = "\n".join(lines).strip()
+    while "\n\n\n" in text:
+        text = text.replace("\n\n\n", "\n\n")
+
+    if len(text) > limit or truncated:
+        text = text[:max(0, limit - 3)].rstrip() + "..."
+    return text
+
+
+def _render(doc: dict, limit: int) -> str:
+    """
+    Recorre el documento con una pila explícita (sin recursión) y deja de recorrerlo
+    en cuanto el texto generado supera `limit` caracteres.
+    Cada entrada de la pila es un texto ya listo o un nodo con su contexto:
+    (nodo, prefijo de la primera línea, sangría de las siguientes, dentro de tabla).
+    Los hijos de los contenedores genéricos (p. ej. `doc`) se apilan mediante un iterador,
+    de modo que un documento enorme no se copia entero a la pila antes de cortar.
+    """
+    if doc.get("type") == "doc":
+        text = _render_paragraphs(doc.get("content") or (), limit)
+        if text is not None:
+            return text
+
+    parts = []
+    length = 0
+    stack = [(doc, "", "", False)]
+
+    while stack and length <= limit:
+        entry = stack.pop()
+        if isinstance(entry, str):
+            parts.append(entry)
+            length += len(entry)
+            continue
+
+        node, prefix, indent, in_table = entry
+        if isinstance(node, _ChildIterator):
+            child = next(node.children, None)
+            if child is not None:
+                stack.append(entry)
+                stack.append((child, prefix, indent, in_table))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        node_type = node.get("type")
+        content = node.get("content") or []
+        attrs = node.get("attrs") or {}
+        block_end = " " if in_table else "\n"
+
+        if node_type == "text":
+            text = _apply_marks(node.get("text", ""), node.get("marks") or ())
+            parts.append(text)
+            length += len(text)
+            continue
+
+        if node_type == "hardBreak":
+            stack.append(" " if in_table else "\n" + indent)
+            continue
+
+        if node_type in ("paragraph", "heading"):
+            if node_type == "heading":
+                stack.append(f"**{block_end}")
+            else:
+                stack.append(block_end)
+            stack.extend((child, "", indent, in_table) for child in reversed(content))
+            opening = prefix if not in_table else ""
+            if node_type == "heading":
+                opening += "**"
+            if opening:
+                stack.append(opening)
+            continue
+
+        if node_type == "codeBlock":
+            language = attrs.get("language") or ""
+            code = "".join(child.get("text", "") for child in content if isinstance(child, dict))
+            stack.append(f"`{code}`{block_end}" if in_table else f"```{language}\n{code}\n```\n")
+            continue
+
+        if node_type in ("bulletList", "orderedList"):
+            start = (attrs.get("order") or 1) if node_type == "orderedList" else None
+            for index in range(len(content) - 1, -1, -1):
+                marker = f"{start + index}. " if start is not None else "• "
+                stack.append((content[index], indent + marker, indent + "  ", in_table))
+            continue
+
+        if node_type == "listItem":
+            for index in range(len(content) - 1, -1, -1):
+                stack.append((content[index], prefix if index == 0 else indent, indent, in_table))
+            continue
+
+        if node_type in ("blockquote", "panel"):
+            quote = indent + "> "
+            for index in range(len(content) - 1, -1, -1):
+                stack.append((content[index], (prefix + "> ") if index == 0 else quote, quote, in_table))
+            continue
+
+        if node_type == "rule":
+            stack.append("───\n")
+            continue
+
+        if node_type == "tableRow":
+            stack.append("\n")
+            for index in range(len(content) - 1, -1, -1):
+                stack.append((content[index], "", "", True))
+                if index:
+                    stack.append("| ")
+            continue
+
+        inline = _inline_text(node, attrs)
+        if inline:
+            parts.append(inline)
+            length += len(inline)
+            if node_type == "blockCard":
+                stack.append(block_end)
+            continue
+
+        # doc, table, tableCell, mediaSingle, mediaGroup, expand y nodos desconocidos:
+        # solo se recorren sus hijos.
+        if content:
+            stack.append((_ChildIterator(content), prefix, indent, in_table))
+
+    lines = [line.rstrip() for line in "".join(parts).split("\n")]
+    return _finish(lines, limit, bool(stack))
+
+
+def render_adf(doc, limit: int = 1024, memo_key=None) -> str:
+    """
+    Convierte un documento ADF (Atlassian Document Format) a markdown de Discord,
+    con un máximo de `limit` caracteres. Devuelve "" si el documento no tiene texto.
+
+    `memo_key` identifica el contenido (p. ej. clave del issue + fecha `updated`, o id del
+    comentario + `updated`). Si se indica, el resultado se memoriza. No se calcula un hash del
+    documento completo porque serializarlo cuesta más que el propio renderizado, que se detiene
+    al alcanzar `limit`.
+    """
+    if not isinstance(doc, dict):
+        return ""
+
+    if memo_key is None:
+        return _render(doc, limit)
+
+    memo_key = (memo_key, limit)
+    with _memo_lock:
+        cached = _memo.get(memo_key)
+        if cached is not None:
+            _memo.move_to_end(memo_key)
+            _memo_stats["hits"] += 1
+            return cached
+        _memo_stats["misses"] += 1
+
+    text = _render(doc, limit)
+
+    with _memo_lock:
+        _memo[memo_key] = text
+        while len(_memo) > ADF_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return text
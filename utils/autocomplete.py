@@ -0,0 +1,170 @@
+import os
+import re
+import bisect
+import itertools
+import threading
+from collections import OrderedDict
+
+try:
+    AUTOCOMPLETE_MAX_ISSUES = int(os.getenv("AUTOCOMPLETE_MAX_ISSUES", "2000"))
+    AUTOCOMPLETE_MAX_USERS = int(os.getenv("AUTOCOMPLETE_MAX_USERS", "500"))
+except ValueError:
+    print("Error: AUTOCOMPLETE_MAX_ISSUES/AUTOCOMPLETE_MAX_USERS no son números válidos. Usando 2000 y 500.")
+    AUTOCOMPLETE_MAX_ISSUES = 2000
+    AUTOCOMPLETE_MAX_USERS = 500
+
+# Discord admite como mucho 25 sugerencias, y nombre y valor de 1 a 100 caracteres.
+MAX_CHOICES = 25
+MAX_CHOICE_LENGTH = 100
+
+# A partir de cuántos términos coincidentes compensa recorrer las entradas por antigüedad.
+BROAD_PREFIX_TERMS = 256
+
+_WORD = re.compile(r"\w+")
+
+
+class PrefixIndex:
+    """
+    Índice de sugerencias por prefijo con tamaño máximo y expulsión por antigüedad.
+    Cada entrada se indexa bajo varios términos (clave, palabras del resumen, nombre...) en una
+    lista ordenada de tuplas (término, valor): todas las coincidencias de un prefijo son un
+    tramo contiguo que se localiza con `bisect`, sin recorrer el índice completo.
+    Es seguro entre hilos porque lo alimentan tanto los comandos como el hilo de Flask.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._terms = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def add(self, value: str, label: str, terms, replace: bool = True):
+        """
+        Añade o refresca una entrada; si ya existía pasa a ser la más reciente. Las entradas se
+        identifican sin distinguir mayúsculas; con `replace=False` se conserva el valor ya guardado.
+        """
+        entry_id = value.casefold()
+        terms = {term.casefold() for term in terms if term}
+        terms.add(entry_id)
+        with self._lock:
+            current = self._entries.get(entry_id)
+            if current is not None:
+                if not replace:
+                    value, label, terms = current[0], current[1], current[2]
+                self._unindex(entry_id)
+            self._entries[entry_id] = (value, label, terms, next(self._counter))
+            for term in terms:
+                bisect.insort(self._terms, (term, entry_id))
+            while len(self._entries) > self.maxsize:
+                self._unindex(next(iter(self._entries)))
+
+    def discard(self, value: str):
+        with self._lock:
+            if value.casefold() in self._entries:
+                self._unindex(value.casefold())
+
+    def _unindex(self, entry_id: str):
+        terms = self._entries.pop(entry_id)[2]
+        for term in terms:
+            position = bisect.bisect_left(self._terms, (term, entry_id))
+            if position < len(self._terms) and self._terms[position] == (term, entry_id):
+                del self._terms[position]
+
+    def _range(self, word: str) -> tuple:
+        """Tramo de `_terms` cuyos términos empiezan por `word`."""
+        return (bisect.bisect_left(self._terms, (word,)),
+                bisect.bisect_left(self._terms, (word + "\U0010ffff",)))
+
+    def search(self, prefix: str, limit: int = MAX_CHOICES) -> list:
+        """
+        Devuelve hasta `limit` pares (valor, etiqueta) de la entrada más reciente a la más antigua.
+        Cada palabra de `prefix` tiene que ser el principio de algún término de la entrada
+        (`prueba 12` encuentra "Ticket de prueba 12"). Sin prefijo, las más recientes.
+        """
+        words = prefix.casefold().split()
+        with self._lock:
+            if not words:
+                recent = itertools.islice(reversed(self._entries.values()), limit)
+                return [(value, label) for value, label, _, _ in recent]
+
+            # Se parte de la palabra más selectiva y se filtra con las demás.
+            ranges = sorted((self._range(word) for word in words), key=lambda span: span[1] - span[0])
+            start, end = ranges[0]
+            if end - start > BROAD_PREFIX_TERMS:
+                # Prefijo muy común (`a`, `bench`): casi todo encaja, así que es más barato
+                # recorrer las entradas de la más reciente hacia atrás y parar al llenar `limit`.
+                candidates = reversed(self._entries.values())
+            else:
+                candidates = sorted(
+                    {self._terms[position][1]: self._entries[self._terms[position][1]]
+                     for position in range(start, end)}.values(),
+                    key=lambda entry: entry[3], reverse=True
+                )
+
+            results = []
+            for value, label, terms, _ in candidates:
+                if all(any(term.startswith(word) for term in terms) for word in words):
+                    results.append((value, label))
+                    if len(results) == limit:
+                        break
+            return results
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._terms.clear()
+
+
+issue_suggestions = PrefixIndex(AUTOCOMPLETE_MAX_ISSUES)
+user_suggestions = PrefixIndex(AUTOCOMPLETE_MAX_USERS)
+
+
+def _choice_label(text: str) -> str:
+    return text if len(text) <= MAX_CHOICE_LENGTH else text[:MAX_CHOICE_LENGTH - 3] + "..."
+
+
+def remember_issue(issue: dict):
+    """Guarda la clave y el resumen de un issue (y sus personas) como sugerencias."""
+    key = (issue.get("key") or "").upper()
+    if not key:
+        return
+    fields = issue.get("fields") or {}
+    summary = fields.get("summary") or ""
+    issue_suggestions.add(
+        key,
+        _choice_label(f"{key}: {summary}" if summary else key),
+        # `ABC-123` también se encuentra escribiendo solo `123`.
+        [key.rsplit("-", 1)[-1], *_WORD.findall(summary)]
+    )
+    for name in ("assignee", "creator", "reporter"):
+        remember_user(fields.get(name))
+
+
+def remember_user(user):
+    """Guarda un usuario de Jira (dict con `displayName`/`name` o el nombre buscado) como sugerencia de `usuario`."""
+    # Un nombre escrito a mano no sustituye la forma en que lo devuelve Jira (`ana` → `Ana`).
+    if isinstance(user, dict):
+        name, replace = user.get("displayName") or user.get("name"), True
+    else:
+        name, replace = user, False
+    if not name or len(name) > MAX_CHOICE_LENGTH:
+        return
+    user_suggestions.add(name, name, _WORD.findall(name), replace=replace)
+
+
+def forget_issue(key: str):
+    if key:
+        issue_suggestions.discard(key.upper())
+
+
+def remember_webhook(event_type: str, issue: dict, actor: dict = None):
+    """Alimenta las sugerencias con el issue y el autor de un webhook; olvida los issues borrados."""
+    if "issue_deleted" in (event_type or ""):
+        forget_issue(issue.get("key"))
+    else:
+        remember_issue(issue)
+    remember_user(actor)
@@ -0,0 +1,76 @@
+import time
+import threading
+from collections import OrderedDict
+
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+
+
+class TTLCache:
+    """
+    Caché en memoria con tamaño máximo (expulsión LRU) y caducidad por entrada.
+    Es segura entre hilos porque se usa tanto desde el loop del bot como desde el hilo de Flask.
+    Con `name`, sus aciertos y fallos se exportan en `/metrics` con la etiqueta `cache=<name>`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            CACHE_HITS.labels(name).set_function(lambda: self.hits)
+            CACHE_MISSES.labels(name).set_function(lambda: self.misses)
+
+    def get(self, key, default=None):
+        """Devuelve el valor si existe y no ha caducado, marcándolo como usado recientemente."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """Como `get`, pero sin contar acierto o fallo ni marcarlo como usado (para mantener la caché)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return default
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        """Guarda un valor, expulsando el menos usado si se supera el tamaño máximo."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> bool:
+        """Elimina una entrada. Devuelve True si existía."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,62 @@
+import os
+import json
+import hashlib
+from discord import app_commands
+
+COMMAND_SYNC_CACHE = os.getenv("COMMAND_SYNC_CACHE", "data/command_sync.json")
+
+
+def command_schema_hash(tree: app_commands.CommandTree) -> str:
+    """
+    Hash del esquema de los comandos globales tal y como se envían a Discord al sincronizar
+    (nombres, descripciones, opciones, autocompletado...). Cambia si y solo si cambia la definición
+    de algún comando, no el código que lo ejecuta.
+    """
+    schema = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda payload: (payload.get("type", 1), payload["name"])
+    )
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _read_cache(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Advertencia: no se pudo leer {path} ({e}). Se sincronizarán los comandos.")
+        return {}
+
+
+def _write_cache(path: str, entry: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as cache_file:
+        json.dump(entry, cache_file)
+    os.replace(temporary, path)
+
+
+async def sync_commands_if_changed(tree: app_commands.CommandTree, application_id: int,
+                                   force: bool = False, path: str = COMMAND_SYNC_CACHE):
+    """
+    Sincroniza los comandos globales solo si su esquema ha cambiado desde la última sincronización
+    correcta de esta aplicación (o con `force`). `tree.sync()` es un upsert global con un rate limit
+    muy estricto: repetirlo en cada reinicio retrasa el arranque y puede provocar 429.
+    Devuelve la lista de comandos sincronizados, o None si no hacía falta.
+    """
+    schema_hash = command_schema_hash(tree)
+    cached = _read_cache(path) if path else {}
+    if not force and cached.get("application_id") == application_id and cached.get("hash") == schema_hash:
+        return None
+
+    synced = await tree.sync()
+    if path:
+        try:
+            _write_cache(path, {"application_id": application_id, "hash": schema_hash})
+        except OSError as e:
+            print(f"Advertencia: no se pudo guardar {path} ({e}).")
+    return synced
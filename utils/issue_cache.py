@@ -0,0 +1,43 @@
+import os
+
+from utils.cache import TTLCache
+
+# Campos de un issue que realmente usa `_create_ticket_embed` (`updated` identifica la versión
+# de la descripción para memorizar su renderizado).
+ISSUE_FIELDS = ("summary", "status", "creator", "assignee", "created", "updated", "description")
+
+try:
+    ISSUE_CACHE_MAXSIZE = int(os.getenv("ISSUE_CACHE_MAXSIZE", "512"))
+    ISSUE_CACHE_TTL = float(os.getenv("ISSUE_CACHE_TTL", "60"))
+except ValueError:
+    print("Error: ISSUE_CACHE_MAXSIZE/ISSUE_CACHE_TTL no son números válidos. Usando 512 entradas y 60 segundos.")
+    ISSUE_CACHE_MAXSIZE = 512
+    ISSUE_CACHE_TTL = 60.0
+
+issue_cache = TTLCache(maxsize=ISSUE_CACHE_MAXSIZE, ttl=ISSUE_CACHE_TTL, name="issue")
+
+
+def project_issue(issue: dict) -> dict:
+    """Reduce el JSON de un issue a los campos que se muestran en Discord."""
+    fields = issue.get("fields") or {}
+    return {
+        "key": issue.get("key"),
+        "fields": {name: fields.get(name) for name in ISSUE_FIELDS if name in fields}
+    }
+
+
+def update_from_webhook(event_type: str, issue: dict):
+    """
+    Mantiene la caché coherente con los webhooks de Jira.
+    Si el payload trae todos los campos proyectados se actualiza la entrada;
+    en otro caso (o si el issue se ha borrado) se invalida.
+    """
+    ticket_key = (issue.get("key") or "").upper()
+    if not ticket_key or ticket_key not in issue_cache:
+        return
+
+    fields = issue.get("fields") or {}
+    if "issue_deleted" not in (event_type or "") and all(name in fields for name in ISSUE_FIELDS):
+        issue_cache.set(ticket_key, project_issue(issue))
+    else:
+        issue_cache.delete(ticket_key)
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import random
+import asyncio
+import importlib.util
+from email.utils import parsedate_to_datetime
+import httpx
+
+from utils.metrics import FunctionCounter, Histogram
+from utils.singleflight import SingleFlight
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+JIRA_REQUEST_SECONDS = Histogram(
+    "jira_request_duration_seconds", "Duración de cada intento de petición a Jira.", ("endpoint",)
+)
+JIRA_CLIENT_EVENTS = FunctionCounter(
+    "jira_client_events_total",
+    "Peticiones, reintentos, 429 y peticiones fusionadas del cliente de Jira.", ("event",)
+)
+JIRA_THROTTLE_WAIT = FunctionCounter(
+    "jira_throttle_wait_seconds_total", "Segundos esperados en el limitador de peticiones a Jira."
+)
+
+
+def _env_number(name: str, default, cast=float):
+    """Lee una variable de entorno numérica, usando el valor por defecto si no es válida."""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"Error: {name} no es un número válido. Usando {default}.")
+        return default
+
+
+class TokenBucket:
+    """Limitador de peticiones del lado del cliente (token bucket)."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Espera hasta disponer de un token. Devuelve los segundos esperados."""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class JiraClient:
+    """
+    Cliente HTTP de Jira con pool de conexiones configurable, HTTP/2 opcional,
+    timeouts por endpoint, reintentos con backoff exponencial (respetando `Retry-After`),
+    limitador de peticiones y fusión de peticiones idénticas concurrentes.
+    """
+
+    def __init__(self, base_url: str, auth=None, *, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30.0, http2: bool = False,
+                 timeouts: dict = None, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, rate_limit: float = 10.0, rate_burst: float = 20.0,
+                 transport: httpx.AsyncBaseTransport = None):
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("Advertencia: JIRA_HTTP2 requiere el paquete 'h2' (pip install httpx[http2]). Usando HTTP/1.1.")
+            http2 = False
+
+        self.timeouts = {"default": 15.0, "issue": 10.0, "search": 20.0}
+        self.timeouts.update(timeouts or {})
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst)
+        self.coalescer = SingleFlight()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttle_wait_seconds": 0.0,
+        }
+        # Series preasignadas por endpoint para no crear etiquetas en cada petición. Los contadores
+        # se leen de `stats` al exportar (si hay varios clientes, se exporta el último creado).
+        self._latency = {endpoint: JIRA_REQUEST_SECONDS.labels(endpoint) for endpoint in self.timeouts}
+        for event in ("requests", "retries", "rate_limited"):
+            JIRA_CLIENT_EVENTS.labels(event).set_function(lambda event=event: self.stats[event])
+        JIRA_CLIENT_EVENTS.labels("coalesced").set_function(lambda: self.coalescer.merged)
+        JIRA_THROTTLE_WAIT.set_function(lambda: self.stats["throttle_wait_seconds"])
+
+        self._client = httpx.AsyncClient(
+            base_url=base_url or "",
+            auth=auth,
+            headers={"Content-Type": "application/json"},
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=self.timeouts["default"],
+            transport=transport
+        )
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Construye el cliente a partir de las variables de entorno del bot."""
+        email = os.getenv("JIRA_EMAIL")
+        token = os.getenv("JIRA_API_TOKEN")
+        options = {
+            "auth": (email, token) if email and token else None,
+            "max_connections": _env_number("JIRA_MAX_CONNECTIONS", 20, int),
+            "max_keepalive": _env_number("JIRA_MAX_KEEPALIVE", 10, int),
+            "keepalive_expiry": _env_number("JIRA_KEEPALIVE_EXPIRY", 30.0),
+            "http2": os.getenv("JIRA_HTTP2", "false").strip().lower() in ("1", "true", "yes"),
+            "timeouts": {
+                "default": _env_number("JIRA_TIMEOUT_DEFAULT", 15.0),
+                "issue": _env_number("JIRA_TIMEOUT_ISSUE", 10.0),
+                "search": _env_number("JIRA_TIMEOUT_SEARCH", 20.0),
+            },
+            "max_retries": _env_number("JIRA_MAX_RETRIES", 3, int),
+            "rate_limit": _env_number("JIRA_RATE_LIMIT", 10.0),
+            "rate_burst": _env_number("JIRA_RATE_BURST", 20.0),
+        }
+        options.update(overrides)
+        return cls(os.getenv("JIRA_BASE_URL"), **options)
+
+    async def get(self, path: str, *, endpoint: str = "default", params: dict = None) -> httpx.Response:
+        """GET a Jira. Las peticiones idénticas en curso comparten la misma respuesta."""
+        key = ("GET", path, tuple(sorted((params or {}).items())))
+        return await self.coalescer.do(
+            key, lambda: self.request("GET", path, endpoint=endpoint, params=params)
+        )
+
+    async def post(self, path: str, *, endpoint: str = "default", json_body: dict = None) -> httpx.Response:
+        """POST de solo lectura a Jira (p. ej. búsquedas JQL), también fusionado si es idéntico."""
+        key = ("POST", path, json.dumps(json_body, sort_keys=True))
+        return await self.coalescer.do(
+            key, lambda: self.request("POST", path, endpoint=endpoint, json=json_body)
+        )
+
+    async def request(self, method: str, path: str, *, endpoint: str = "default", **kwargs) -> httpx.Response:
+        """
+        Ejecuta la petición con limitador y reintentos.
+        Reintenta ante 429/502/503/504 y errores de transporte; devuelve la última respuesta
+        o relanza el último error de red si se agotan los intentos.
+        """
+        timeout = self.timeouts.get(endpoint, self.timeouts["default"])
+        latency = self._latency.get(endpoint) or JIRA_REQUEST_SECONDS.labels(endpoint)
+        attempt = 0
+
+        while True:
+            self.stats["throttle_wait_seconds"] += await self.rate_limiter.acquire()
+            self.stats["requests"] += 1
+
+            started = time.perf_counter()
+            try:
+                response = await self._client.request(method, path, timeout=timeout, **kwargs)
+            except httpx.TransportError as e:
+                latency.observe(time.perf_counter() - started)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"[LOG] Error de red con Jira ({e}). Reintentando en {delay:.2f}s...")
+            else:
+                latency.observe(time.perf_counter() - started)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+
+                if response.status_code == 429:
+                    self.stats["rate_limited"] += 1
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                print(f"[LOG] Jira respondió {response.status_code}. Reintentando en {delay:.2f}s...")
+
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response: httpx.Response):
+        """Interpreta la cabecera `Retry-After` (segundos o fecha HTTP)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return min(self.backoff_max, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value).timestamp()
+            return min(self.backoff_max, max(0.0, retry_at - time.time()))
+        except (TypeError, ValueError):
+            return None
+
+    async def aclose(self):
+        """Cierra el pool de conexiones."""
+        await self._client.aclose()
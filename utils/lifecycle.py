@@ -0,0 +1,73 @@
+import os
+import time
+import signal
+import asyncio
+
+try:
+    SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
+except ValueError:
+    print("Error: SHUTDOWN_TIMEOUT no es un número válido. Usando 25 segundos.")
+    SHUTDOWN_TIMEOUT = 25.0
+
+
+class Lifecycle:
+    """
+    Arranca los componentes del bot en el orden en que se registran y los detiene en orden
+    inverso, todos dentro de un mismo plazo (`SHUTDOWN_TIMEOUT`). Un componente que falla
+    o agota el plazo al detenerse no impide cerrar los demás.
+    """
+
+    def __init__(self, shutdown_timeout: float = SHUTDOWN_TIMEOUT):
+        self.shutdown_timeout = shutdown_timeout
+        self._components = []
+        self._started = []
+        self._deadline = None
+        self.stopping = asyncio.Event()
+
+    def add(self, name: str, start=None, stop=None):
+        """Registra un componente con sus funciones asíncronas (opcionales) de arranque y parada."""
+        self._components.append((name, start, stop))
+
+    def remaining(self) -> float:
+        """Segundos que quedan del plazo de apagado (el plazo completo si aún no ha empezado)."""
+        if self._deadline is None:
+            return self.shutdown_timeout
+        return max(0.0, self._deadline - time.monotonic())
+
+    def install_signal_handlers(self):
+        """SIGINT y SIGTERM (p. ej. un reinicio del despliegue) inician el apagado ordenado."""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop, sig.name)
+            except (NotImplementedError, RuntimeError):
+                # Windows: Ctrl+C sigue llegando como KeyboardInterrupt.
+                pass
+
+    def request_stop(self, reason: str = None):
+        if not self.stopping.is_set():
+            print(f"\nCerrando bot{f' ({reason})' if reason else ''}...")
+            self.stopping.set()
+
+    async def start(self):
+        for name, start, stop in self._components:
+            if start:
+                await start()
+            self._started.append((name, stop))
+
+    async def stop(self):
+        """Detiene en orden inverso los componentes arrancados."""
+        self.request_stop()
+        self._deadline = time.monotonic() + self.shutdown_timeout
+        while self._started:
+            name, stop = self._started.pop()
+            if not stop:
+                continue
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(stop(), max(self.remaining(), 0.1))
+                print(f"[Apagado] {name} detenido en {time.perf_counter() - started:.2f}s.")
+            except asyncio.TimeoutError:
+                print(f"[Apagado] {name} no terminó dentro del plazo de apagado.")
+            except Exception as e:
+                print(f"[Apagado] Error al detener {name}: {e}")
@@ -0,0 +1,121 @@
+import logging
+import prometheus_client
+from prometheus_client import REGISTRY, Counter, Gauge, generate_latest
+from prometheus_client.core import CounterMetricFamily
+
+# Content-Type del formato de texto de Prometheus.
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST
+
+# Límites (en segundos) de los histogramas de latencia. Cubren desde una respuesta de caché
+# hasta un envío a Discord retenido por la ventana de agrupación o por un rate limit.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram(prometheus_client.Histogram):
+    """Histograma de `prometheus_client` con `LATENCY_BUCKETS` como límites por defecto."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS, **kwargs):
+        super().__init__(name, documentation, labelnames, buckets=buckets, **kwargs)
+
+
+class _FunctionSeries:
+    __slots__ = ("metric", "labelvalues")
+
+    def __init__(self, metric, labelvalues: tuple):
+        self.metric = metric
+        self.labelvalues = labelvalues
+
+    def set_function(self, function):
+        self.metric._functions[self.labelvalues] = function
+
+
+class FunctionCounter:
+    """
+    Contador cuyo valor se lee de una función en cada exportación (p. ej. un campo de `stats`
+    o el contador de aciertos de una caché), registrado como collector de `prometheus_client`.
+    El código caliente sigue sumando en sus propios enteros, sin el lock de `Counter.inc`.
+    Se usa como `Gauge.set_function`: `METRIC.labels("x").set_function(lambda: stats["x"])`.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._functions = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values) -> _FunctionSeries:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}.")
+        return _FunctionSeries(self, tuple(str(value) for value in values))
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+    def describe(self):
+        return [CounterMetricFamily(self.name, self.documentation, labels=self.labelnames)]
+
+    def collect(self):
+        family = CounterMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        for labelvalues, function in list(self._functions.items()):
+            try:
+                family.add_metric(labelvalues, function())
+            except Exception as e:
+                print(f"Error al leer la métrica {self.name}: {e}")
+        yield family
+
+
+def render_metrics() -> bytes:
+    """Exporta todas las métricas registradas en el formato de texto de Prometheus."""
+    return generate_latest(REGISTRY)
+
+
+# Métricas compartidas por varios módulos.
+QUEUE_DEPTH = Gauge("bot_queue_depth", "Elementos pendientes en las colas internas del bot.", ("queue",))
+CACHE_HITS = FunctionCounter("bot_cache_hits_total", "Aciertos de las cachés en memoria.", ("cache",))
+CACHE_MISSES = FunctionCounter("bot_cache_misses_total", "Fallos de las cachés en memoria.", ("cache",))
+
+DISCORD_RATE_LIMITED = Counter(
+    "discord_rate_limited_total", "Respuestas 429 de Discord (por ruta o globales).", ("scope",)
+)
+DISCORD_RATE_LIMIT_WAIT = Counter(
+    "discord_rate_limit_wait_seconds_total", "Segundos que discord.py ha esperado por respuestas 429."
+)
+_RATE_LIMITED_ROUTE = DISCORD_RATE_LIMITED.labels("route")
+_RATE_LIMITED_GLOBAL = DISCORD_RATE_LIMITED.labels("global")
+
+# Mensajes de `discord.http` (discord.py 2.x) que anuncian un 429. discord.py no ofrece ningún
+# evento ni hook para sus esperas por rate limit, así que estas métricas dependen del texto del log:
+# tests/test_metrics.py comprueba que la versión instalada sigue emitiendo estos mensajes.
+RATE_LIMITED_MESSAGE = "We are being rate limited."
+RATE_LIMIT_RETRY_MARK = "Retrying in"
+GLOBAL_RATE_LIMIT_MESSAGE = "Global rate limit has been hit."
+
+
+class DiscordRateLimitFilter(logging.Filter):
+    """
+    Cuenta los 429 que discord.py anuncia como WARNING en el logger `discord.http`, con el
+    tiempo de espera como último argumento. Nunca descarta el registro, así que el log sigue
+    saliendo igual que antes. Depende del texto de esos mensajes (ver `RATE_LIMITED_MESSAGE`).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.msg if isinstance(record.msg, str) else ""
+        if message.startswith(RATE_LIMITED_MESSAGE):
+            _RATE_LIMITED_ROUTE.inc()
+            if RATE_LIMIT_RETRY_MARK in message and record.args:
+                try:
+                    DISCORD_RATE_LIMIT_WAIT.inc(float(record.args[-1]))
+                except (TypeError, ValueError):
+                    pass
+        elif message.startswith(GLOBAL_RATE_LIMIT_MESSAGE):
+            _RATE_LIMITED_GLOBAL.inc()
+        return True
+
+
+def install_discord_rate_limit_metrics():
+    """Registra `DiscordRateLimitFilter` en el logger `discord.http` (una sola vez)."""
+    logger = logging.getLogger("discord.http")
+    if not any(isinstance(existing, DiscordRateLimitFilter) for existing in logger.filters):
+        logger.addFilter(DiscordRateLimitFilter())
@@ -0,0 +1,150 @@
+import os
+from collections import OrderedDict
+import discord
+
+from utils.jira_client import JiraClient
+
+try:
+    JQL_PAGE_SIZE = int(os.getenv("JQL_PAGE_SIZE", "10"))
+except ValueError:
+    print("Error: JQL_PAGE_SIZE no es un número válido. Usando 10.")
+    JQL_PAGE_SIZE = 10
+
+SEARCH_URL = "/rest/api/3/search/jql"
+
+
+class JqlSearchError(Exception):
+    """Respuesta no exitosa de Jira al pedir una página de resultados."""
+
+    def __init__(self, response):
+        super().__init__(f"Jira respondió {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class JqlPager:
+    """
+    Recorre una búsqueda JQL página a página usando `nextPageToken`.
+    Solo pide una página cuando se solicita y guarda las últimas `cache_pages` en memoria;
+    de las demás conserva únicamente el token para volver a pedirlas.
+    """
+
+    def __init__(self, jira_client: JiraClient, jql: str, page_size: int = JQL_PAGE_SIZE,
+                 fields: tuple = ("summary", "status"), cache_pages: int = 3):
+        self.jira_client = jira_client
+        self.jql = jql
+        self.page_size = page_size
+        self.fields = list(fields)
+        self.cache_pages = cache_pages
+        self._tokens = [None]
+        self._pages = OrderedDict()
+        self._last_page = None
+
+    def has_next(self, index: int) -> bool:
+        """Indica si existe una página posterior a `index` (según lo visto hasta ahora)."""
+        return self._last_page is None or index < self._last_page
+
+    async def get_page(self, index: int) -> list:
+        """Devuelve los issues de la página `index`, pidiéndola a Jira si no está en caché."""
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index]
+
+        if index >= len(self._tokens):
+            raise IndexError(f"La página {index} aún no es accesible.")
+
+        payload = {
+            "jql": self.jql,
+            "maxResults": self.page_size,
+            "fields": self.fields
+        }
+        if self._tokens[index]:
+            payload["nextPageToken"] = self._tokens[index]
+
+        response = await self.jira_client.post(SEARCH_URL, endpoint="search", json_body=payload)
+        if response.status_code != 200:
+            raise JqlSearchError(response)
+
+        data = response.json()
+        issues = data.get("issues", [])
+        next_token = data.get("nextPageToken")
+
+        if next_token and not data.get("isLast", False):
+            if index + 1 == len(self._tokens):
+                self._tokens.append(next_token)
+        else:
+            self._last_page = index
+
+        self._pages[index] = issues
+        while len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+
+        return issues
+
+
+class StaticPager:
+    """Misma interfaz que `JqlPager` sobre una lista de issues ya cargada (p. ej. del índice de tickets)."""
+
+    def __init__(self, issues: list, page_size: int = JQL_PAGE_SIZE):
+        self.issues = issues
+        self.page_size = page_size
+
+    def has_next(self, index: int) -> bool:
+        return (index + 1) * self.page_size < len(self.issues)
+
+    async def get_page(self, index: int) -> list:
+        return self.issues[index * self.page_size:(index + 1) * self.page_size]
+
+
+class IssuePagerView(discord.ui.View):
+    """Botones Anterior/Siguiente para navegar por los resultados de un `JqlPager` o `StaticPager`."""
+
+    def __init__(self, pager, render, author_id: int, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.pager = pager
+        self.render = render
+        self.author_id = author_id
+        self.index = 0
+        self.message = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = not self.pager.has_next(self.index)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Solo quien ejecutó el comando puede cambiar de página.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, index: int):
+        await interaction.response.defer()
+        try:
+            issues = await self.pager.get_page(index)
+        except Exception as e:
+            print(f"Excepción al paginar resultados JQL: {e}")
+            await interaction.followup.send("No se pudo cargar la página solicitada.", ephemeral=True)
+            return
+
+        self.index = index
+        self._update_buttons()
+        embed = self.render(issues, self.index, self.pager.has_next(self.index))
+        await interaction.edit_original_response(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ Anterior", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(label="Siguiente ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index + 1)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,41 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Agrupa peticiones idénticas concurrentes: la primera llamada con una clave ejecuta
+    la operación y las que llegan mientras está en curso esperan su mismo resultado.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.executions = 0
+        self.merged = 0
+
+    async def do(self, key, operation):
+        """
+        Ejecuta `operation()` (una función que devuelve una corrutina) una sola vez por clave en curso.
+        Si la llamada original se cancela, las que esperan siguen recibiendo el resultado.
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(operation())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.merged += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Contadores de llamadas, ejecuciones reales y llamadas fusionadas."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "merged": self.merged,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,323 @@
+import os
+import abc
+import json
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").strip().lower()
+if STATE_BACKEND not in ("memory", "redis"):
+    print(f"Error: STATE_BACKEND '{STATE_BACKEND}' no es válido (memory o redis). Usando memory.")
+    STATE_BACKEND = "memory"
+if STATE_BACKEND == "redis" and aioredis is None:
+    # Sin caer a memory: cada réplica deduplicaría y publicaría por su cuenta.
+    print("Error: STATE_BACKEND=redis requiere el paquete `redis` (pip install redis).")
+    exit(1)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "jira-bot:")
+
+try:
+    BOT_SHARD_COUNT = int(os.getenv("BOT_SHARD_COUNT", "1"))
+    BOT_SHARD_ID = int(os.getenv("BOT_SHARD_ID", "0"))
+except ValueError:
+    print("Error: BOT_SHARD_COUNT/BOT_SHARD_ID no son números válidos. Usando una sola réplica.")
+    BOT_SHARD_COUNT, BOT_SHARD_ID = 1, 0
+if BOT_SHARD_COUNT < 1 or not 0 <= BOT_SHARD_ID < BOT_SHARD_COUNT:
+    print(f"Error: BOT_SHARD_ID {BOT_SHARD_ID} no es válido para {BOT_SHARD_COUNT} shards. Usando una sola réplica.")
+    BOT_SHARD_COUNT, BOT_SHARD_ID = 1, 0
+if BOT_SHARD_COUNT > 1 and STATE_BACKEND == "memory":
+    print("Error: varias réplicas (BOT_SHARD_COUNT > 1) necesitan STATE_BACKEND=redis. Usando una sola réplica.")
+    BOT_SHARD_COUNT, BOT_SHARD_ID = 1, 0
+
+try:
+    STATE_DEDUP_TTL = int(os.getenv("STATE_DEDUP_TTL", "86400"))
+except ValueError:
+    print("Error: STATE_DEDUP_TTL no es un número válido. Usando 86400 segundos.")
+    STATE_DEDUP_TTL = 86400
+
+# Entregas recordadas como máximo por el backend en memoria (las más antiguas se olvidan antes).
+MEMORY_DEDUP_MAXSIZE = 100_000
+# Segundos que se recuerda localmente qué shard tiene cada canal. Que un canal no tenga dueño
+# se recuerda mucho menos, para ver enseguida los canales que se acaban de anunciar.
+CHANNEL_OWNER_TTL = 60.0
+UNKNOWN_OWNER_TTL = 2.0
+# Mensajes de difusión pendientes de publicar como máximo (los demás se descartan).
+BROADCAST_BACKLOG = 10_000
+
+
+class StateBackend(abc.ABC):
+    """
+    Estado compartido entre réplicas del bot:
+
+    - deduplicación de entregas de Jira (`claim`/`release`),
+    - una cola de notificaciones por shard, para que solo publique en un canal la réplica
+      cuyo shard del gateway lo tiene (`forward`/`receive`), y por la misma cola la confirmación
+      de la entrega a la réplica que las reenvió (`acknowledge`),
+    - qué shard tiene cada canal (`publish_channels`/`channel_owner`),
+    - difusión de eventos a las demás réplicas (`broadcast` y `on_broadcast`), con la que cada
+      una mantiene sus cachés al día aunque el webhook lo haya recibido otra.
+    """
+
+    name = "memory"
+
+    def __init__(self, shard_id: int = 0, shard_count: int = 1):
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        # Función llamada (en el loop del bot) con cada mensaje difundido por otra réplica.
+        self.on_broadcast = None
+        self._loop = None
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count > 1
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    async def claim(self, key: str, ttl: int = STATE_DEDUP_TTL) -> bool:
+        """Reserva una clave de deduplicación. False si ya la había reservado alguien en los últimos `ttl` segundos."""
+
+    @abc.abstractmethod
+    async def release(self, key: str):
+        """Libera una clave reservada (p. ej. si el webhook no se pudo encolar y Jira lo reintentará)."""
+
+    def claim_threadsafe(self, key: str, timeout: float = 5.0) -> bool:
+        """`claim` desde otro hilo (p. ej. Flask/waitress)."""
+        return asyncio.run_coroutine_threadsafe(self.claim(key), self._loop).result(timeout=timeout)
+
+    def release_threadsafe(self, key: str, timeout: float = 5.0):
+        asyncio.run_coroutine_threadsafe(self.release(key), self._loop).result(timeout=timeout)
+
+    async def forward(self, shard_id: int, channel_id: int, notifications: list, ack: str = None):
+        """
+        Entrega notificaciones (dicts serializables) a la cola del shard que tiene el canal.
+        Con `ack`, ese shard confirma con `acknowledge` a este cuando termine de enviarlas.
+        """
+        entry = {"channel_id": channel_id, "notifications": notifications}
+        if ack is not None:
+            entry["ack"] = {"shard": self.shard_id, "token": ack}
+        await self._push(shard_id, entry)
+
+    async def acknowledge(self, shard_id: int, token: str, delivered: bool):
+        """Confirma al shard que reenvió unas notificaciones (con `ack=token`) si se entregaron."""
+        await self._push(shard_id, {"acked": token, "delivered": delivered})
+
+    @abc.abstractmethod
+    async def _push(self, shard_id: int, entry: dict):
+        """Añade una entrada a la cola de un shard."""
+
+    @abc.abstractmethod
+    async def receive(self, timeout: float = 1.0):
+        """
+        Siguiente entrada de la cola de este shard, o None tras `timeout` segundos: notificaciones
+        (`channel_id`, `notifications` y, si hay que confirmarlas, `ack`) o una confirmación
+        (`acked` y `delivered`).
+        """
+
+    async def publish_channels(self, channel_ids):
+        """Anuncia que los canales indicados pertenecen a este shard."""
+
+    async def channel_owner(self, channel_id: int):
+        """Shard que tiene el canal, o None si no se sabe."""
+        return None
+
+    def broadcast(self, message: dict):
+        """Difunde un mensaje a las demás réplicas sin esperar. Se puede llamar desde cualquier hilo."""
+
+
+class MemoryStateBackend(StateBackend):
+    """Backend por defecto para una sola réplica: todo en memoria del proceso."""
+
+    def __init__(self, dedup_maxsize: int = MEMORY_DEDUP_MAXSIZE):
+        super().__init__()
+        self.dedup_maxsize = dedup_maxsize
+        self._claims = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = None
+
+    async def start(self):
+        await super().start()
+        self._queue = asyncio.Queue()
+
+    def _claim(self, key: str, ttl: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            # Todas las claves tienen la misma caducidad, así que las caducadas están al principio.
+            while self._claims and next(iter(self._claims.values())) < now:
+                self._claims.popitem(last=False)
+            expires_at = self._claims.get(key)
+            if expires_at is not None and expires_at >= now:
+                return False
+            self._claims[key] = now + ttl
+            while len(self._claims) > self.dedup_maxsize:
+                self._claims.popitem(last=False)
+            return True
+
+    async def claim(self, key: str, ttl: int = STATE_DEDUP_TTL) -> bool:
+        return self._claim(key, ttl)
+
+    def claim_threadsafe(self, key: str, timeout: float = 5.0) -> bool:
+        return self._claim(key, STATE_DEDUP_TTL)
+
+    async def release(self, key: str):
+        self.release_threadsafe(key)
+
+    def release_threadsafe(self, key: str, timeout: float = 5.0):
+        with self._lock:
+            self._claims.pop(key, None)
+
+    async def _push(self, shard_id: int, entry: dict):
+        self._queue.put_nowait(entry)
+
+    async def receive(self, timeout: float = 1.0):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisStateBackend(StateBackend):
+    """
+    Backend compartido sobre un servidor compatible con Redis:
+    `SET NX EX` para deduplicar, una lista por shard (`RPUSH`/`BLPOP`) para las notificaciones,
+    un hash canal → shard y un canal pub/sub para difundir los eventos. Usa `redis.asyncio`
+    (redis-py) con su pool de conexiones; `BLPOP` y la suscripción ocupan cada uno la suya.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, shard_id: int = BOT_SHARD_ID, shard_count: int = BOT_SHARD_COUNT,
+                 prefix: str = STATE_KEY_PREFIX):
+        super().__init__(shard_id, shard_count)
+        self.url = url
+        self.prefix = prefix
+        # Identifica a esta réplica para ignorar sus propias difusiones.
+        self.replica_id = uuid.uuid4().hex
+        # RESP2 lo habla cualquier servidor compatible con Redis (HELLO/RESP3 solo desde Redis 6).
+        self._redis = aioredis.Redis.from_url(url, protocol=2)
+        self._owners = {}
+        self._outbox = None
+        self._tasks = []
+
+    def _key(self, *parts) -> str:
+        return self.prefix + ":".join(str(part) for part in parts)
+
+    async def start(self):
+        await super().start()
+        await self._redis.ping()
+        self._outbox = asyncio.Queue(maxsize=BROADCAST_BACKLOG)
+        self._tasks = [asyncio.create_task(self._publish_loop()), asyncio.create_task(self._listen_loop())]
+
+    async def stop(self):
+        # Se publican las difusiones pendientes antes de cerrar las conexiones.
+        if self._outbox is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._outbox.join(), 2.0)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._redis.aclose()
+
+    async def claim(self, key: str, ttl: int = STATE_DEDUP_TTL) -> bool:
+        return bool(await self._redis.set(self._key("dedup", key), 1, nx=True, ex=ttl))
+
+    async def release(self, key: str):
+        await self._redis.delete(self._key("dedup", key))
+
+    async def _push(self, shard_id: int, entry: dict):
+        payload = json.dumps(entry, ensure_ascii=False)
+        await self._redis.rpush(self._key("notify", shard_id), payload.encode("utf-8"))
+
+    async def receive(self, timeout: float = 1.0):
+        reply = await self._redis.blpop([self._key("notify", self.shard_id)], timeout=max(1, int(timeout)))
+        if reply is None:
+            return None
+        return json.loads(reply[1])
+
+    async def publish_channels(self, channel_ids):
+        channel_ids = list(channel_ids)
+        for start in range(0, len(channel_ids), 1000):
+            mapping = {channel_id: self.shard_id for channel_id in channel_ids[start:start + 1000]}
+            await self._redis.hset(self._key("channels"), mapping=mapping)
+        expires_at = time.monotonic() + CHANNEL_OWNER_TTL
+        self._owners.update((channel_id, (expires_at, self.shard_id)) for channel_id in channel_ids)
+
+    async def channel_owner(self, channel_id: int):
+        cached = self._owners.get(channel_id)
+        if cached is not None and cached[0] >= time.monotonic():
+            return cached[1]
+        owner = await self._redis.hget(self._key("channels"), channel_id)
+        owner = int(owner) if owner is not None else None
+        ttl = CHANNEL_OWNER_TTL if owner is not None else UNKNOWN_OWNER_TTL
+        self._owners[channel_id] = (time.monotonic() + ttl, owner)
+        return owner
+
+    def broadcast(self, message: dict):
+        if self._loop is None or self._outbox is None:
+            return
+        payload = json.dumps({"origin": self.replica_id, "message": message}, ensure_ascii=False).encode("utf-8")
+        self._loop.call_soon_threadsafe(self._offer, payload)
+
+    def _offer(self, payload: bytes):
+        try:
+            self._outbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            print("Advertencia: demasiados eventos pendientes de difundir a las otras réplicas; se descarta uno.")
+
+    async def _publish_loop(self):
+        while True:
+            payload = await self._outbox.get()
+            try:
+                await self._redis.publish(self._key("events"), payload)
+            except Exception as e:
+                print(f"Error al difundir un evento a las otras réplicas: {e}")
+            finally:
+                self._outbox.task_done()
+
+    async def _listen_loop(self):
+        """Aplica las difusiones de las demás réplicas; si se pierde la conexión, se vuelve a suscribir."""
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self._key("events"))
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    envelope = json.loads(message["data"])
+                    if envelope.get("origin") != self.replica_id and self.on_broadcast:
+                        try:
+                            self.on_broadcast(envelope["message"])
+                        except Exception as e:
+                            print(f"Error al aplicar un evento de otra réplica: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error en la suscripción a eventos de otras réplicas: {e}. Reintentando en 1s...")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+
+def create_state_backend() -> StateBackend:
+    """Backend configurado con `STATE_BACKEND`."""
+    if STATE_BACKEND == "redis":
+        return RedisStateBackend()
+    return MemoryStateBackend()
+
+
+state = create_state_backend()
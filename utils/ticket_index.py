@@ -0,0 +1,283 @@
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime
+
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+from utils.pagination import SEARCH_URL, JqlSearchError
+
+TICKET_INDEX_ENABLED = os.getenv("TICKET_INDEX_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+TICKET_INDEX_JQL = os.getenv("TICKET_INDEX_JQL", "").strip()
+
+try:
+    TICKET_INDEX_RECONCILE_INTERVAL = float(os.getenv("TICKET_INDEX_RECONCILE_INTERVAL", "900"))
+    TICKET_INDEX_PAGE_SIZE = int(os.getenv("TICKET_INDEX_PAGE_SIZE", "100"))
+except ValueError:
+    print("Error: TICKET_INDEX_RECONCILE_INTERVAL/TICKET_INDEX_PAGE_SIZE no son números válidos. Usando 900 segundos y 100.")
+    TICKET_INDEX_RECONCILE_INTERVAL = 900.0
+    TICKET_INDEX_PAGE_SIZE = 100
+
+# Campos que el índice necesita de cada issue.
+INDEX_FIELDS = ("summary", "status", "assignee", "updated")
+# Eventos que cambian el índice. Los de comentarios traen un issue recortado (sin `updated`)
+# y no cambian asignado ni estado, así que se ignoran.
+INDEX_EVENTS = ("issue_created", "issue_updated", "issue_deleted")
+# Segundos mínimos entre dos sincronizaciones forzadas por webhooks incompletos.
+MIN_RESYNC_INTERVAL = 60.0
+
+
+def _parse_updated(value) -> float:
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _assignee_id(assignee: dict):
+    return assignee.get("accountId") or assignee.get("name") or assignee.get("displayName")
+
+
+class TicketIndex:
+    """
+    Índice en memoria asignado → estado → issues, para responder a los comandos de listado
+    sin consultar Jira. Se llena con una sincronización JQL paginada al arrancar, se mantiene
+    al día con los webhooks de issues y se reconcilia periódicamente con Jira.
+
+    Mientras no ha terminado la primera sincronización, o si la última es demasiado antigua,
+    `lookup` devuelve None y los comandos consultan a Jira como siempre. También lo hace
+    si el usuario no aparece en el índice, para que Jira valide el nombre.
+    """
+
+    def __init__(self, reconcile_interval: float = TICKET_INDEX_RECONCILE_INTERVAL,
+                 page_size: int = TICKET_INDEX_PAGE_SIZE, min_resync_interval: float = MIN_RESYNC_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self.min_resync_interval = min_resync_interval
+        self.page_size = page_size
+        # Sin reconciliar durante dos intervalos seguidos, el índice se considera caducado.
+        self.max_age = reconcile_interval * 2
+        self._issues = {}
+        self._by_assignee = {}
+        self._aliases = {}
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._syncing = False
+        self._changed_during_sync = {}
+        self._statuses = None
+        self._loop = None
+        self._resync = None
+        self._task = None
+        self.stats = {"syncs": 0, "sync_errors": 0, "webhook_updates": 0, "resync_requests": 0, "hits": 0, "misses": 0}
+        CACHE_HITS.labels("ticket_index").set_function(lambda: self.stats["hits"])
+        CACHE_MISSES.labels("ticket_index").set_function(lambda: self.stats["misses"])
+
+    def start(self, jira_client, jql: str, statuses=None):
+        """
+        Arranca la sincronización inicial y la reconciliación periódica en el loop actual.
+        `statuses` son los estados que filtra `jql` (con asignado): los webhooks solo añaden issues
+        en esos estados y quitan los que salen de ellos. Sin `statuses` (JQL personalizada, cuyo
+        alcance no se puede evaluar en local) los webhooks solo actualizan issues ya indexados.
+        """
+        if self._task:
+            return
+        self._statuses = {status.casefold() for status in statuses} if statuses is not None else None
+        self._loop = asyncio.get_running_loop()
+        self._resync = asyncio.Event()
+        self._task = asyncio.create_task(self._run(jira_client, jql))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_ready(self) -> bool:
+        return self._synced_at is not None and time.monotonic() - self._synced_at <= self.max_age
+
+    def __len__(self) -> int:
+        return len(self._issues)
+
+    async def _run(self, jira_client, jql: str):
+        while True:
+            started = time.monotonic()
+            try:
+                count = await self.sync(jira_client, jql)
+                print(f"Índice de tickets sincronizado ({count} issues).")
+            except Exception as e:
+                self.stats["sync_errors"] += 1
+                print(f"Error al sincronizar el índice de tickets: {e}")
+
+            self._resync.clear()
+            try:
+                await asyncio.wait_for(self._resync.wait(), self.reconcile_interval)
+            except asyncio.TimeoutError:
+                continue
+            # Sincronización pedida por un webhook incompleto: como mucho una cada
+            # `min_resync_interval` segundos; las peticiones de mientras se atienden juntas.
+            await asyncio.sleep(max(0.0, started + self.min_resync_interval - time.monotonic()))
+
+    async def sync(self, jira_client, jql: str) -> int:
+        """
+        Descarga todos los issues de `jql` página a página y sustituye el índice.
+        Los cambios recibidos por webhook durante la descarga se conservan si son más recientes.
+        """
+        with self._lock:
+            self._syncing = True
+            self._changed_during_sync = {}
+
+        entries = {}
+        token = None
+        try:
+            while True:
+                payload = {"jql": jql, "maxResults": self.page_size, "fields": list(INDEX_FIELDS)}
+                if token:
+                    payload["nextPageToken"] = token
+                response = await jira_client.post(SEARCH_URL, endpoint="search", json_body=payload)
+                if response.status_code != 200:
+                    raise JqlSearchError(response)
+
+                data = response.json()
+                for issue in data.get("issues", []):
+                    entry = self._entry(issue)
+                    if entry:
+                        entries[entry["key"]] = entry
+
+                token = data.get("nextPageToken")
+                if not token or data.get("isLast", False):
+                    break
+        except BaseException:
+            with self._lock:
+                self._syncing = False
+                self._changed_during_sync = {}
+            raise
+
+        with self._lock:
+            for key, entry in self._changed_during_sync.items():
+                if entry is None:
+                    entries.pop(key, None)
+                elif key in entries:
+                    if entry["updated"] >= entries[key]["updated"]:
+                        entries[key] = entry
+                elif self._statuses is not None:
+                    # Con el alcance por defecto el estado ya se comprobó al aplicar el webhook.
+                    entries[key] = entry
+            self._issues = {}
+            self._by_assignee = {}
+            self._aliases = {}
+            for entry in entries.values():
+                self._insert(entry)
+            self._syncing = False
+            self._changed_during_sync = {}
+            self._synced_at = time.monotonic()
+
+        self.stats["syncs"] += 1
+        return len(entries)
+
+    def _entry(self, issue: dict):
+        """Reduce un issue a lo que guarda el índice, o None si no tiene asignado."""
+        fields = issue.get("fields") or {}
+        assignee = fields.get("assignee")
+        key = issue.get("key")
+        if not key or not isinstance(assignee, dict) or not _assignee_id(assignee):
+            return None
+        return {
+            "key": key.upper(),
+            "summary": fields.get("summary"),
+            "status": (fields.get("status") or {}).get("name", ""),
+            "assignee": _assignee_id(assignee),
+            "display_name": assignee.get("displayName"),
+            "updated": _parse_updated(fields.get("updated")),
+        }
+
+    def _insert(self, entry: dict):
+        self._issues[entry["key"]] = entry
+        statuses = self._by_assignee.setdefault(entry["assignee"], {})
+        statuses.setdefault(entry["status"].casefold(), {})[entry["key"]] = entry
+        self._aliases[entry["assignee"].casefold()] = entry["assignee"]
+        if entry["display_name"]:
+            self._aliases[entry["display_name"].casefold()] = entry["assignee"]
+
+    def _remove(self, key: str):
+        entry = self._issues.pop(key, None)
+        if entry is None:
+            return
+        statuses = self._by_assignee.get(entry["assignee"], {})
+        bucket = statuses.get(entry["status"].casefold(), {})
+        bucket.pop(key, None)
+        if not bucket:
+            statuses.pop(entry["status"].casefold(), None)
+
+    def update_from_webhook(self, event_type: str, issue: dict):
+        """
+        Aplica un webhook de issue sin salirse del alcance de la JQL del índice (ver `start`).
+        Solo cuentan los eventos de `INDEX_EVENTS`. Si uno no trae los campos necesarios, pide
+        adelantar la reconciliación (limitada a una cada `min_resync_interval` segundos).
+        """
+        if self._loop is None or not any(name in (event_type or "") for name in INDEX_EVENTS):
+            return
+        key = (issue.get("key") or "").upper()
+        if not key:
+            return
+
+        fields = issue.get("fields") or {}
+        if "issue_deleted" in (event_type or ""):
+            entry = None
+        elif all(name in fields for name in INDEX_FIELDS):
+            entry = self._entry(issue)
+        else:
+            self.stats["resync_requests"] += 1
+            self._loop.call_soon_threadsafe(self._resync.set)
+            return
+
+        with self._lock:
+            current = self._issues.get(key)
+            if entry is not None:
+                if current is not None and entry["updated"] < current["updated"]:
+                    return
+                if self._statuses is None:
+                    if current is None:
+                        # Fuera del índice y sin forma de saber si cumple la JQL: lo decide la próxima sincronización.
+                        return
+                elif entry["status"].casefold() not in self._statuses:
+                    entry = None
+            elif current is None and not self._syncing:
+                return
+            self._remove(key)
+            if entry is not None:
+                self._insert(entry)
+            if self._syncing:
+                self._changed_during_sync[key] = entry
+        self.stats["webhook_updates"] += 1
+
+    def lookup(self, user: str, statuses) -> list:
+        """
+        Issues del usuario (nombre visible o id) en los estados dados, del más reciente al más
+        antiguo y con la misma forma que los resultados de JQL. None si hay que preguntar a Jira.
+        """
+        if not self.is_ready():
+            self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            assignee = self._aliases.get(user.strip().casefold())
+            if assignee is None:
+                self.stats["misses"] += 1
+                return None
+            by_status = self._by_assignee.get(assignee, {})
+            entries = [
+                entry for status in statuses
+                for entry in by_status.get(status.casefold(), {}).values()
+            ]
+
+        self.stats["hits"] += 1
+        entries.sort(key=lambda entry: entry["updated"], reverse=True)
+        return [
+            {"key": entry["key"], "fields": {"summary": entry["summary"], "status": {"name": entry["status"]}}}
+            for entry in entries
+        ]
+
+
+ticket_index = TicketIndex()
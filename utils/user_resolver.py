@@ -0,0 +1,102 @@
+import os
+import re
+import httpx
+
+from utils.cache import TTLCache
+
+USER_SEARCH_URL = "/rest/api/3/user/search"
+
+try:
+    USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "1000"))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "86400"))
+except ValueError:
+    print("Error: USER_CACHE_MAXSIZE/USER_CACHE_TTL no son números válidos. Usando 1000 usuarios y 86400 segundos.")
+    USER_CACHE_MAXSIZE = 1000
+    USER_CACHE_TTL = 86400.0
+
+# Los nombres que Jira no encuentra (o que son ambiguos) se recuerdan menos tiempo.
+UNRESOLVED_TTL = 300.0
+# Formatos de accountId de Jira Cloud: 24 hexadecimales o `557058:<uuid>`.
+ACCOUNT_ID = re.compile(r"^(?:[0-9a-f]{24}|\d+:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$")
+
+# Nombre visible, email o accountId (sin distinguir mayúsculas) → accountId, o "" si no se pudo resolver.
+account_ids = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL, name="account")
+
+
+def remember_account(user):
+    """
+    Guarda el accountId de un usuario de Jira (dict de un webhook o de una respuesta de la API).
+    El nombre visible no es único: solo se guarda mientras corresponda a un único accountId. Si
+    aparece otro con el mismo nombre, queda sin resolver (""), como cuando la búsqueda de Jira es
+    ambigua, y los comandos buscan por nombre.
+    """
+    if not isinstance(user, dict) or not user.get("accountId"):
+        return
+    account_id = user["accountId"]
+    display_name = user.get("displayName")
+    if display_name:
+        key = display_name.casefold()
+        cached = account_ids.peek(key)
+        if cached is None or cached == account_id:
+            account_ids.set(key, account_id)
+        elif cached:
+            account_ids.set(key, "")
+    for name in (user.get("emailAddress"), account_id):
+        if name:
+            account_ids.set(name.casefold(), account_id)
+
+
+def remember_issue_accounts(issue: dict, actor: dict = None):
+    """Aprende los accountId de las personas de un issue (asignado, creador, informador) y del autor del evento."""
+    fields = issue.get("fields") or {}
+    for name in ("assignee", "creator", "reporter"):
+        remember_account(fields.get(name))
+    remember_account(actor)
+
+
+def _pick_account(usuario: str, users: list):
+    """accountId del resultado que coincide exactamente (nombre o email), o del único resultado; None si es ambiguo."""
+    wanted = usuario.casefold()
+    exact = {
+        user["accountId"] for user in users
+        if user.get("accountId") and wanted in ((user.get("displayName") or "").casefold(),
+                                                (user.get("emailAddress") or "").casefold())
+    }
+    if len(exact) == 1:
+        return exact.pop()
+    if not exact and len(users) == 1 and users[0].get("accountId"):
+        return users[0]["accountId"]
+    return None
+
+
+async def resolve_account_id(jira_client, usuario: str):
+    """
+    accountId del usuario escrito en un comando (nombre visible, email o el propio accountId), o None
+    si Jira no lo encuentra o hay varios candidatos (entonces se busca por nombre como antes).
+    Se consulta `/rest/api/3/user/search` una sola vez por nombre; los webhooks precargan la caché.
+    """
+    usuario = usuario.strip()
+    if ACCOUNT_ID.match(usuario):
+        return usuario
+    cached = account_ids.get(usuario.casefold())
+    if cached is not None:
+        return cached or None
+
+    try:
+        response = await jira_client.get(USER_SEARCH_URL, params={"query": usuario, "maxResults": 10})
+    except httpx.RequestError as e:
+        print(f"Error de HTTPX al buscar el usuario '{usuario}' en Jira: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"Jira respondió {response.status_code} al buscar el usuario '{usuario}'.")
+        return None
+
+    users = response.json()
+    for user in users:
+        remember_account(user)
+    account_id = _pick_account(usuario, users)
+    if account_id is None:
+        account_ids.set(usuario.casefold(), "", ttl=UNRESOLVED_TTL)
+    else:
+        account_ids.set(usuario.casefold(), account_id)
+    return account_id
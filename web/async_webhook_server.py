@@ -0,0 +1,92 @@
+import time
+import asyncio
+from aiohttp import web
+import discord
+
+from utils.metrics import CONTENT_TYPE, render_metrics
+from web.webhook_server import WEBHOOK_SHUTDOWN_TIMEOUT, ingest_jira_webhook, record_webhook, webhook_dedup_key
+
+
+def create_async_webhook_app(bot: discord.Client, dispatcher, journal=None) -> web.Application:
+    """
+    Crea la aplicación aiohttp que atiende `/webhook` en el mismo event loop del bot.
+    Expone el mismo contrato que la versión Flask, pero sin hilos ni `run_coroutine_threadsafe`.
+    """
+    app = web.Application()
+    app["bot_client"] = bot
+    app["dispatcher"] = dispatcher
+    app["journal"] = journal
+
+    async def jira_webhook(request: web.Request) -> web.Response:
+        """Endpoint para recibir webhooks de Jira."""
+        received_at = time.perf_counter()
+        dedup_key = None
+        try:
+            print("✅ Webhook recibido desde Jira")
+            raw_body = await request.read()
+
+            body, status_code, notifications, data = ingest_jira_webhook(raw_body)
+            for notification in notifications:
+                notification.received_at = received_at
+
+            if notifications:
+                key = webhook_dedup_key(data, request.headers)
+                # Otra réplica (o esta misma) ya recibió esta entrega.
+                if not await app["dispatcher"].state.claim(key):
+                    record_webhook("duplicate", received_at)
+                    return web.json_response({"status": "ignored", "reason": "Duplicate delivery"})
+                dedup_key = key
+
+            if notifications and app["journal"]:
+                journal_id = await asyncio.wait_for(
+                    asyncio.wrap_future(app["journal"].append(dedup_key, raw_body.decode("utf-8"))),
+                    app["journal"].write_timeout
+                )
+                if journal_id is None:
+                    record_webhook("duplicate", received_at)
+                    return web.json_response({"status": "ignored", "reason": "Duplicate delivery"})
+                for notification in notifications:
+                    notification.journal_id = journal_id
+                # El evento ya está en disco: si la cola está llena, lo reintentará el consumidor del journal.
+                app["dispatcher"].enqueue(notifications)
+            elif notifications and not app["dispatcher"].enqueue(notifications):
+                # Jira reintentará la entrega: no debe contar como duplicada.
+                await app["dispatcher"].state.release(dedup_key)
+                record_webhook("queue_full", received_at)
+                return web.json_response({"status": "error", "message": "Notification queue full"}, status=503)
+
+            record_webhook("success" if notifications else "ignored", received_at)
+            return web.json_response(body, status=status_code)
+
+        except Exception as e:
+            print(f"Error fatal al procesar el webhook: {e}")
+            if dedup_key:
+                try:
+                    await app["dispatcher"].state.release(dedup_key)
+                except Exception:
+                    pass
+            record_webhook("error", received_at)
+            return web.json_response({"status": "error", "message": str(e)}, status=500)
+
+    async def metrics(request: web.Request) -> web.Response:
+        """Métricas del bot en formato Prometheus."""
+        return web.Response(body=render_metrics(), headers={"Content-Type": CONTENT_TYPE})
+
+    app.router.add_post("/webhook", jira_webhook)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start_async_webhook_server(bot: discord.Client, dispatcher, host: str, port: int,
+                                     journal=None) -> web.AppRunner:
+    """
+    Arranca el servidor aiohttp en el loop actual y devuelve el runner para poder cerrarlo.
+    `runner.cleanup()` deja de aceptar conexiones y espera a las peticiones en curso
+    hasta WEBHOOK_SHUTDOWN_TIMEOUT.
+    """
+    runner = web.AppRunner(create_async_webhook_app(bot, dispatcher, journal), access_log=None,
+                           shutdown_timeout=WEBHOOK_SHUTDOWN_TIMEOUT)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+    return runner
@@ -0,0 +1,158 @@
+import os
+from collections import OrderedDict
+import discord
+
+from web.notification_templates import EMBED_DESCRIPTION_LIMIT, JIRA_BASE_URL, LOCALES, NOTIFY_LOCALE
+
+try:
+    NOTIFY_DIGEST_MINUTES = float(os.getenv("NOTIFY_DIGEST_MINUTES", "0"))
+    NOTIFY_DIGEST_MAX_TICKETS = int(os.getenv("NOTIFY_DIGEST_MAX_TICKETS", "200"))
+except ValueError:
+    print("Error: NOTIFY_DIGEST_MINUTES/NOTIFY_DIGEST_MAX_TICKETS no son números válidos. Resumen desactivado.")
+    NOTIFY_DIGEST_MINUTES = 0.0
+    NOTIFY_DIGEST_MAX_TICKETS = 200
+
+DIGEST_COLOR = 0x34495E
+# Longitud máxima de cada valor de un campo guardado en el resumen.
+DIGEST_VALUE_LENGTH = 80
+# Campos cuyo último valor se muestra en la línea del ticket, con su prefijo.
+DIGEST_FIELDS = (("assignee", "👤 "), ("priority", "⚠️ "), ("summary", "📋 "))
+COUNTED_EVENTS = {"commented": "comments", "attachment_added": "attachments", "created": None, "deleted": None}
+
+
+def _clip(value) -> str:
+    value = "" if value is None else str(value)
+    return value if len(value) <= DIGEST_VALUE_LENGTH else value[:DIGEST_VALUE_LENGTH - 1] + "…"
+
+
+class TicketDigest:
+    """
+    Agregado de los eventos de un ticket durante un periodo: cuántos hubo de cada tipo y, por
+    campo, el primer valor anterior y el último valor nuevo. Aparte de los ids del journal y las
+    confirmaciones de reenvío de los eventos que resume (para cerrarlos al enviarlo), su tamaño no
+    depende del número de eventos.
+    """
+
+    __slots__ = ("ticket_key", "counts", "changes", "events", "journal_ids", "acks")
+
+    def __init__(self, ticket_key: str):
+        self.ticket_key = ticket_key
+        self.counts = {}
+        self.changes = {}
+        self.events = 0
+        self.journal_ids = []
+        self.acks = []
+
+    def add(self, notification):
+        self.events += 1
+        if notification.journal_id is not None:
+            self.journal_ids.append(notification.journal_id)
+        if notification.ack is not None:
+            self.acks.append(notification.ack)
+        self.counts[notification.event_type] = self.counts.get(notification.event_type, 0) + 1
+        if notification.field and notification.change:
+            previous = self.changes.get(notification.field)
+            from_value = previous[0] if previous else _clip(notification.change[0])
+            self.changes[notification.field] = (from_value, _clip(notification.change[1]))
+
+
+class DigestAggregator:
+    """
+    Acumula las notificaciones por canal y ticket hasta el siguiente resumen. Con `max_tickets`
+    tickets acumulados (entre todos los canales) `add` pide adelantar el envío, así que la memoria
+    queda acotada aunque lleguen miles de eventos.
+    """
+
+    def __init__(self, max_tickets: int = NOTIFY_DIGEST_MAX_TICKETS):
+        self.max_tickets = max_tickets
+        self.channels = {}
+        self.tickets = 0
+
+    def add(self, channel_id: int, notification) -> bool:
+        """Añade una notificación al resumen del canal. Devuelve True si conviene enviarlo ya."""
+        tickets = self.channels.setdefault(channel_id, OrderedDict())
+        digest = tickets.get(notification.ticket_key)
+        if digest is None:
+            digest = tickets[notification.ticket_key] = TicketDigest(notification.ticket_key)
+            self.tickets += 1
+        else:
+            tickets.move_to_end(notification.ticket_key)
+        digest.add(notification)
+        return self.tickets >= self.max_tickets
+
+    def take(self) -> dict:
+        """Devuelve lo acumulado (canal → tickets en orden de última actividad) y vacía el agregador."""
+        channels, self.channels, self.tickets = self.channels, {}, 0
+        return channels
+
+    def __len__(self) -> int:
+        return self.tickets
+
+
+class DigestRenderer:
+    """Convierte los tickets acumulados de un canal en embeds de resumen, una línea por ticket."""
+
+    def __init__(self, locale: str = NOTIFY_LOCALE, base_url: str = JIRA_BASE_URL):
+        self.strings = LOCALES[locale]["digest"]
+        self.base_url = f"{base_url}/browse/" if base_url else None
+
+    def _count(self, count: int, name: str) -> str:
+        singular, plural = self.strings[name]
+        return f"{count} {singular if count == 1 else plural}"
+
+    def line(self, digest: TicketDigest) -> str:
+        """Ej.: `ABC-12: En curso → QA · 👤 Luis (3 cambios, 2 comentarios)`."""
+        key = digest.ticket_key
+        parts = []
+        if "created" in digest.counts:
+            parts.append(self.strings["created"])
+        if "status" in digest.changes:
+            from_value, to_value = digest.changes["status"]
+            parts.append(f"{from_value} → {to_value}")
+        for field, prefix in DIGEST_FIELDS:
+            if field in digest.changes:
+                parts.append(prefix + digest.changes[field][1])
+        if "deleted" in digest.counts:
+            parts.append(self.strings["deleted"])
+
+        changes = sum(count for event, count in digest.counts.items() if event not in COUNTED_EVENTS)
+        counters = [self._count(changes, "changes")] if changes else []
+        for event, name in COUNTED_EVENTS.items():
+            if name and digest.counts.get(event):
+                counters.append(self._count(digest.counts[event], name))
+
+        link = f"[{key}]({self.base_url}{key})" if self.base_url else f"**{key}**"
+        text = f"{link}: {' · '.join(parts)}" if parts else link
+        return f"{text} ({', '.join(counters)})" if counters else text
+
+    def render(self, tickets: OrderedDict) -> list:
+        """Embeds del resumen de un canal (los tickets con actividad más reciente primero)."""
+        digests = list(reversed(tickets.values()))
+        footer = self.strings["footer"].format(events=sum(d.events for d in digests), tickets=len(digests))
+        embeds = []
+        current = []
+        length = 0
+        for digest in digests:
+            line = self.line(digest)[:EMBED_DESCRIPTION_LIMIT]
+            if current and length + 1 + len(line) > EMBED_DESCRIPTION_LIMIT:
+                embeds.append(current)
+                current, length = [], 0
+            current.append(line)
+            length += len(line) + 1
+        if current:
+            embeds.append(current)
+
+        result = []
+        for index, lines in enumerate(embeds):
+            embed = discord.Embed(
+                title=self.strings["title"] if index == 0 else None,
+                description="\n".join(lines),
+                color=DIGEST_COLOR
+            )
+            if index == len(embeds) - 1:
+                embed.set_footer(text=footer)
+            result.append(embed)
+        return result
+
+
+digest_renderer = DigestRenderer()
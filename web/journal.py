@@ -0,0 +1,365 @@
+import os
+import time
+import queue
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from utils.metrics import QUEUE_DEPTH
+from web.webhook_parsing import loads
+from web.webhook_server import process_jira_webhook
+
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "").strip()
+JOURNAL_SYNCHRONOUS = os.getenv("JOURNAL_SYNCHRONOUS", "FULL").strip().upper()
+if JOURNAL_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    print(f"Advertencia: JOURNAL_SYNCHRONOUS '{JOURNAL_SYNCHRONOUS}' no es válido. Usando FULL.")
+    JOURNAL_SYNCHRONOUS = "FULL"
+
+try:
+    JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "256"))
+    JOURNAL_RETRY_INTERVAL = float(os.getenv("JOURNAL_RETRY_INTERVAL", "30"))
+    JOURNAL_MAX_ATTEMPTS = int(os.getenv("JOURNAL_MAX_ATTEMPTS", "20"))
+    JOURNAL_RETENTION_HOURS = float(os.getenv("JOURNAL_RETENTION_HOURS", "72"))
+except ValueError:
+    print("Error: la configuración JOURNAL_* no es válida. Usando valores por defecto.")
+    JOURNAL_BATCH_SIZE = 256
+    JOURNAL_RETRY_INTERVAL = 30.0
+    JOURNAL_MAX_ATTEMPTS = 20
+    JOURNAL_RETENTION_HOURS = 72.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL UNIQUE,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_webhook_events_pending
+    ON webhook_events (delivered_at, id);
+"""
+
+
+class WebhookJournal:
+    """
+    Registro de webhooks en SQLite (modo WAL), escrito antes de responder a Jira.
+    Todas las escrituras pasan por un único hilo que las agrupa en transacciones
+    (group commit): muchas peticiones concurrentes comparten un solo fsync.
+    """
+
+    def __init__(self, path: str, batch_size: int = JOURNAL_BATCH_SIZE,
+                 synchronous: str = JOURNAL_SYNCHRONOUS, write_timeout: float = 10.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.synchronous = synchronous
+        # Tiempo máximo que el handler del webhook espera a que su evento quede escrito en disco.
+        self.write_timeout = write_timeout
+        self._operations = queue.Queue()
+        self._writer = None
+        self.stats = {"appended": 0, "duplicates": 0, "commits": 0, "delivered": 0, "dead_letters": 0}
+        QUEUE_DEPTH.labels("journal_writes").set_function(self._operations.qsize)
+
+    def start(self):
+        """Crea el esquema y arranca el hilo escritor."""
+        if self._writer:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="webhook-journal", daemon=True)
+        self._writer.start()
+
+    def close(self, timeout: float = 5.0):
+        """Termina de escribir lo pendiente y detiene el hilo escritor."""
+        if self._writer:
+            self._operations.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        return connection
+
+    def _submit(self, operation: str, *args) -> Future:
+        future = Future()
+        if not self._writer:
+            future.set_exception(RuntimeError("El journal de webhooks no está iniciado."))
+            return future
+        self._operations.put((operation, args, future))
+        return future
+
+    def append(self, dedup_key: str, payload: str) -> Future:
+        """Registra un evento. El Future devuelve su id, o None si ya estaba registrado."""
+        return self._submit("append", dedup_key, payload, time.time())
+
+    def mark_delivered(self, event_ids: list) -> Future:
+        return self._submit("delivered", list(event_ids), time.time())
+
+    def record_attempt(self, event_ids: list) -> Future:
+        return self._submit("attempt", list(event_ids))
+
+    def purge(self, older_than: float, max_attempts: int) -> Future:
+        """
+        Borra los eventos entregados antes de `older_than` (epoch) y los que, recibidos antes
+        de `older_than`, agotaron sus `max_attempts` reintentos sin entregarse (dead letters).
+        El Future devuelve (entregados borrados, dead letters borrados).
+        """
+        return self._submit("purge", older_than, max_attempts)
+
+    def fetch(self, pending_only: bool = True, since: float = None, received_before: float = None,
+              max_attempts: int = None, after_id: int = 0, limit: int = 100) -> list:
+        """
+        Lee eventos en orden de llegada como lista de (id, payload). Usa su propia conexión,
+        por lo que puede llamarse desde cualquier hilo (WAL permite leer mientras se escribe).
+        """
+        clauses = ["id > ?"]
+        params = [after_id]
+        if pending_only:
+            clauses.append("delivered_at IS NULL")
+        if since is not None:
+            clauses.append("received_at >= ?")
+            params.append(since)
+        if received_before is not None:
+            clauses.append("received_at < ?")
+            params.append(received_before)
+        if max_attempts is not None:
+            clauses.append("attempts < ?")
+            params.append(max_attempts)
+        params.append(limit)
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            return connection.execute(
+                f"SELECT id, payload FROM webhook_events WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+                params
+            ).fetchall()
+        finally:
+            connection.close()
+
+    def _write_loop(self):
+        connection = self._connect()
+        try:
+            while True:
+                first = self._operations.get()
+                if first is None:
+                    return
+
+                batch = [first]
+                stop = False
+                while len(batch) < self.batch_size:
+                    try:
+                        operation = self._operations.get_nowait()
+                    except queue.Empty:
+                        break
+                    if operation is None:
+                        stop = True
+                        break
+                    batch.append(operation)
+
+                self._write_batch(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: list):
+        """Aplica un lote de operaciones en una sola transacción y resuelve sus Futures."""
+        results = []
+        try:
+            with connection:
+                for operation, args, _ in batch:
+                    results.append(self._apply(connection, operation, args))
+        except Exception as e:
+            print(f"Error al escribir en el journal de webhooks: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats["commits"] += 1
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _apply(self, connection: sqlite3.Connection, operation: str, args: tuple):
+        if operation == "append":
+            dedup_key, payload, received_at = args
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO webhook_events (dedup_key, received_at, payload) VALUES (?, ?, ?)",
+                (dedup_key, received_at, payload)
+            )
+            if cursor.rowcount:
+                self.stats["appended"] += 1
+                return cursor.lastrowid
+            self.stats["duplicates"] += 1
+            return None
+
+        if operation == "delivered":
+            event_ids, delivered_at = args
+            connection.executemany(
+                "UPDATE webhook_events SET delivered_at = ? WHERE id = ? AND delivered_at IS NULL",
+                [(delivered_at, event_id) for event_id in event_ids]
+            )
+            self.stats["delivered"] += len(event_ids)
+            return None
+
+        if operation == "attempt":
+            connection.executemany(
+                "UPDATE webhook_events SET attempts = attempts + 1 WHERE id = ?",
+                [(event_id,) for event_id in args[0]]
+            )
+            return None
+
+        if operation == "purge":
+            older_than, max_attempts = args
+            delivered = connection.execute(
+                "DELETE FROM webhook_events WHERE delivered_at IS NOT NULL AND delivered_at < ?", (older_than,)
+            ).rowcount
+            dead = connection.execute(
+                "DELETE FROM webhook_events WHERE delivered_at IS NULL AND attempts >= ? AND received_at < ?",
+                (max_attempts, older_than)
+            ).rowcount
+            self.stats["dead_letters"] += dead
+            return delivered, dead
+
+        raise ValueError(f"Operación de journal desconocida: {operation}")
+
+
+class JournalConsumer:
+    """
+    Lleva los eventos del journal a Discord con entrega al menos una vez.
+    Cuenta las notificaciones pendientes de cada evento y lo marca como entregado cuando
+    todas se han enviado. Periódicamente reencola los eventos que siguen pendientes
+    (p. ej. porque Discord estaba desconectado o el proceso se reinició).
+    """
+
+    def __init__(self, journal: WebhookJournal, dispatcher, retry_interval: float = JOURNAL_RETRY_INTERVAL,
+                 max_attempts: int = JOURNAL_MAX_ATTEMPTS, retention_hours: float = JOURNAL_RETENTION_HOURS):
+        self.journal = journal
+        self.dispatcher = dispatcher
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.retention_hours = retention_hours
+        self._pending = {}
+        self._failed = set()
+        self._task = None
+        QUEUE_DEPTH.labels("journal_in_flight").set_function(lambda: len(self._pending))
+
+    async def start(self):
+        """Se registra en el dispatcher y arranca el bucle de reintentos."""
+        self.dispatcher.listener = self
+        if not self._task:
+            self._task = asyncio.create_task(self._retry_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notifications_enqueued(self, notifications: list):
+        for notification in notifications:
+            if notification.journal_id is not None:
+                self.event_pending(notification.journal_id)
+
+    def notification_done(self, notification, delivered: bool):
+        self.event_done(notification.journal_id, delivered)
+
+    def event_pending(self, event_id: int):
+        """Anota una entrega más pendiente del evento (p. ej. la de un resumen aún sin enviar)."""
+        self._pending[event_id] = self._pending.get(event_id, 0) + 1
+
+    def event_done(self, event_id: int, delivered: bool):
+        """Cierra una entrega del evento; al cerrar la última, lo marca entregado si ninguna falló."""
+        if event_id is None or event_id not in self._pending:
+            return
+
+        if not delivered:
+            self._failed.add(event_id)
+
+        self._pending[event_id] -= 1
+        if self._pending[event_id] > 0:
+            return
+
+        del self._pending[event_id]
+        if event_id in self._failed:
+            self._failed.discard(event_id)
+        else:
+            self.journal.mark_delivered([event_id])
+
+    async def _retry_loop(self):
+        await self.dispatcher.bot.wait_until_ready()
+        while True:
+            try:
+                await self.redeliver_pending()
+                if self.retention_hours > 0:
+                    await self.purge()
+            except Exception as e:
+                print(f"Error al reintentar eventos del journal: {e}")
+            await asyncio.sleep(self.retry_interval)
+
+    async def purge(self):
+        """
+        Aplica la retención: borra los eventos entregados hace más de `retention_hours` y los que
+        agotaron sus reintentos (dead letters) en ese tiempo, para que la pasada de reintentos
+        no los vuelva a leer indefinidamente. Los dead letters borrados se avisan en el log.
+        """
+        _, dead = await asyncio.wrap_future(
+            self.journal.purge(time.time() - self.retention_hours * 3600, self.max_attempts)
+        )
+        if dead:
+            print(f"Advertencia: se descartan {dead} eventos del journal que agotaron sus "
+                  f"{self.max_attempts} reintentos sin llegar a Discord.")
+
+    async def redeliver_pending(self) -> int:
+        """Reencola los eventos pendientes que no están ya en vuelo."""
+        return await self._requeue(
+            pending_only=True,
+            received_before=time.time() - self.retry_interval,
+            max_attempts=self.max_attempts
+        )
+
+    async def replay(self, since: float) -> int:
+        """Reenvía todos los eventos recibidos desde `since` (epoch), entregados o no."""
+        return await self._requeue(pending_only=False, since=since)
+
+    async def _requeue(self, **filters) -> int:
+        requeued = 0
+        after_id = 0
+        while True:
+            rows = await asyncio.to_thread(self.journal.fetch, after_id=after_id, **filters)
+            if not rows:
+                return requeued
+
+            for event_id, payload in rows:
+                after_id = event_id
+                if event_id in self._pending:
+                    continue
+
+                try:
+                    _, _, notifications = process_jira_webhook(loads(payload), update_caches=False)
+                except Exception as e:
+                    print(f"Error al reprocesar el evento {event_id} del journal: {e}")
+                    notifications = []
+
+                if not notifications:
+                    self.journal.mark_delivered([event_id])
+                    continue
+
+                for notification in notifications:
+                    notification.journal_id = event_id
+                if not self.dispatcher.enqueue(notifications):
+                    # Cola llena: se reintentará en la siguiente pasada.
+                    return requeued
+                self.journal.record_attempt([event_id])
+                requeued += 1
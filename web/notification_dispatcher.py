@@ -0,0 +1,515 @@
+import os
+import uuid
+import asyncio
+import time
+from dataclasses import asdict
+import discord
+
+from utils.metrics import QUEUE_DEPTH, FunctionCounter, Histogram
+from utils.state import state as shared_state
+from web.digest import NOTIFY_DIGEST_MAX_TICKETS, NOTIFY_DIGEST_MINUTES, DigestAggregator, digest_renderer
+from web.notification_templates import NOTIFY_FORMAT, templates
+from web.webhook_server import DISCORD_CHANNEL_ID, Notification
+
+DISCORD_MESSAGE_LIMIT = 2000
+# Un mensaje admite hasta 10 embeds y 6000 caracteres entre todos ellos.
+DISCORD_EMBEDS_PER_MESSAGE = 10
+DISCORD_EMBEDS_TOTAL_LIMIT = 6000
+
+NOTIFY_EVENTS = FunctionCounter(
+    "notify_events_total", "Notificaciones encoladas, descartadas, agrupadas y mensajes enviados a Discord.", ("event",)
+)
+DISCORD_SEND_SECONDS = Histogram(
+    "discord_send_seconds", "Duración de cada envío a Discord (incluye las esperas de rate limit de discord.py)."
+)
+WEBHOOK_DELIVERY_SECONDS = Histogram(
+    "webhook_delivery_seconds", "Tiempo desde que llega un webhook hasta que su notificación se publica en Discord."
+)
+
+# Segundos que se espera la confirmación del shard al que se reenvían notificaciones del journal
+# (más el periodo del modo resumen). Sin ella la entrega cuenta como fallida y el journal la reintenta.
+FORWARD_ACK_TIMEOUT = 120.0
+
+try:
+    NOTIFY_QUEUE_MAXSIZE = int(os.getenv("NOTIFY_QUEUE_MAXSIZE", "1000"))
+except ValueError:
+    print("Error: NOTIFY_QUEUE_MAXSIZE no es un número válido. Usando 1000.")
+    NOTIFY_QUEUE_MAXSIZE = 1000
+
+try:
+    NOTIFY_FLUSH_WINDOW = float(os.getenv("NOTIFY_FLUSH_WINDOW", "0.5"))
+except ValueError:
+    print("Error: NOTIFY_FLUSH_WINDOW no es un número válido. Usando 0.5 segundos.")
+    NOTIFY_FLUSH_WINDOW = 0.5
+
+
+class NotificationDispatcher:
+    """
+    Cola acotada de notificaciones hacia Discord.
+    Agrupa los eventos recibidos durante una ventana de tiempo por canal y ticket,
+    de modo que varios cambios del mismo ticket salen en un único mensaje.
+    Los envíos de un mismo canal se serializan (discord.py aplica el bucket de rate limit
+    de la ruta) y los de canales distintos se hacen en paralelo.
+    Con varias réplicas, las notificaciones de un canal que tiene otro shard se le reenvían
+    por el estado compartido y las que reenvían los demás se encolan aquí. Los eventos del journal
+    reenviados siguen pendientes hasta que el shard dueño confirma que los publicó (`acknowledge`),
+    así que si se cae antes el journal los vuelve a entregar.
+    En modo resumen (`digest_interval` > 0) no se publica cada evento: se acumulan por canal y
+    ticket y cada `digest_interval` segundos (o al llegar a `NOTIFY_DIGEST_MAX_TICKETS` tickets)
+    sale un único mensaje por canal con una línea por ticket.
+    """
+
+    def __init__(self, bot: discord.Client, maxsize: int = NOTIFY_QUEUE_MAXSIZE,
+                 flush_window: float = NOTIFY_FLUSH_WINDOW, router=None, message_format: str = NOTIFY_FORMAT,
+                 state=shared_state, digest_interval: float = NOTIFY_DIGEST_MINUTES * 60,
+                 digest_max_tickets: int = NOTIFY_DIGEST_MAX_TICKETS):
+        self.bot = bot
+        self.router = router
+        self.message_format = message_format
+        self.state = state
+        # Objeto opcional con `notifications_enqueued(notifications)` y
+        # `notification_done(notification, delivered)` (p. ej. el consumidor del journal), y con
+        # `event_pending(journal_id)`/`event_done(journal_id, delivered)` para las entregas que
+        # el modo resumen aplaza hasta enviar el resumen.
+        self.listener = None
+        self.maxsize = maxsize
+        self.flush_window = flush_window
+        self.queue = None
+        self._loop = None
+        self._worker = None
+        self._receiver = None
+        self._receiving = False
+        self.digest_interval = digest_interval
+        self.digest = DigestAggregator(digest_max_tickets) if digest_interval > 0 else None
+        self._digest_worker = None
+        self._digest_full = None
+        self.forward_ack_timeout = FORWARD_ACK_TIMEOUT + digest_interval
+        # Reenvíos sin confirmar: token -> (plazo, ids del journal).
+        self._awaiting_ack = {}
+        # Reenvíos recibidos aún sin publicar: token -> [shard de origen, pendientes, entregados].
+        self._owed_acks = {}
+        self._ack_tasks = set()
+        self.stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "messages_sent": 0,
+            "send_errors": 0,
+            "forwarded": 0,
+            "digested": 0,
+            "max_depth": 0,
+        }
+        QUEUE_DEPTH.labels("notifications").set_function(self.depth)
+        for event in ("enqueued", "dropped", "coalesced", "messages_sent", "send_errors", "forwarded", "digested"):
+            NOTIFY_EVENTS.labels(event).set_function(lambda event=event: self.stats[event])
+
+    async def start(self):
+        """Crea la cola en el loop actual y arranca el worker de envío."""
+        if self._worker:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker = asyncio.create_task(self._run())
+        if self.digest is not None:
+            self._digest_full = asyncio.Event()
+            self._digest_worker = asyncio.create_task(self._run_digest())
+        if self.state.sharded:
+            self._receiving = True
+            self._receiver = asyncio.create_task(self._receive_forwarded())
+
+    async def stop(self):
+        """Detiene el worker de envío."""
+        await self._stop_receiving()
+        for worker in (self._worker, self._digest_worker):
+            if worker:
+                worker.cancel()
+                try:
+                    await worker
+                except asyncio.CancelledError:
+                    pass
+        self._worker = None
+        self._digest_worker = None
+        if self._ack_tasks:
+            await asyncio.wait(self._ack_tasks, timeout=2.0)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Envía lo que queda en la cola sin esperar a la ventana de agrupación y detiene el worker.
+        Devuelve False si no dio tiempo a enviarlo todo antes de `timeout` segundos.
+        """
+        if not self._worker:
+            return True
+        await self._stop_receiving()
+        self.flush_window = 0
+        drained = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            drained = False
+            print(f"Advertencia: quedan {self.depth()} notificaciones sin enviar al detener el dispatcher.")
+        if self.digest is not None and len(self.digest):
+            # El resumen pendiente sale ya, sin esperar al siguiente periodo.
+            await self._flush_digest()
+        await self.stop()
+        return drained
+
+    def depth(self) -> int:
+        """Número de notificaciones en cola."""
+        return self.queue.qsize() if self.queue else 0
+
+    def enqueue(self, notifications: list) -> bool:
+        """
+        Encola las notificaciones de un evento sin bloquear. Debe llamarse desde el loop del bot.
+        Se encolan todas o ninguna: devuelve False (y las descarta) si no caben en la cola.
+        """
+        if self.queue is None:
+            print("Error al notificar: el dispatcher no está iniciado.")
+            self.stats["dropped"] += len(notifications)
+            return False
+
+        if self.queue.maxsize and self.queue.qsize() + len(notifications) > self.queue.maxsize:
+            self.stats["dropped"] += len(notifications)
+            print(f"Advertencia: cola de notificaciones llena, se descartan {len(notifications)} notificaciones.")
+            return False
+
+        for notification in notifications:
+            self.queue.put_nowait(notification)
+        self.stats["enqueued"] += len(notifications)
+
+        if self.listener:
+            self.listener.notifications_enqueued(notifications)
+
+        depth = self.queue.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        return True
+
+    def submit_threadsafe(self, notifications: list, timeout: float = 5.0) -> bool:
+        """Encola notificaciones desde otro hilo (p. ej. Flask/waitress)."""
+        if self._loop is None:
+            print("Error al notificar: el dispatcher no está iniciado.")
+            return False
+
+        async def _enqueue():
+            return self.enqueue(notifications)
+
+        future = asyncio.run_coroutine_threadsafe(_enqueue(), self._loop)
+        return future.result(timeout=timeout)
+
+    async def _run(self):
+        """Worker: recoge lotes durante la ventana de agrupación y los envía."""
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_window
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                print(f"Error al enviar lote de notificaciones: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _flush(self, batch: list):
+        """Agrupa el lote por canal y ticket, y envía cada canal en paralelo."""
+        by_channel = {}
+        for notification in batch:
+            for channel_id in self._channels_for(notification):
+                by_channel.setdefault(channel_id, {}).setdefault(notification.ticket_key, []).append(notification)
+
+        failed = set()
+        try:
+            await asyncio.gather(*(
+                self._send_channel(channel_id, tickets, failed) for channel_id, tickets in by_channel.items()
+            ))
+        finally:
+            for notification in batch:
+                delivered = id(notification) not in failed
+                if self.listener:
+                    self.listener.notification_done(notification, delivered)
+                if notification.ack is not None:
+                    self._ack_done(notification.ack, delivered)
+
+    async def _stop_receiving(self):
+        """Deja de recoger las notificaciones reenviadas tras terminar la espera en curso (sin perder ninguna)."""
+        if self._receiver:
+            self._receiving = False
+            try:
+                await asyncio.wait_for(self._receiver, 3.0)
+            except asyncio.TimeoutError:
+                pass
+            self._receiver = None
+
+    async def _receive_forwarded(self):
+        """
+        Encola las notificaciones que otras réplicas reenvían a los canales de este shard y aplica
+        las confirmaciones de las que este shard ha reenviado.
+        """
+        while self._receiving:
+            self._expire_acks()
+            try:
+                entry = await self.state.receive(timeout=1.0)
+            except Exception as e:
+                print(f"Error al recibir notificaciones de otras réplicas: {e}. Reintentando en 1s...")
+                await asyncio.sleep(1)
+                continue
+            if entry is None:
+                continue
+            if "acked" in entry:
+                self._acknowledged(entry["acked"], entry["delivered"])
+                continue
+
+            ack = entry.get("ack")
+            token = ack["token"] if ack else None
+            notifications = [
+                Notification(**notification, channel_id=entry["channel_id"], ack=token)
+                for notification in entry["notifications"]
+            ]
+            if token is not None:
+                self._owed_acks[token] = [ack["shard"], len(notifications), True]
+            if not self.enqueue(notifications) and token is not None:
+                for _ in notifications:
+                    self._ack_done(token, False)
+
+    def _acknowledged(self, token: str, delivered: bool):
+        """Cierra en el journal las entregas de un reenvío confirmado (o caducado, con `delivered=False`)."""
+        awaiting = self._awaiting_ack.pop(token, None)
+        if awaiting is not None and self.listener:
+            for journal_id in awaiting[1]:
+                self.listener.event_done(journal_id, delivered)
+
+    def _expire_acks(self):
+        now = time.monotonic()
+        expired = [token for token, (deadline, _) in self._awaiting_ack.items() if deadline < now]
+        if expired:
+            print(f"Advertencia: {len(expired)} reenvíos a otras réplicas sin confirmar; el journal los reintentará.")
+        for token in expired:
+            self._acknowledged(token, False)
+
+    def _ack_pending(self, token: str):
+        """Anota una entrega más pendiente de un reenvío recibido (p. ej. la de un resumen aún sin enviar)."""
+        owed = self._owed_acks.get(token)
+        if owed is not None:
+            owed[1] += 1
+
+    def _ack_done(self, token: str, delivered: bool):
+        """Cierra una entrega de un reenvío recibido; al cerrar la última, se confirma a la réplica de origen."""
+        owed = self._owed_acks.get(token)
+        if owed is None:
+            return
+        if not delivered:
+            owed[2] = False
+        owed[1] -= 1
+        if owed[1] > 0:
+            return
+        del self._owed_acks[token]
+        task = asyncio.create_task(self._acknowledge(owed[0], token, owed[2]))
+        self._ack_tasks.add(task)
+        task.add_done_callback(self._ack_tasks.discard)
+
+    async def _acknowledge(self, shard_id: int, token: str, delivered: bool):
+        try:
+            await self.state.acknowledge(shard_id, token, delivered)
+        except Exception as e:
+            # Sin confirmación, la réplica de origen da la entrega por fallida y el journal la reintenta.
+            print(f"Error al confirmar notificaciones reenviadas por el shard {shard_id}: {e}")
+
+    async def _forward(self, channel_id: int, tickets: dict, failed: set) -> bool:
+        """
+        Reenvía las notificaciones del canal al shard que lo tiene. Devuelve False si el canal
+        es de este shard (o no se sabe de quién es) y hay que enviarlo desde aquí.
+        """
+        try:
+            owner = await self.state.channel_owner(channel_id)
+        except Exception as e:
+            print(f"Error al consultar el shard del canal {channel_id}: {e}")
+            owner = None
+        if owner is None or owner == self.state.shard_id:
+            return False
+
+        notifications = [notification for group in tickets.values() for notification in group]
+        journal_ids = [n.journal_id for n in notifications if n.journal_id is not None] if self.listener else []
+        token = None
+        if journal_ids:
+            # Los eventos siguen pendientes en el journal hasta que el shard dueño confirme el envío.
+            token = uuid.uuid4().hex
+            for journal_id in journal_ids:
+                self.listener.event_pending(journal_id)
+            self._awaiting_ack[token] = (time.monotonic() + self.forward_ack_timeout, journal_ids)
+        try:
+            await self.state.forward(owner, channel_id, [serialize_notification(n) for n in notifications], ack=token)
+            self.stats["forwarded"] += len(notifications)
+        except Exception as e:
+            print(f"Error al reenviar notificaciones al shard {owner}: {e}")
+            failed.update(id(notification) for notification in notifications)
+            if token is not None:
+                self._acknowledged(token, False)
+        return True
+
+    def _channels_for(self, notification) -> tuple:
+        """Canales de destino: el fijado en la notificación, el de la tabla de enrutado o el por defecto."""
+        if notification.channel_id:
+            return (notification.channel_id,)
+        if self.router:
+            return self.router.channels_for(notification)
+        return (DISCORD_CHANNEL_ID,)
+
+    async def _send_channel(self, channel_id: int, tickets: dict, failed: set):
+        """
+        Envía, en orden, un mensaje por ticket al canal indicado.
+        Añade a `failed` el id de las notificaciones que no se pudieron entregar.
+        """
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if not channel and channel_id and self.state.sharded and await self._forward(channel_id, tickets, failed):
+            return
+        if not channel:
+            if not channel_id:
+                print("Error al notificar: DISCORD_CHANNEL_ID no es válido.")
+            else:
+                print(f"Error: No se pudo encontrar el canal con ID {channel_id}")
+            for notifications in tickets.values():
+                failed.update(id(notification) for notification in notifications)
+            return
+
+        if self.digest is not None:
+            for notifications in tickets.values():
+                for notification in notifications:
+                    # El evento del journal sigue pendiente hasta que salga el resumen que lo incluye.
+                    if self.listener and notification.journal_id is not None:
+                        self.listener.event_pending(notification.journal_id)
+                    if notification.ack is not None:
+                        self._ack_pending(notification.ack)
+                    if self.digest.add(channel_id, notification):
+                        self._digest_full.set()
+                self.stats["digested"] += len(notifications)
+            return
+
+        for notifications in tickets.values():
+            self.stats["coalesced"] += len(notifications) - 1
+            delivered = True
+            for message in self._build_messages(notifications):
+                started = time.perf_counter()
+                try:
+                    await channel.send(**message)
+                    self.stats["messages_sent"] += 1
+                except Exception as e:
+                    delivered = False
+                    self.stats["send_errors"] += 1
+                    failed.update(id(notification) for notification in notifications)
+                    print(f"Error al enviar mensaje a Discord: {e}")
+                DISCORD_SEND_SECONDS.observe(time.perf_counter() - started)
+
+            if delivered:
+                sent_at = time.perf_counter()
+                for notification in notifications:
+                    if notification.received_at is not None:
+                        WEBHOOK_DELIVERY_SECONDS.observe(sent_at - notification.received_at)
+
+    async def _run_digest(self):
+        """Worker del modo resumen: envía lo acumulado cada `digest_interval` segundos o antes si se llena."""
+        while True:
+            try:
+                await asyncio.wait_for(self._digest_full.wait(), self.digest_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._digest_full.clear()
+            try:
+                await self._flush_digest()
+            except Exception as e:
+                print(f"Error al enviar el resumen de notificaciones: {e}")
+
+    async def _flush_digest(self):
+        """Publica un resumen por canal con lo acumulado desde el anterior."""
+        channels = self.digest.take()
+        await asyncio.gather(*(
+            self._send_digest(channel_id, tickets) for channel_id, tickets in channels.items()
+        ))
+
+    async def _send_digest(self, channel_id: int, tickets):
+        """Envía el resumen de un canal y cierra las entregas del journal que incluye con el resultado real."""
+        delivered = False
+        try:
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                print(f"Error: No se pudo encontrar el canal con ID {channel_id}")
+                return
+            delivered = True
+            for message in self._pack_embeds(digest_renderer.render(tickets)):
+                started = time.perf_counter()
+                try:
+                    await channel.send(**message)
+                    self.stats["messages_sent"] += 1
+                except Exception as e:
+                    delivered = False
+                    self.stats["send_errors"] += 1
+                    print(f"Error al enviar el resumen a Discord: {e}")
+                DISCORD_SEND_SECONDS.observe(time.perf_counter() - started)
+        finally:
+            for digest in tickets.values():
+                if self.listener:
+                    for journal_id in digest.journal_ids:
+                        self.listener.event_done(journal_id, delivered)
+                for token in digest.acks:
+                    self._ack_done(token, delivered)
+
+    def _build_messages(self, notifications: list) -> list:
+        """
+        Une las notificaciones de un ticket en el menor número de mensajes posible.
+        Devuelve los argumentos de cada `channel.send`: textos de hasta 2000 caracteres
+        o, con `NOTIFY_FORMAT=embed`, grupos de hasta 10 embeds.
+        """
+        if self.message_format == "embed":
+            return self._build_embed_messages(notifications)
+
+        messages = []
+        current = ""
+        for notification in notifications:
+            text = templates.render_text(notification)[:DISCORD_MESSAGE_LIMIT]
+            if current and len(current) + 1 + len(text) > DISCORD_MESSAGE_LIMIT:
+                messages.append({"content": current})
+                current = text
+            else:
+                current = f"{current}\n{text}" if current else text
+        if current:
+            messages.append({"content": current})
+        return messages
+
+    def _build_embed_messages(self, notifications: list) -> list:
+        return self._pack_embeds([templates.render_embed(notification) for notification in notifications])
+
+    def _pack_embeds(self, embeds: list) -> list:
+        """Reparte los embeds en mensajes de hasta 10 embeds y 6000 caracteres."""
+        messages = []
+        current = []
+        length = 0
+        for embed in embeds:
+            size = len(embed)
+            if current and (len(current) == DISCORD_EMBEDS_PER_MESSAGE or length + size > DISCORD_EMBEDS_TOTAL_LIMIT):
+                messages.append({"embeds": current})
+                current = []
+                length = 0
+            current.append(embed)
+            length += size
+        if current:
+            messages.append({"embeds": current})
+        return messages
+
+
+def serialize_notification(notification: Notification) -> dict:
+    """
+    Notificación como dict JSON para reenviarla a otra réplica (sin canal, id del journal,
+    confirmación ni instante local).
+    """
+    data = asdict(notification)
+    for name in ("channel_id", "journal_id", "ack", "received_at"):
+        del data[name]
+    return data
@@ -0,0 +1,169 @@
+import os
+import discord
+
+JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
+
+NOTIFY_FORMAT = os.getenv("NOTIFY_FORMAT", "text").strip().lower()
+if NOTIFY_FORMAT not in ("text", "embed"):
+    print(f"Error: NOTIFY_FORMAT '{NOTIFY_FORMAT}' no es válido (text o embed). Usando text.")
+    NOTIFY_FORMAT = "text"
+
+BANNER = "━━━━━━━━━━━━━━━━━━━━━━━━"
+
+# Textos de cada idioma: etiqueta del ticket (normal, subtarea), evento genérico y,
+# por tipo de notificación, (emoji, título, color del embed). `{label}` y `{label_lower}`
+# se sustituyen al compilar.
+LOCALES = {
+    "es": {
+        "labels": ("Actividad", "Subtarea"),
+        "fallback": "Evento de Jira ({event_type})",
+        "events": {
+            "created": ("🆕", "Nueva {label_lower} creada en Jira", 0x2ECC71),
+            "updated": ("🔄", "{label} actualizada en Jira", 0x3498DB),
+            "commented": ("💬", "Nuevo comentario en {label_lower} de Jira", 0x9B59B6),
+            "assigned": ("👤", "Asignación actualizada en {label_lower} de Jira", 0x1ABC9C),
+            "description_updated": ("📝", "Descripción actualizada en {label_lower} de Jira", 0x95A5A6),
+            "summary_updated": ("📋", "Resumen actualizado en {label_lower} de Jira", 0x95A5A6),
+            "deleted": ("❌", "{label} eliminada en Jira", 0xE74C3C),
+            "priority_updated": ("⚠️", "Prioridad actualizada en {label_lower} de Jira", 0xE67E22),
+            "attachment_added": ("📎", "Archivo adjunto añadido en {label_lower} de Jira", 0x95A5A6),
+        },
+        # Modo resumen: título, estados del ticket y contadores (singular, plural).
+        "digest": {
+            "title": "📊 Resumen de actividad en Jira",
+            "created": "creado",
+            "deleted": "eliminado",
+            "changes": ("cambio", "cambios"),
+            "comments": ("comentario", "comentarios"),
+            "attachments": ("adjunto", "adjuntos"),
+            "footer": "{events} eventos en {tickets} tickets",
+        },
+    },
+    "en": {
+        "labels": ("Issue", "Sub-task"),
+        "fallback": "Jira event ({event_type})",
+        "events": {
+            "created": ("🆕", "New {label_lower} created in Jira", 0x2ECC71),
+            "updated": ("🔄", "{label} updated in Jira", 0x3498DB),
+            "commented": ("💬", "New comment on Jira {label_lower}", 0x9B59B6),
+            "assigned": ("👤", "Assignee changed on Jira {label_lower}", 0x1ABC9C),
+            "description_updated": ("📝", "Description updated on Jira {label_lower}", 0x95A5A6),
+            "summary_updated": ("📋", "Summary updated on Jira {label_lower}", 0x95A5A6),
+            "deleted": ("❌", "{label} deleted in Jira", 0xE74C3C),
+            "priority_updated": ("⚠️", "Priority changed on Jira {label_lower}", 0xE67E22),
+            "attachment_added": ("📎", "Attachment added to Jira {label_lower}", 0x95A5A6),
+        },
+        "digest": {
+            "title": "📊 Jira activity digest",
+            "created": "created",
+            "deleted": "deleted",
+            "changes": ("change", "changes"),
+            "comments": ("comment", "comments"),
+            "attachments": ("attachment", "attachments"),
+            "footer": "{events} events on {tickets} tickets",
+        },
+    },
+}
+
+NOTIFY_LOCALE = os.getenv("NOTIFY_LOCALE", "es").strip().lower()
+if NOTIFY_LOCALE not in LOCALES:
+    print(f"Error: NOTIFY_LOCALE '{NOTIFY_LOCALE}' no está disponible ({', '.join(LOCALES)}). Usando es.")
+    NOTIFY_LOCALE = "es"
+
+FALLBACK_COLOR = 0x7F8C8D
+EMBED_DESCRIPTION_LIMIT = 4096
+
+
+class NotificationTemplate:
+    """
+    Plantilla ya compilada de un tipo de notificación, para tickets o subtareas.
+    El banner, el título y el enlace (con la URL de Jira) se resuelven al crearla en trozos de
+    texto fijos; al renderizar solo se unen con la clave del ticket y los detalles, lo que es
+    más rápido que volver a evaluar los f-strings o usar `str.format`.
+    """
+
+    __slots__ = ("head", "link_middle", "body_head", "separator", "end", "title", "url", "color")
+
+    def __init__(self, emoji: str, title: str, label: str, color: int, base_url: str, banner: bool = True):
+        if banner:
+            self.head = f"{BANNER}\n{emoji} **{title}** {emoji}\n"
+            self.end = f"\n{BANNER}"
+        else:
+            self.head = f"{emoji} **{title}**\n"
+            self.end = ""
+        self.url = f"{base_url}/browse/" if base_url else None
+        # El enlace es `[CLAVE](url/browse/CLAVE)` (la clave aparece dos veces) o solo la clave.
+        self.body_head = f"**{label}:** [" if base_url else f"**{label}:** "
+        self.head += self.body_head
+        self.link_middle = f"]({self.url}" if base_url else None
+        self.separator = ")\n" if base_url else "\n"
+        self.title = f"{emoji} {title}"
+        self.color = color
+
+    def _join(self, head: str, key: str, details, end: str) -> str:
+        if details is None:
+            details = ""
+        if self.link_middle is None:
+            return "".join((head, key, self.separator, details, end))
+        return "".join((head, key, self.link_middle, key, self.separator, details, end))
+
+    def render_text(self, key: str, details) -> str:
+        return self._join(self.head, key, details, self.end)
+
+    def render_embed(self, key: str, details) -> discord.Embed:
+        return discord.Embed(
+            title=self.title,
+            url=self.url + key if self.url else None,
+            description=self._join(self.body_head, key, details, "")[:EMBED_DESCRIPTION_LIMIT],
+            color=self.color
+        )
+
+
+class TemplateRegistry:
+    """
+    Plantillas de notificación compiladas una sola vez por idioma, indexadas por
+    (tipo de evento, es subtarea): formatear una notificación es una búsqueda en un
+    diccionario y unir unos pocos trozos de texto.
+    Los tipos de evento desconocidos usan una plantilla genérica que se compila la primera vez.
+    """
+
+    def __init__(self, locale: str = NOTIFY_LOCALE, base_url: str = JIRA_BASE_URL):
+        self.locale = locale
+        self.base_url = base_url
+        self._strings = LOCALES[locale]
+        self._templates = {}
+        for event_type, (emoji, title, color) in self._strings["events"].items():
+            for is_subtask in (False, True):
+                self._templates[(event_type, is_subtask)] = self._compile(emoji, title, color, is_subtask)
+
+    def _compile(self, emoji: str, title: str, color: int, is_subtask: bool, banner: bool = True) -> NotificationTemplate:
+        label = self._strings["labels"][is_subtask]
+        title = title.replace("{label_lower}", label.lower()).replace("{label}", label)
+        return NotificationTemplate(emoji, title, label, color, self.base_url, banner)
+
+    def get(self, event_type: str, is_subtask: bool) -> NotificationTemplate:
+        template = self._templates.get((event_type, is_subtask))
+        if template is None:
+            if len(self._templates) >= 256:
+                self._templates = {key: value for key, value in self._templates.items() if key[0] in self._strings["events"]}
+            title = self._strings["fallback"].replace("{event_type}", str(event_type))
+            template = self._templates[(event_type, is_subtask)] = self._compile(
+                "🔔", title, FALLBACK_COLOR, is_subtask, banner=False
+            )
+        return template
+
+    def render_text(self, notification) -> str:
+        """Texto del mensaje de Discord para una notificación."""
+        template = self._templates.get((notification.event_type, notification.is_subtask))
+        if template is None:
+            template = self.get(notification.event_type, notification.is_subtask)
+        return template.render_text(notification.ticket_key, notification.details)
+
+    def render_embed(self, notification) -> discord.Embed:
+        """Embed de Discord para una notificación (con `NOTIFY_FORMAT=embed`)."""
+        return self.get(notification.event_type, notification.is_subtask).render_embed(
+            notification.ticket_key, notification.details
+        )
+
+
+templates = TemplateRegistry()
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import threading
+
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+from web.webhook_server import DISCORD_CHANNEL_ID, Notification
+
+ROUTING_CONFIG = os.getenv("ROUTING_CONFIG", "routing.json")
+
+try:
+    ROUTING_RELOAD_INTERVAL = float(os.getenv("ROUTING_RELOAD_INTERVAL", "5"))
+except ValueError:
+    print("Error: ROUTING_RELOAD_INTERVAL no es un número válido. Usando 5 segundos.")
+    ROUTING_RELOAD_INTERVAL = 5.0
+
+# Atributos por los que se puede enrutar, en el orden de la clave de la tabla.
+ROUTING_ATTRIBUTES = ("project", "issue_type", "event", "field", "priority")
+WILDCARD = "*"
+# Combinaciones de atributos ya resueltas que se recuerdan hasta la siguiente recarga de la tabla.
+LOOKUP_CACHE_SIZE = 4096
+
+_lookup_stats = {"hits": 0, "misses": 0}
+CACHE_HITS.labels("routing").set_function(lambda: _lookup_stats["hits"])
+CACHE_MISSES.labels("routing").set_function(lambda: _lookup_stats["misses"])
+
+
+def _normalize(value) -> str:
+    return WILDCARD if value in (None, "", WILDCARD) else str(value).casefold()
+
+
+def compile_rules(rules: list) -> tuple:
+    """
+    Compila las reglas en una tabla indexada.
+    Cada regla se guarda bajo su tupla (proyecto, tipo, evento, campo, prioridad) con `*`
+    en los atributos que no fija. Devuelve la tabla y las máscaras de comodines usadas;
+    como hay como mucho 2^5 máscaras, el coste de una búsqueda no depende del número de reglas.
+    """
+    table = {}
+    masks = set()
+    for rule in rules:
+        channels = rule.get("channels") or []
+        if isinstance(channels, (int, str)):
+            channels = [channels]
+        key = tuple(_normalize(rule.get(attribute)) for attribute in ROUTING_ATTRIBUTES)
+        table.setdefault(key, set()).update(int(channel) for channel in channels)
+        masks.add(tuple(part != WILDCARD for part in key))
+
+    compiled = {key: tuple(sorted(channels)) for key, channels in table.items()}
+    return compiled, tuple(masks)
+
+
+class RoutingTable:
+    """
+    Tabla de enrutado de notificaciones a canales de Discord, cargada desde un fichero JSON:
+
+        {
+          "default_channels": [123],
+          "rules": [
+            {"project": "ABC", "event": "updated", "field": "status", "channels": [456]},
+            {"issue_type": "Bug", "priority": "Highest", "channels": [789]}
+          ]
+        }
+
+    Los atributos omitidos (o `*`) actúan como comodín. Un evento se envía a la unión de los
+    canales de todas las reglas que encajan, o a `default_channels` si no encaja ninguna.
+    El fichero se recarga automáticamente cuando cambia, sin reiniciar el bot.
+    """
+
+    def __init__(self, path: str = None, reload_interval: float = ROUTING_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._table = {}
+        self._masks = ()
+        self._default_channels = (DISCORD_CHANNEL_ID,) if DISCORD_CHANNEL_ID else ()
+        self._lookup_cache = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        if path:
+            self.reload()
+
+    @classmethod
+    def from_env(cls):
+        """Crea la tabla a partir de ROUTING_CONFIG (si el fichero no existe se usa DISCORD_CHANNEL_ID)."""
+        return cls(ROUTING_CONFIG)
+
+    def load_config(self, config: dict):
+        """Compila y activa una configuración ya leída."""
+        table, masks = compile_rules(config.get("rules") or [])
+        default_channels = config.get("default_channels")
+        if default_channels is None:
+            default_channels = [DISCORD_CHANNEL_ID] if DISCORD_CHANNEL_ID else []
+        # Se sustituye la tabla de una vez: los lectores ven la versión anterior o la nueva.
+        self._table, self._masks, self._default_channels, self._lookup_cache = (
+            table, masks, tuple(int(channel) for channel in default_channels), {}
+        )
+
+    def reload(self) -> bool:
+        """Vuelve a leer el fichero si ha cambiado. Si es inválido se mantiene la tabla anterior."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                if self._mtime is not None:
+                    print(f"Advertencia: no se encuentra {self.path}. Se mantiene la tabla de enrutado actual.")
+                    self._mtime = None
+                return False
+
+            if mtime == self._mtime:
+                return False
+
+            try:
+                with open(self.path, "r", encoding="utf-8") as config_file:
+                    self.load_config(json.load(config_file))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Error al cargar la configuración de enrutado '{self.path}': {e}")
+                self._mtime = mtime
+                return False
+
+            self._mtime = mtime
+            print(f"Tabla de enrutado cargada desde '{self.path}' ({len(self._table)} entradas).")
+            return True
+
+    def _maybe_reload(self):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            self.reload()
+
+    def channels_for(self, notification: Notification) -> tuple:
+        """Devuelve los canales de destino de una notificación."""
+        self._maybe_reload()
+        table, masks, lookup_cache = self._table, self._masks, self._lookup_cache
+
+        values = (
+            _normalize(notification.project),
+            _normalize(notification.issue_type),
+            _normalize(notification.event_type),
+            _normalize(notification.field),
+            _normalize(notification.priority),
+        )
+
+        cached = lookup_cache.get(values)
+        if cached is not None:
+            _lookup_stats["hits"] += 1
+            return cached
+        _lookup_stats["misses"] += 1
+
+        channels = None
+        for mask in masks:
+            key = tuple(value if use else WILDCARD for value, use in zip(values, mask))
+            matched = table.get(key)
+            if matched:
+                if channels is None:
+                    channels = set(matched)
+                else:
+                    channels.update(matched)
+
+        result = tuple(channels) if channels else self._default_channels
+        if len(lookup_cache) >= LOOKUP_CACHE_SIZE:
+            lookup_cache.clear()
+        lookup_cache[values] = result
+        return result
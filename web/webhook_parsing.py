@@ -0,0 +1,78 @@
+import re
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_WHITESPACE = b" \t\r\n"
+_STRING_VALUE = re.compile(rb'\s*"([^"\\]*)"')
+
+_decoder = json.JSONDecoder()
+
+
+def loads(raw):
+    """Decodifica JSON con orjson si está instalado (varias veces más rápido) o con el módulo estándar."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _find_key(raw: bytes, key: bytes, last: bool = False) -> int:
+    """
+    Busca `"key":` en los bytes y devuelve la posición de su valor, o -1.
+    Solo cuenta como clave si va tras `{` o `,`: dentro de un string JSON las comillas están
+    escapadas, así que el mismo texto en un comentario o descripción no encaja.
+    Se usa `bytes.find` (mucho más rápido que una expresión regular sobre cientos de KB).
+    """
+    needle = b'"' + key + b'"'
+    position = raw.rfind(needle) if last else raw.find(needle)
+    while position != -1:
+        before = position - 1
+        while before >= 0 and raw[before] in _WHITESPACE:
+            before -= 1
+        after = position + len(needle)
+        while after < len(raw) and raw[after] in _WHITESPACE:
+            after += 1
+        if before >= 0 and raw[before:before + 1] in (b"{", b",") and raw[after:after + 1] == b":":
+            return after + 1
+        position = raw.rfind(needle, 0, position) if last else raw.find(needle, after)
+    return -1
+
+
+def peek_event_type(raw: bytes):
+    """
+    Lee `webhookEvent` directamente de los bytes del cuerpo, sin decodificar el JSON.
+    Devuelve None si no lo encuentra (el llamador debe hacer el parseo completo).
+    """
+    position = _find_key(raw, b"webhookEvent")
+    if position == -1:
+        return None
+    match = _STRING_VALUE.match(raw, position)
+    if match is None:
+        return None
+    return match.group(1).decode("utf-8", errors="replace")
+
+
+def peek_changelog_items(raw: bytes):
+    """
+    Decodifica solo el objeto `changelog` del cuerpo y devuelve su lista `items`.
+    Jira lo envía al final del payload, así que se evita construir el issue completo
+    (con todos sus campos personalizados). Solo se acepta el `changelog` de primer nivel:
+    el último del cuerpo y seguido únicamente del `}` que cierra el objeto raíz (un
+    `issue.changelog` expandido siempre va seguido de más llaves). Devuelve None si no se
+    puede localizar así, y el llamador debe hacer el parseo completo.
+    """
+    position = _find_key(raw, b"changelog", last=True)
+    if position == -1:
+        return None
+    try:
+        text = raw[position:].decode("utf-8").lstrip()
+        changelog, end = _decoder.raw_decode(text)
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(changelog, dict) or text[end:].strip() != "}":
+        return None
+    items = changelog.get("items")
+    return items if isinstance(items, list) else []
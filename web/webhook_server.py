@@ -1,8 +1,22 @@
 import os
+import time
 import asyncio
-from flask import Flask, request, jsonify
+from dataclasses import dataclass
+from flask import Flask, Response, request, jsonify
 from datetime import datetime
 import discord
+from waitress import wasyncore
+from waitress.server import BaseWSGIServer, create_server
+
+from utils.adf import render_adf
+from utils.autocomplete import remember_webhook
+from utils.issue_cache import ISSUE_FIELDS, update_from_webhook
+from utils.ticket_index import INDEX_FIELDS, ticket_index
+from utils.metrics import CONTENT_TYPE, Counter, Histogram, render_metrics
+from utils.state import state
+from utils.user_resolver import remember_issue_accounts
+from web.notification_templates import templates
+from web.webhook_parsing import loads, peek_changelog_items, peek_event_type
 
 DISCORD_CHANNEL_ID_STR = os.getenv("DISCORD_CHANNEL_ID")
 DISCORD_CHANNEL_ID = 0
@@ -18,182 +32,417 @@ JIRA_BASE_URL = os.getenv("JIRA_BASE_URL")
 if not JIRA_BASE_URL:
     print("Advertencia: JIRA_BASE_URL no está configurado. Los enlaces en webhooks no funcionarán.")
 
+try:
+    WEBHOOK_SHUTDOWN_TIMEOUT = float(os.getenv("WEBHOOK_SHUTDOWN_TIMEOUT", "10"))
+except ValueError:
+    print("Error: WEBHOOK_SHUTDOWN_TIMEOUT no es un número válido. Usando 10 segundos.")
+    WEBHOOK_SHUTDOWN_TIMEOUT = 10.0
 
-def create_webhook_app(bot: discord.Client):
-    """Crea y configura la aplicación Flask, inyectando el cliente del bot."""
-    app = Flask(__name__)
-    
-    app.bot_client = bot
+# Longitud máxima del texto de un comentario dentro de la notificación (límite de Discord: 2000).
+COMMENT_MAX_LENGTH = 1500
+
+WEBHOOK_REQUESTS = Counter("webhook_requests_total", "Webhooks de Jira recibidos por resultado.", ("result",))
+WEBHOOK_ACK_SECONDS = Histogram("webhook_ack_seconds", "Tiempo desde que llega un webhook hasta que se responde a Jira.")
+# Series preasignadas: el handler solo hace una búsqueda en este diccionario.
+WEBHOOK_RESULTS = {
+    result: WEBHOOK_REQUESTS.labels(result)
+    for result in ("success", "ignored", "duplicate", "queue_full", "error")
+}
+
+
+def record_webhook(result: str, received_at: float):
+    """Cuenta un webhook atendido y el tiempo que ha tardado en responderse."""
+    WEBHOOK_RESULTS[result].inc()
+    WEBHOOK_ACK_SECONDS.observe(time.perf_counter() - received_at)
+
+
+@dataclass
+class Notification:
+    """Notificación pendiente de enviar a Discord, generada a partir de un webhook."""
+    event_type: str
+    ticket_key: str
+    details: str = None
+    is_subtask: bool = False
+    channel_id: int = 0
+    project: str = None
+    issue_type: str = None
+    priority: str = None
+    field: str = None
+    # (valor anterior, valor nuevo) del campo modificado, para el modo resumen.
+    change: tuple = None
+    journal_id: int = None
+    # Confirmación pendiente con la réplica que reenvió la notificación (ver `NotificationDispatcher`).
+    ack: str = None
+    # `time.perf_counter()` al recibir el webhook, para medir la latencia hasta Discord.
+    received_at: float = None
+
+
+def format_notification(notification: Notification) -> str:
+    """Construye el texto del mensaje de Discord para una notificación de Jira."""
+    return templates.render_text(notification)
+
+
+# Campo del changelog -> tipo de notificación. Los cambios de otros campos no se notifican.
+CHANGELOG_EVENTS = {
+    "status": "updated",
+    "assignee": "assigned",
+    "description": "description_updated",
+    "summary": "summary_updated",
+    "priority": "priority_updated",
+    "attachment": "attachment_added"
+}
+
+
+def _handle_comment(data: dict, ticket_key: str, is_subtask: bool, user_name: str, routing_attrs: dict):
+    comment = data.get("comment", {})
+    comment_text = "Sin contenido"
+
+    comment_author = comment.get("author", {}).get("displayName", "Usuario desconocido")
+
+    if isinstance(comment.get("body"), dict) and "content" in comment["body"]:
+        try:
+            memo_key = ("comment", comment.get("id"), comment.get("updated")) if comment.get("id") else None
+            comment_text = render_adf(comment["body"], limit=COMMENT_MAX_LENGTH, memo_key=memo_key) or "Sin contenido"
+        except Exception as e:
+            print(f"Error al procesar el comentario: {e}")
+    else:
+        comment_text = comment.get("body", "Sin contenido")
+
+    details = f"**Comentado por:** {comment_author}\n**Comentario:** {comment_text}"
+
+    return {"status": "success"}, 200, [
+        Notification("commented", ticket_key, details=details, is_subtask=is_subtask, **routing_attrs)
+    ]
+
+
+def _handle_issue_updated(data: dict, ticket_key: str, is_subtask: bool, user_name: str, routing_attrs: dict):
+    changes = data.get("changelog", {}).get("items", [])
+    if not changes:
+        return {"status": "ignored", "reason": "No changes detected"}, 200, []
 
-    async def send_discord_notification(event_type, ticket_key, details=None, is_subtask=False):
-        """Envía notificaciones de Jira al canal de Discord configurado."""
-        if not DISCORD_CHANNEL_ID:
-            print("Error al notificar: DISCORD_CHANNEL_ID no es válido.")
-            return
-
-        channel = app.bot_client.get_channel(DISCORD_CHANNEL_ID)
-        if channel:
-            label = "Subtarea" if is_subtask else "Actividad"
-            ticket_link = ticket_key
-            
-            if JIRA_BASE_URL:
-                ticket_link = f"[{ticket_key}]({JIRA_BASE_URL}/browse/{ticket_key})"
-
-            try:
-                if event_type == "created":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n🆕 **Nueva {label.lower()} creada en Jira** 🆕\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "updated":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n🔄 **{label} actualizada en Jira** 🔄\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "commented":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n💬 **Nuevo comentario en {label.lower()} de Jira** 💬\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "assigned":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n👤 **Asignación actualizada en {label.lower()} de Jira** 👤\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "description_updated":
-                    await channel.send(
-                        f"📝 **━━━━━━━━━━━━━━━━━━━━━━━━\nDescripción actualizada en {label.lower()} de Jira** 📝\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "summary_updated":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n📋 **Resumen actualizado en {label.lower()} de Jira** 📋\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "deleted":
-                    await channel.send(f"━━━━━━━━━━━━━━━━━━━━━━━━\n❌ **{label} eliminada en Jira** ❌\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "priority_updated":
-                    await channel.send(
-                        f"━━━━━━━━━━━━━━━━━━━━━━━━\n⚠️ **Prioridad actualizada en {label.lower()} de Jira** ⚠️\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                elif event_type == "attachment_added":
-                    await channel.send(
-                        f"━━━━━━━━━━━━━━━━━━━━━━━━\n📎 **Archivo adjunto añadido en {label.lower()} de Jira** 📎\n**{label}:** {ticket_link}\n{details}\n━━━━━━━━━━━━━━━━━━━━━━━━")
-                else:
-                    await channel.send(f"🔔 **Evento de Jira ({event_type})**\n**{label}:** {ticket_link}\n{details}")
-            except Exception as e:
-                print(f"Error al enviar mensaje a Discord: {e}")
+    notifications = []
+    for change in changes:
+        field = (change.get("field") or "").lower()
+        mapped_event = CHANGELOG_EVENTS.get(field)
+        if not mapped_event:
+            continue
+
+        from_value = change.get("fromString", "N/A")
+        to_value = change.get("toString", "N/A")
+
+        if field == "description":
+            details = f"**Descripción actualizada por:** {user_name}"
+        elif field == "attachment":
+            details = f"**Archivo adjunto añadido por:** {user_name}\n**Archivo:** {to_value}"
         else:
-            print(f"Error: No se pudo encontrar el canal con ID {DISCORD_CHANNEL_ID}")
+            details = f"**Actualizado por:** {user_name}\n**Cambio:** {from_value} → {to_value}"
+
+        notifications.append(
+            Notification(mapped_event, ticket_key, details=details, is_subtask=is_subtask,
+                         field=field, change=(from_value, to_value), **routing_attrs)
+        )
+
+    if not notifications:
+        return {"status": "ignored", "reason": "No relevant changes"}, 200, []
+    return {"status": "success"}, 200, notifications
+
+
+def _handle_issue_created(data: dict, ticket_key: str, is_subtask: bool, user_name: str, routing_attrs: dict):
+    issue = data.get("issue", {})
+    fields = issue.get("fields", {})
+    creador = fields.get("creator", {}).get("displayName", "Sin creador")
+    asignado_data = fields.get("assignee")
+    asignado = asignado_data.get("displayName") if asignado_data else "Sin asignar"
+    resumen = fields.get("summary", "Sin resumen")
+    estado = fields.get("status", {}).get("name", "Sin estado")
+
+    detalles = (
+        f"**Resumen:** {resumen}\n"
+        f"**Estado inicial:** {estado}\n"
+        f"**Creado por:** {creador}\n"
+        f"**Asignado a:** {asignado}"
+    )
+
+    return {"status": "success"}, 200, [
+        Notification("created", ticket_key, details=detalles, is_subtask=is_subtask, **routing_attrs)
+    ]
+
+
+def _handle_issue_deleted(data: dict, ticket_key: str, is_subtask: bool, user_name: str, routing_attrs: dict):
+    detalles = f"**Eliminado por:** {user_name}"
+
+    return {"status": "success"}, 200, [
+        Notification("deleted", ticket_key, details=detalles, is_subtask=is_subtask, **routing_attrs)
+    ]
+
+
+# Tabla de despacho por `webhookEvent`, precalculada para los nombres que envía Jira.
+EVENT_HANDLERS = {
+    "comment_created": _handle_comment,
+    "comment_updated": _handle_comment,
+    "jira:issue_updated": _handle_issue_updated,
+    "jira:issue_created": _handle_issue_created,
+    "jira:issue_deleted": _handle_issue_deleted,
+}
+# Otros nombres se resuelven por subcadena (como se hacía antes) y se recuerdan aquí.
+_LEGACY_EVENT_MATCHES = (
+    ("comment_created", _handle_comment),
+    ("comment_updated", _handle_comment),
+    ("issue_updated", _handle_issue_updated),
+    ("issue_created", _handle_issue_created),
+    ("issue_deleted", _handle_issue_deleted),
+)
+_resolved_handlers = {}
+
+
+def resolve_event_handler(event_type: str):
+    """Devuelve el handler de un tipo de evento, o None si el bot no lo notifica."""
+    handler = EVENT_HANDLERS.get(event_type)
+    if handler is not None or not isinstance(event_type, str):
+        return handler
+
+    if event_type not in _resolved_handlers:
+        if len(_resolved_handlers) >= 256:
+            _resolved_handlers.clear()
+        _resolved_handlers[event_type] = next(
+            (handler for name, handler in _LEGACY_EVENT_MATCHES if name in event_type), None
+        )
+    return _resolved_handlers[event_type]
+
+
+# Campos del issue que necesitan las cachés locales (caché de `/jira ver`, índice y autocompletado).
+CACHE_EVENT_FIELDS = tuple(dict.fromkeys((*ISSUE_FIELDS, *INDEX_FIELDS, "reporter")))
+
+
+def update_local_caches(event_type: str, issue: dict, actor: dict = None):
+    """Aplica un evento de issue a las cachés de esta réplica."""
+    update_from_webhook(event_type, issue)
+    ticket_index.update_from_webhook(event_type, issue)
+    remember_webhook(event_type, issue, actor)
+    remember_issue_accounts(issue, actor)
+
+
+def cache_event(event_type: str, issue: dict, actor: dict = None) -> dict:
+    """Evento que se difunde a las demás réplicas, reducido a los campos que usan sus cachés."""
+    fields = issue.get("fields") or {}
+    return {
+        "type": "issue",
+        "event_type": event_type,
+        "issue": {"key": issue.get("key"), "fields": {name: fields[name] for name in CACHE_EVENT_FIELDS if name in fields}},
+        "actor": {name: actor[name] for name in ("displayName", "name", "accountId") if name in actor}
+        if isinstance(actor, dict) else None,
+    }
+
+
+def apply_broadcast(message: dict):
+    """Aplica un evento difundido por otra réplica (`state.on_broadcast`)."""
+    if message.get("type") == "issue":
+        update_local_caches(message["event_type"], message["issue"], message.get("actor"))
+
+
+def process_jira_webhook(data: dict, update_caches: bool = True):
+    """
+    Interpreta el payload de un webhook de Jira.
+    Devuelve una tupla (cuerpo de respuesta, código HTTP, lista de notificaciones).
+    Es independiente del servidor web para que Flask y el servidor asyncio compartan la lógica.
+    Con `update_caches=False` (reenvíos desde el journal) no se tocan las cachés locales.
+    """
+    event_type = data.get("webhookEvent")
+    issue_data = data.get("issue", {})
+    ticket_key = issue_data.get("key")
+
+    if not ticket_key:
+        print("Webhook ignorado (sin clave de issue)")
+        return {"status": "ignored", "message": "No issue key found"}, 200, []
+
+    handler = resolve_event_handler(event_type)
+    if handler is None:
+        print(f"Webhook ignorado (tipo de evento no manejado: {event_type})")
+        return {"status": "ignored", "event": event_type}, 200, []
+
+    if update_caches:
+        update_local_caches(event_type, issue_data, data.get("user"))
+        if state.sharded:
+            state.broadcast(cache_event(event_type, issue_data, data.get("user")))
+
+    issue_fields = issue_data.get("fields") or {}
+    is_subtask = (issue_fields.get("issuetype") or {}).get("subtask", False)
+
+    if is_subtask and handler is _handle_issue_deleted:
+        print(f"Webhook ignorado (Evento 'issue_deleted' de subtarea: {ticket_key})")
+        return {"status": "ignored", "reason": "Ignoring delete events for sub-tasks"}, 200, []
+
+    user_name = data.get("user", {}).get("displayName", "Usuario desconocido")
+    routing_attrs = {
+        "project": (issue_fields.get("project") or {}).get("key") or ticket_key.split("-")[0],
+        "issue_type": (issue_fields.get("issuetype") or {}).get("name"),
+        "priority": (issue_fields.get("priority") or {}).get("name"),
+    }
+
+    return handler(data, ticket_key, is_subtask, user_name, routing_attrs)
+
+
+def ingest_jira_webhook(raw: bytes, update_caches: bool = True):
+    """
+    Procesa el cuerpo en bruto de un webhook. Antes de decodificarlo descarta, mirando solo
+    los bytes, los tipos de evento que no se notifican y las actualizaciones cuyo changelog
+    no toca ningún campo notificado (solo se decodifica el `changelog`).
+    Devuelve (cuerpo de respuesta, código HTTP, notificaciones, payload decodificado o None).
+    """
+    event_type = peek_event_type(raw)
+    if event_type is not None:
+        handler = resolve_event_handler(event_type)
+        if handler is None:
+            print(f"Webhook ignorado (tipo de evento no manejado: {event_type})")
+            return {"status": "ignored", "event": event_type}, 200, [], None
+
+        if handler is _handle_issue_updated:
+            items = peek_changelog_items(raw)
+            if items is not None and not any(
+                isinstance(item, dict) and (item.get("field") or "").lower() in CHANGELOG_EVENTS
+                for item in items
+            ):
+                reason = "No relevant changes" if items else "No changes detected"
+                return {"status": "ignored", "reason": reason}, 200, [], None
+
+    data = loads(raw)
+    body, status_code, notifications = process_jira_webhook(data, update_caches)
+    return body, status_code, notifications, data
+
+
+def webhook_dedup_key(data: dict, headers) -> str:
+    """
+    Clave de deduplicación de una entrega de Jira: el identificador del webhook
+    (`X-Atlassian-Webhook-Identifier`, que se mantiene en los reintentos) más el `timestamp`
+    del evento. Sin cabecera se usa el tipo de evento, el issue y el comentario/changelog.
+    """
+    timestamp = data.get("timestamp", "")
+    identifier = headers.get("X-Atlassian-Webhook-Identifier") if headers else None
+    if identifier:
+        return f"{identifier}:{timestamp}"
+
+    issue_key = (data.get("issue") or {}).get("key", "")
+    sub_id = (data.get("comment") or {}).get("id") or (data.get("changelog") or {}).get("id") or ""
+    return f"{data.get('webhookEvent', '')}:{issue_key}:{sub_id}:{timestamp}"
+
+
+def create_webhook_app(bot: discord.Client, dispatcher, journal=None):
+    """
+    Crea y configura la aplicación Flask, inyectando el cliente del bot y el dispatcher.
+    Si se indica un journal, cada evento con notificaciones se registra en disco antes de responder.
+    """
+    app = Flask(__name__)
+
+    app.bot_client = bot
+    app.dispatcher = dispatcher
+    app.journal = journal
 
     @app.route("/webhook", methods=["POST"])
     def jira_webhook():
         """Endpoint para recibir webhooks de Jira."""
+        received_at = time.perf_counter()
+        dedup_key = None
         try:
             print("✅ Webhook recibido desde Jira")
-            data = request.json
-
-            valid_loop = app.bot_client.loop
-
-            event_type = data.get("webhookEvent")
-            issue_data = data.get("issue", {})
-            ticket_key = issue_data.get("key")
-
-            if not ticket_key:
-                print("Webhook ignorado (sin clave de issue)")
-                return jsonify({"status": "ignored", "message": "No issue key found"}), 200
-
-            is_subtask = issue_data.get("fields", {}).get("issuetype", {}).get("subtask", False)
-            
-            if is_subtask and event_type == "issue_deleted":
-                print(f"Webhook ignorado (Evento 'issue_deleted' de subtarea: {ticket_key})")
-                return jsonify({"status": "ignored", "reason": "Ignoring delete events for sub-tasks"}), 200
-            
-            user_name = data.get("user", {}).get("displayName", "Usuario desconocido")
-
-            if "comment_created" in event_type or "comment_updated" in event_type:
-                comment = data.get("comment", {})
-                comment_text = "Sin contenido"
-
-                comment_author = comment.get("author", {}).get("displayName", "Usuario desconocido")
-
-                if isinstance(comment.get("body"), dict) and "content" in comment["body"]:
-                    try:
-                        comment_text = ""
-                        for block in comment["body"]["content"]:
-                            if block["type"] == "paragraph":
-                                for text_block in block.get("content", []):
-                                    if text_block.get("type") == "text":
-                                        comment_text += text_block.get("text", "") + "\n"
-                        comment_text = comment_text.strip() or "Sin contenido"
-                    except Exception as e:
-                        print(f"Error al procesar el comentario: {e}")
-                else:
-                    comment_text = comment.get("body", "Sin contenido")
-
-                details = f"**Comentado por:** {comment_author}\n**Comentario:** {comment_text}"
-                
-                asyncio.run_coroutine_threadsafe(
-                    send_discord_notification("commented", ticket_key, details=details, is_subtask=is_subtask),
-                    valid_loop
-                )
-                return jsonify({"status": "success"}), 200
-
-            if "issue_updated" in event_type:
-                changes = data.get("changelog", {}).get("items", [])
-                if not changes:
-                    return jsonify({"status": "ignored", "reason": "No changes detected"}), 200
-
-                for change in changes:
-                    field = change.get("field", "").lower()
-                    from_value = change.get("fromString", "N/A")
-                    to_value = change.get("toString", "N/A")
-
-                    details = f"**Actualizado por:** {user_name}\n**Cambio:** {from_value} → {to_value}"
-                    
-                    event_map = {
-                        "status": "updated",
-                        "assignee": "assigned",
-                        "description": "description_updated",
-                        "summary": "summary_updated",
-                        "priority": "priority_updated",
-                        "attachment": "attachment_added"
-                    }
-                    
-                    mapped_event = event_map.get(field)
-                    
-                    if mapped_event:
-                        if field == "description":
-                            details = f"**Descripción actualizada por:** {user_name}"
-                        elif field == "attachment":
-                            details = f"**Archivo adjunto añadido por:** {user_name}\n**Archivo:** {to_value}"
-                        
-                        asyncio.run_coroutine_threadsafe(
-                            send_discord_notification(mapped_event, ticket_key, details=details, is_subtask=is_subtask),
-                            valid_loop
-                        )
-
-                return jsonify({"status": "success"}), 200
-
-            if "issue_created" in event_type:
-                issue = data.get("issue", {})
-                fields = issue.get("fields", {})
-                creador = fields.get("creator", {}).get("displayName", "Sin creador")
-                asignado_data = fields.get("assignee")
-                asignado = asignado_data.get("displayName") if asignado_data else "Sin asignar"
-                resumen = fields.get("summary", "Sin resumen")
-                estado = fields.get("status", {}).get("name", "Sin estado")
-
-                detalles = (
-                    f"**Resumen:** {resumen}\n"
-                    f"**Estado inicial:** {estado}\n"
-                    f"**Creado por:** {creador}\n"
-                    f"**Asignado a:** {asignado}"
-                )
+            raw_body = request.get_data()
 
-                asyncio.run_coroutine_threadsafe(
-                    send_discord_notification("created", ticket_key, details=detalles, is_subtask=is_subtask),
-                    valid_loop
-                )
-                return jsonify({"status": "success"}), 200
+            body, status_code, notifications, data = ingest_jira_webhook(raw_body)
+            for notification in notifications:
+                notification.received_at = received_at
 
-            if "issue_deleted" in event_type:
-                usuario = data.get("user", {}).get("displayName", "Usuario desconocido")
-                detalles = f"**Eliminado por:** {usuario}"
+            if notifications:
+                key = webhook_dedup_key(data, request.headers)
+                # Otra réplica (o esta misma) ya recibió esta entrega.
+                if not app.dispatcher.state.claim_threadsafe(key):
+                    record_webhook("duplicate", received_at)
+                    return jsonify({"status": "ignored", "reason": "Duplicate delivery"}), 200
+                dedup_key = key
 
-                asyncio.run_coroutine_threadsafe(
-                    send_discord_notification("deleted", ticket_key, details=detalles, is_subtask=is_subtask),
-                    valid_loop
+            if notifications and app.journal:
+                journal_id = app.journal.append(dedup_key, raw_body.decode("utf-8")).result(
+                    timeout=app.journal.write_timeout
                 )
-                return jsonify({"status": "success"}), 200
-            
-            print(f"Webhook ignorado (tipo de evento no manejado: {event_type})")
-            return jsonify({"status": "ignored", "event": event_type}), 200
-        
+                if journal_id is None:
+                    record_webhook("duplicate", received_at)
+                    return jsonify({"status": "ignored", "reason": "Duplicate delivery"}), 200
+                for notification in notifications:
+                    notification.journal_id = journal_id
+                # El evento ya está en disco: si la cola está llena, lo reintentará el consumidor del journal.
+                app.dispatcher.submit_threadsafe(notifications)
+            elif notifications and not app.dispatcher.submit_threadsafe(notifications):
+                # Jira reintentará la entrega: no debe contar como duplicada.
+                app.dispatcher.state.release_threadsafe(dedup_key)
+                record_webhook("queue_full", received_at)
+                return jsonify({"status": "error", "message": "Notification queue full"}), 503
+
+            record_webhook("success" if notifications else "ignored", received_at)
+            return jsonify(body), status_code
+
         except Exception as e:
             print(f"Error fatal al procesar el webhook: {e}")
+            if dedup_key:
+                try:
+                    app.dispatcher.state.release_threadsafe(dedup_key)
+                except Exception:
+                    pass
+            record_webhook("error", received_at)
             return jsonify({"status": "error", "message": str(e)}), 500
 
-    return app
\ No newline at end of file
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Métricas del bot en formato Prometheus."""
+        return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+    return app
+
+
+
+class WaitressWebhookServer:
+    """
+    Ejecuta la aplicación Flask con waitress en un hilo del executor y permite detenerla:
+    deja de aceptar conexiones, espera a las peticiones en curso y cierra el resto.
+    """
+
+    def __init__(self, app, host: str, port: int):
+        self.server = create_server(app, host=host, port=port)
+        self._future = None
+        self._stopping = False
+
+    async def start(self):
+        self._future = asyncio.get_running_loop().run_in_executor(None, self._run)
+
+    def _run(self):
+        try:
+            self.server.run()
+        except Exception as e:
+            # Al cerrar los sockets desde otro hilo, el bucle de waitress puede fallar al salir.
+            if not self._stopping:
+                print(f"Error en el servidor Flask: {e}")
+
+    def _socket_map(self) -> dict:
+        return getattr(self.server, "map", None) or self.server._map
+
+    def _stop(self, timeout: float):
+        self._stopping = True
+        listeners = [
+            dispatcher for dispatcher in list(self._socket_map().values())
+            if isinstance(dispatcher, BaseWSGIServer)
+        ]
+        for listener in listeners:
+            listener.accepting = False
+
+        tasks = self.server.task_dispatcher
+        deadline = time.monotonic() + timeout
+        while (tasks.queue or tasks.active_count > 0) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if tasks.queue or tasks.active_count > 0:
+            print("Advertencia: se cierran peticiones de webhook que seguían en curso.")
+
+        tasks.shutdown(timeout=max(0.0, deadline - time.monotonic()))
+        wasyncore.close_all(self._socket_map())
+
+    async def stop(self, timeout: float = WEBHOOK_SHUTDOWN_TIMEOUT):
+        """Deja de aceptar webhooks y espera (hasta `timeout`) a que terminen los que están en curso."""
+        await asyncio.to_thread(self._stop, timeout)
+        if self._future:
+            await self._future